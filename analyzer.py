@@ -0,0 +1,263 @@
+# coding:utf-8
+"""
+Integrity and coverage of the catalogs of a locale tree.
+
+analyze_tree() checks every catalog
+::
+
+    <localedir>/<language>/LC_MESSAGES/<domain>.po resp. .mo
+
+in a process pool and reports per language and domain
+
+:untranslated: msgids without translation (.po)
+:fuzzy: fuzzy entries (.po)
+:obsolete: obsolete entries (.po)
+:placeholders: translations whose format placeholders ('{}', '{name}', '%s', '%(name)s')
+               differ from those of the msgid
+:quoting: translations losing the quotes around a placeholder (e.g. "'{}'" -> "{}'")
+:plurals: plural entries whose number of forms differs from nplurals of Plural-Forms
+:stale: msgids whose translation differs between .po and .mo (.mo not compiled again)
+:errors: files which cannot be read resp. parsed
+
+untranslated, fuzzy and obsolete entries are coverage issues, the other ones
+are problems. The report is JSON, the exit code is 1 if a problem is found
+(resp. any issue with --strict), so it can gate a deploy:
+::
+
+    python analyzer.py [localedir] [-j workers] [-o report.json] [--strict]
+
+"""
+import argparse
+import gettext
+import json
+import os
+import re
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from string import Formatter
+from plurals import from_plural_forms
+from pocompiler import PoSyntaxError, read_po
+
+COVERAGE = ('untranslated', 'fuzzy', 'obsolete')
+PROBLEMS = ('placeholders', 'quoting', 'plurals', 'stale', 'errors')
+
+_PERCENT_RE = re.compile(r'%(?:\((\w+)\))?[#0\- +]*(?:\d+|\*)?(?:\.(?:\d+|\*))?[diouxXeEfFgGcrsa%]')
+_QUOTED_RE = re.compile(r'''(['"])(\{[^{}]*\}|%(?:\(\w+\))?[#0\- +]*\d*(?:\.\d+)?[diouxXeEfFgGcrsa])\1''')
+
+
+def placeholders(text):
+    """
+    return the sorted format placeholders of text ('{}' for automatic numbering)
+    """
+    result = []
+    try:
+        for _, field_name, _, _ in Formatter().parse(text):
+            if field_name is not None:
+                result.append('{' + re.split(r'[.\[]', field_name, 1)[0] + '}')
+    except ValueError:
+        result.append('{?}')                        # malformed braces
+    for match in _PERCENT_RE.finditer(text):
+        if match.group(0) != '%%':
+            result.append('%({})'.format(match.group(1)) if match.group(1) else '%' + match.group(0)[-1])
+    return sorted(result)
+
+
+def quoted(text):
+    """
+    return the sorted placeholders of text enclosed in quotes
+    """
+    return sorted(match.group(0) for match in _QUOTED_RE.finditer(text))
+
+
+def _charset(header):
+    match = re.search(r'charset=([\w-]+)', header)
+    if match and match.group(1).upper() != 'CHARSET':
+        return match.group(1)
+    return 'utf-8'
+
+
+def _nplurals(plural_forms):
+    match = re.search(r'nplurals\s*=\s*(\d+)', plural_forms or '')
+    return int(match.group(1)) if match else None
+
+
+def _check_translation(report, msgid, msgid_plural, msgstrs, nplurals):
+    """
+    check placeholders, quoting and plural forms of one entry
+    """
+    expected = [placeholders(msgid)] if msgid_plural is None else [placeholders(msgid), placeholders(msgid_plural)]
+    for msgstr in msgstrs:
+        if not msgstr:
+            continue
+        found = placeholders(msgstr)
+        if found not in expected:
+            report['placeholders'].append({'msgid': msgid, 'msgstr': msgstr, 'expected': expected[-1], 'found': found})
+        expected_quoted = quoted(msgid if msgid_plural is None else msgid_plural)
+        if expected_quoted and quoted(msgstr) != expected_quoted and quoted(msgstr) != quoted(msgid):
+            report['quoting'].append({'msgid': msgid, 'msgstr': msgstr, 'expected': expected_quoted, 'found': quoted(msgstr)})
+    if msgid_plural is not None and nplurals is not None and len(msgstrs) != nplurals:
+        report['plurals'].append({'msgid': msgid, 'expected': nplurals, 'found': len(msgstrs)})
+
+
+def _analyze_po(report, po_filename):
+    """
+    check the entries of the .po file, returns its translations {msgid: msgstrs}
+    """
+    entries = read_po(po_filename)
+    charset = 'utf-8'
+    nplurals = None
+    for entry in entries:
+        if entry.is_header() and not entry.obsolete:
+            header = entry.get_value().decode('utf-8', 'replace')
+            charset = _charset(header)
+            plural_forms = next((line.split(':', 1)[1] for line in header.splitlines()
+                                 if line.lower().startswith('plural-forms:')), None)
+            nplurals = _nplurals(plural_forms)
+            if plural_forms is not None:
+                try:
+                    from_plural_forms(plural_forms)
+                except ValueError as e:
+                    report['errors'].append('{}: Plural-Forms: {}'.format(po_filename, e))
+            break
+
+    translations = {}
+    for entry in entries:
+        if entry.is_header():
+            continue
+        msgid = entry.msgid.decode(charset)
+        if entry.msgctxt is not None:
+            msgid = entry.msgctxt.decode(charset) + '\x04' + msgid
+        report['entries'] += 1
+        if entry.obsolete:
+            report['obsolete'].append(msgid)
+            continue
+        if entry.is_fuzzy():
+            report['fuzzy'].append(msgid)
+        if not entry.is_translated():
+            report['untranslated'].append(msgid)
+            continue
+        msgid_plural = None if entry.msgid_plural is None else entry.msgid_plural.decode(charset)
+        msgstrs = [msgstr.decode(charset) for msgstr in entry.get_msgstrs()]
+        _check_translation(report, msgid, msgid_plural, msgstrs, nplurals)
+        if not entry.is_fuzzy():
+            translations[msgid] = msgstrs
+    return translations
+
+
+def _mo_translations(mo_filename):
+    """
+    return the translations of the .mo file {msgid: msgstrs} and nplurals
+    """
+    with open(mo_filename, 'rb') as fp:
+        lang = gettext.GNUTranslations(fp)
+    translations = {}
+    plural_msgids = {}
+    for key, tmsg in lang._catalog.items():
+        if isinstance(key, tuple):
+            msgid, form = key
+            plural_msgids.setdefault(msgid, {})[form] = tmsg
+        elif key:
+            translations[key] = [tmsg]
+    for msgid, forms in plural_msgids.items():
+        translations[msgid] = [forms.get(form, '') for form in range(max(forms) + 1)]
+    return translations, _nplurals(lang.info().get('plural-forms'))
+
+
+def analyze_catalog(job):
+    """
+    return the report of the catalog job = (language, domain, .po filename, .mo filename)
+    (either file may be None)
+    """
+    language, domain, po_filename, mo_filename = job
+    report = {'language': language, 'domain': domain, 'po': po_filename, 'mo': mo_filename, 'entries': 0}
+    for key in COVERAGE + PROBLEMS:
+        report[key] = []
+
+    po_translations = None
+    if po_filename is not None:
+        try:
+            po_translations = _analyze_po(report, po_filename)
+        except (OSError, PoSyntaxError, UnicodeDecodeError, LookupError) as e:
+            report['errors'].append(str(e))
+    if mo_filename is not None:
+        try:
+            mo_translations, nplurals = _mo_translations(mo_filename)
+        except (OSError, UnicodeDecodeError, LookupError, ValueError) as e:
+            report['errors'].append('{}: {}'.format(mo_filename, e))
+        else:
+            if po_translations is None:
+                report['entries'] = len(mo_translations)
+                for msgid, msgstrs in mo_translations.items():
+                    _check_translation(report, msgid, None if len(msgstrs) == 1 else msgid, msgstrs, nplurals)
+            else:
+                report['stale'] = sorted(msgid for msgid in po_translations.keys() | mo_translations.keys()
+                                         if po_translations.get(msgid) != mo_translations.get(msgid))
+    report['translated'] = report['entries'] - len(report['untranslated']) - len(report['obsolete'])
+    return report
+
+
+def find_catalogs(localedir):
+    """
+    return the jobs (language, domain, .po filename, .mo filename) of the locale tree
+    """
+    jobs = []
+    for language in sorted(os.listdir(localedir)):
+        lc_messages = os.path.join(localedir, language, 'LC_MESSAGES')
+        if not os.path.isdir(lc_messages):
+            continue
+        files = {}
+        for name in sorted(os.listdir(lc_messages)):
+            domain, extension = os.path.splitext(name)
+            if extension in ('.po', '.mo'):
+                files.setdefault(domain, {})[extension] = os.path.join(lc_messages, name)
+        for domain, paths in sorted(files.items()):
+            jobs.append((language, domain, paths.get('.po'), paths.get('.mo')))
+    return jobs
+
+
+def analyze_tree(localedir, workers = None):
+    """
+    check all catalogs of the locale tree in a process pool
+
+    workers: size of the process pool (None: number of CPUs, 0: no pool)
+    returns the report as dict (JSON serializable): 'catalogs' (list of reports), 'summary'
+    """
+    jobs = find_catalogs(localedir)
+    if workers == 0 or len(jobs) < 2:
+        catalogs = [analyze_catalog(job) for job in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers = workers) as executor:
+            catalogs = list(executor.map(analyze_catalog, jobs, chunksize = max(1, len(jobs) // (4 * (workers or os.cpu_count() or 1)))))
+
+    summary = {key: sum(len(report[key]) for report in catalogs) for key in COVERAGE + PROBLEMS}
+    summary['catalogs'] = len(catalogs)
+    summary['entries'] = sum(report['entries'] for report in catalogs)
+    summary['translated'] = sum(report['translated'] for report in catalogs)
+    summary['problems'] = sum(summary[key] for key in PROBLEMS)
+    return {'localedir': localedir, 'summary': summary, 'catalogs': catalogs}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description = 'check integrity and coverage of the catalogs of a locale tree')
+    parser.add_argument('localedir', nargs = '?', help = 'locale tree (default: dir.locale of the configuration)')
+    parser.add_argument('-j', '--workers', type = int, help = 'size of the process pool (0: no pool)')
+    parser.add_argument('-o', '--output', help = 'JSON report file (default: stdout)')
+    parser.add_argument('--strict', action = 'store_true', help = 'fail on untranslated, fuzzy and obsolete entries too')
+    args = parser.parse_args()
+
+    localedir = args.localedir
+    if localedir is None:
+        from config import Config
+        localedir = Config.instance('app').get_config_parser()[Config.PATHS][Config.DIR_LOCALE]
+
+    result = analyze_tree(localedir, args.workers)
+    if args.output:
+        with open(args.output, 'w', encoding = 'utf-8') as fp:
+            json.dump(result, fp, indent = 1, ensure_ascii = False)
+    else:
+        json.dump(result, sys.stdout, indent = 1, ensure_ascii = False)
+        sys.stdout.write('\n')
+    failures = result['summary']['problems']
+    if args.strict:
+        failures += sum(result['summary'][key] for key in COVERAGE)
+    sys.exit(1 if failures else 0)
@@ -16,7 +16,8 @@ For orientation purposes, the application **logs**
 - each language change
 - each translation initialization failure (in real live, only a fallback to default language should happen)
 
-In preparation, the translations has been building with pygettext/poedit.
+In preparation, the translations has been building with pygettext/poedit
+(the .mo files can be compiled by pocompiler.py as well).
 
 The **built translation files** reside in the appropriate structure where
 
@@ -53,7 +54,9 @@ These cases can be also checked by running the **unit-test script** tests/test_a
 """
 import os
 import sys
-import gettext
+import translations
+from msgformat import format_message
+from translations import registry
 
 class App():
     """
@@ -71,10 +74,13 @@ class App():
     
     LANGUAGE_DEFAULT = 'en'
     
-    def __init__(self):
+    def __init__(self, install = True):
         """
         init the language
+
+        install: legacy mode, additionally bind _() in the builtin namespace (process-wide)
         """
+        self._install = install
         self._language = None
         self.set_language()
 
@@ -91,28 +97,51 @@ class App():
     def set_translation(self, language = LANGUAGE_DEFAULT):
         """
         configure the translation
-        set the global function alias _() to either
+        activate for the current thread resp. asyncio task
+        (and in legacy mode set the global function alias _()) either
         
         - the requested language or to
         - the default language in case of error of in case of default language is requested
         
+        the catalog is taken from the process-wide translation registry,
+        so it is loaded only once per domain/localedir/language
         """
 
         global _                                    # ensures _ in builtin namespace is treated by lang.install()
 
         try:
-            lang = gettext.translation("app",localedir='locale', languages=[language])
-            lang.install()                          # installs gettext function _() to language 'language'
+            lang = registry.translation("app", localedir='locale', language=language)
         except FileNotFoundError as fnfe:
             sys.stderr.write(str(fnfe) + "\n")
-            gettext.install("app")                  # resets gettext function _() to default language
+            lang = registry.fallback()              # default language
+        translations.activate(lang)                 # translation of the current thread resp. asyncio task
+        if self._install:
+            lang.install()                          # legacy: installs gettext function _() to language 'language'
     
+    def translate(self, message):
+        """
+        translate message by the translation of the current thread resp. asyncio task
+        """
+        return translations.gettext(message)
+
+    def translate_plural(self, msgid1, msgid2, n):
+        """
+        translate the singular resp. plural message (according to n) by the translation of the current context
+        """
+        return translations.ngettext(msgid1, msgid2, n)
+
+    def translate_many(self, messages):
+        """
+        translate messages (msgids resp. (msgid, args) pairs) by one catalog resolution
+        """
+        return translations.gettext_many(messages)
+
     def test_print(self):
         """
         print message in configured/currently chosen translation
         """
         
-        print(_("This is a test message. Translated from default language 'en' to '{}'").format(self.get_language()))
+        print(format_message("This is a test message. Translated from default language 'en' to '{}'", self.get_language()))
         
     def run(self, language = LANGUAGE_DEFAULT):
         """
@@ -17,7 +17,8 @@ For orientation purposes, the application **logs**
 - each language change
 - each translation initialization failure (in real live, only a fallback to default language should happen)
 
-In preparation, the translations has been building with pygettext/poedit.
+In preparation, the translations has been building with pygettext/poedit
+(the .mo files can be compiled by pocompiler.py as well).
 
 The **built translation files** reside in the appropriate structure where
 
@@ -55,21 +56,28 @@ These cases can be also checked by running the **unit-test script** tests/test_a
 
 Configuration by class Config (and so via cfg-file app.cfg)
 
+Requested languages (Accept-Language headers, locale strings) are resolved
+to the supported languages by negotiate_language() (see module negotiation).
+
 """
 import sys
-import gettext
+import translations
+from msgformat import format_message
+from translations import registry
 from config import Config
 
 
 class App():
     
-    def __init__(self):
+    def __init__(self, install = True):
         """
-        setup configuration via class Config and cfg-file
+        setup configuration via (process-wide, lazy) class Config and cfg-file
         init the language
+
+        install: legacy mode, additionally bind _() in the builtin namespace (process-wide)
         """
-        self._config = Config('app')
-        self._cfg = self._config.get_config_parser()
+        self._install = install
+        self._config = Config.instance('app')     # the cfg file is read on first use
         
         self._language = None
         self.set_language()
@@ -81,36 +89,88 @@ class App():
         self._language = language
         print('language set to {}'.format(self._language))
 
+    def negotiate_language(self, requested):
+        """
+        return the language of Config.LANGUAGES (with catalog) matching requested best,
+        i.e. an Accept-Language header (e.g. 'de-AT,de;q=0.9') resp. a locale string (e.g. 'fr_CA.UTF-8')
+        """
+        return self._config.get_negotiator().resolve(requested)
+
     def get_language(self):
         return self._language
     
     def set_translation(self, language = Config.LANGUAGE_DEFAULT):
         """
         configure the translation
-        set the global function alias _() to either
+        activate for the current thread resp. asyncio task
+        (and in legacy mode set the global function alias _()) either
         
         - the requested language or to
         - the default language in case of error of in case of default language is requested
         
+        the catalog is taken from the process-wide translation registry,
+        so it is loaded only once per domain/localedir/language;
+        a regional language falls back to its base language resp. to its chain configured in Config
         """
 
         global _                                    # ensures _ in builtin namespace is treated by lang.install()
 
-        localedir = self._cfg[Config.PATHS][Config.DIR_LOCALE]
+        localedir = self._config.get_localedir()
 
         try:
-            lang = gettext.translation(self._config.get_app(),localedir=localedir, languages=[language])
-            lang.install()                          # installs gettext function _() to language 'language'
+            lang = registry.chain(self._config.get_app(), localedir, self._config.get_fallback_chain(language))
         except FileNotFoundError as fnfe:
             sys.stderr.write(str(fnfe) + "\n")
-            gettext.install(self._config.get_app()) # resets gettext function _() to default language
+            lang = registry.fallback()              # default language
+        translations.activate(lang)                 # translation of the current thread resp. asyncio task
+        if self._install:
+            lang.install()                          # legacy: installs gettext function _() to language 'language'
     
+    async def set_translation_async(self, language = Config.LANGUAGE_DEFAULT):
+        """
+        asyncio version of set_translation: the catalog is loaded without blocking the event loop
+        and activated for the current asyncio task only (no legacy mode)
+        """
+        localedir = self._config.get_localedir()
+
+        try:
+            lang = await registry.get_chain(self._config.get_app(), localedir, self._config.get_fallback_chain(language))
+        except FileNotFoundError as fnfe:
+            sys.stderr.write(str(fnfe) + "\n")
+            lang = registry.fallback()              # default language
+        translations.activate(lang)
+
+    def translate(self, message):
+        """
+        translate message by the translation of the current thread resp. asyncio task
+        """
+        return translations.gettext(message)
+
+    def translate_plural(self, msgid1, msgid2, n):
+        """
+        translate the singular resp. plural message (according to n) by the translation of the current context
+        """
+        return translations.ngettext(msgid1, msgid2, n)
+
+    def translate_many(self, messages):
+        """
+        translate messages (msgids resp. (msgid, args) pairs) by one catalog resolution
+        """
+        return translations.gettext_many(messages)
+
+    def translate_languages(self, message):
+        """
+        translate message into each of Config.LANGUAGES, returns a dict language -> translation
+        """
+        localedir = self._config.get_localedir()
+        return registry.translate_languages(self._config.get_app(), localedir, Config.LANGUAGES, message)
+
     def test_print(self):
         """
         print message in configured/currently chosen translation
         """
         
-        print(_("This is a test message. Translated from default language 'en' to '{}'").format(self.get_language()))
+        print(format_message("This is a test message. Translated from default language 'en' to '{}'", self.get_language()))
         
     def run(self, language = Config.LANGUAGE_DEFAULT):
 
@@ -39,6 +39,8 @@ In the run function all variances are tried
 - homogeneous output in default language
 - homogeneous output in foreign language
 - mixed output in default and in foreign language
+- homogeneous output in foreign language by one DomainSet of both domains
+  (set_domains, without environment variable and global gettext state)
 
 Run this application with -h option
 -----------------------------------
@@ -56,7 +58,8 @@ the run consists of
 2) init translations
 3) print tests while changing languages and translations
     
-In preparation, the translations has been building with pygettext/poedit.
+In preparation, the translations has been building with pygettext/poedit
+(the .mo files can be compiled by pocompiler.py as well).
 
 The built translation files reside in the appropriate structure where
 
@@ -103,23 +106,143 @@ In the following solution
 
         is done by using the application domain (here 'app') via class-based gettext
 
+Cached argument parser
+======================
+
+The argument spec (ARGUMENTS) is defined once. The ParserFactory builds
+one parser per catalog of the help messages (and argparse translation),
+on first use of the catalog. The parsers are dropped when the registry
+reloads catalogs.
+The rendered usage/help output of a parser is memoized per argparse
+translation (i.e. the gettext environment of domain 'argparse') and
+terminal width, so -h and error output return without rebuilding anything.
+
 """
 import os
 import sys
+import shutil
 import gettext
+import threading
+import translations
+from msgformat import format_message
+from translations import registry
 import argparse
 from config import Config
 
 
+def N_(message):
+    """
+    marks message for extraction (pygettext -k N_), it is translated when the parser is built
+    """
+    return message
+
+
+ARGUMENTS = (
+    (('filename',), {}),
+    (('-o', '--overwrite'), {'help': N_('overwrite existing "samples" worksheet'), 'action': 'store_true'}),
+    (('-t', '--templates'), {'help': N_('create templates files'), 'action': 'store_true'}),
+    (('-v', '--verbose'), {'help': N_('increase output verbosity'), 'action': 'store_true'}),
+    )
+
+
+class CachedArgumentParser(argparse.ArgumentParser):
+    """
+    ArgumentParser memoizing its usage/help output per argparse translation and terminal width
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._rendered = {}
+
+    @staticmethod
+    def translation_key():
+        """
+        return the state the argparse translation depends on
+
+        argparse translates by gettext.gettext, i.e. by the global domain and the environment,
+        resp. by the active DomainSet (see set_domains)
+        """
+        environ = os.environ
+        active = translations.get_translation()
+        if isinstance(active, translations.DomainSet) and active.has_domain(translations.DOMAIN_ARGPARSE):
+            return ('domains', active.get_language())
+        return (
+            gettext.textdomain(),
+            environ.get('LANGUAGE'), environ.get('LC_ALL'), environ.get('LC_MESSAGES'), environ.get('LANG'),
+            )
+
+    def _memoized(self, kind, format_):
+        key = (kind, shutil.get_terminal_size().columns) + self.translation_key()
+        text = self._rendered.get(key)
+        if text is None:
+            text = self._rendered[key] = format_()
+        return text
+
+    def format_usage(self):
+        return self._memoized('usage', super().format_usage)
+
+    def format_help(self):
+        return self._memoized('help', super().format_help)
+
+
+class ParserFactory:
+    """
+    Builds the parser of ARGUMENTS once per catalog of the help messages
+    and argparse translation (argparse translates titles and the -h help on construction)
+    """
+
+    def __init__(self, arguments = ARGUMENTS):
+        self._arguments = arguments
+        self._parsers = {}
+        self._lock = threading.Lock()
+
+    def get_parser(self, language, translate):
+        """
+        return the parser of language, its help messages are translated by translate on first use
+
+        translate translates by the catalog of the current context, so the parser is kept per catalog
+        """
+        key = (language, translations.get_translation()) + CachedArgumentParser.translation_key()
+        parser = self._parsers.get(key)
+        if parser is None:
+            with self._lock:
+                parser = self._parsers.get(key)
+                if parser is None:
+                    parser = self._parsers[key] = self._build(translate)
+        return parser
+
+    def _build(self, translate):
+        parser = CachedArgumentParser()
+        for names, options in self._arguments:
+            options = dict(options)
+            if 'help' in options:
+                options['help'] = translate(options['help'])
+            parser.add_argument(*names, **options)
+        return parser
+
+    def clear(self):
+        """
+        drop the parsers (e.g. after the translations have changed)
+        """
+        with self._lock:
+            self._parsers.clear()
+
+
+parsers = ParserFactory()
+registry.add_listener(parsers.clear)
+
+
 class App():
     
-    def __init__(self):
+    def __init__(self, install = True):
         """
-        setup configuration via class Config and cfg-file
+        setup configuration via (process-wide, lazy) class Config and cfg-file
         init the language
+
+        install: legacy mode, additionally bind _() in the builtin namespace (process-wide)
         """
-        self._config = Config('app')
-        self._cfg = self._config.get_config_parser()
+        self._install = install
+        self._config = Config.instance('app')     # the cfg file is read on first use
         
         self._language = None
         self.set_language()
@@ -131,6 +254,13 @@ class App():
         self._language = language
         print("language set to '{}'".format(self._language))
 
+    def negotiate_language(self, requested):
+        """
+        return the language of Config.LANGUAGES (with catalog) matching requested best,
+        i.e. an Accept-Language header (e.g. 'de-AT,de;q=0.9') resp. a locale string (e.g. 'fr_CA.UTF-8')
+        """
+        return self._config.get_negotiator().resolve(requested)
+
     def get_language(self):
         return self._language
     
@@ -138,40 +268,92 @@ class App():
         os.environ['LC_MESSAGES'] = language
         print("environment variable 'LC_MESSAGES' set to '{}'".format(language))
     
+    def set_domains(self, language = Config.LANGUAGE_DEFAULT):
+        """
+        activate the domains 'app' and 'argparse' of language for the current thread resp. asyncio task
+
+        unlike set_LC_MESSAGES/set_translation, neither the environment nor global gettext state
+        is changed, so concurrent invocations in different languages do not interfere
+        """
+        translations.hook_argparse()
+        localedir = self._config.get_localedir()
+        domains = (self._config.get_app(), translations.DOMAIN_ARGPARSE)
+        translations.activate(registry.domain_set(domains, localedir, language))
+
     def set_translation(self, language = Config.LANGUAGE_DEFAULT):
         """
         configure the translation
-        set the global function alias _() to either
+        activate for the current thread resp. asyncio task
+        (and in legacy mode set the global function alias _()) either
             the requested language or to
             the default language in case of error of in case of default language is requested
+        the catalog is taken from the process-wide translation registry,
+        so it is loaded only once per domain/localedir/language;
+        a regional language falls back to its base language resp. to its chain configured in Config
         """
 
         global _                                    # ensures _ in builtin namespace is treated by lang.install()
 
-        localedir = self._cfg[Config.PATHS][Config.DIR_LOCALE]
+        localedir = self._config.get_localedir()
 
         try:
-            lang = gettext.translation(self._config.get_app(),localedir=localedir, languages=[language])
-            lang.install()                          # installs gettext function _() to language 'language'
+            lang = registry.chain(self._config.get_app(), localedir, self._config.get_fallback_chain(language))
         except FileNotFoundError as fnfe:
             sys.stderr.write(str(fnfe) + "\n")
-            gettext.install(self._config.get_app()) # resets gettext function _() to default language
+            lang = registry.fallback()              # default language
+        translations.activate(lang)                 # translation of the current thread resp. asyncio task
+        if self._install:
+            lang.install()                          # legacy: installs gettext function _() to language 'language'
     
+    async def set_translation_async(self, language = Config.LANGUAGE_DEFAULT):
+        """
+        asyncio version of set_translation: the catalog is loaded without blocking the event loop
+        and activated for the current asyncio task only (no legacy mode)
+        """
+        localedir = self._config.get_localedir()
+
+        try:
+            lang = await registry.get_chain(self._config.get_app(), localedir, self._config.get_fallback_chain(language))
+        except FileNotFoundError as fnfe:
+            sys.stderr.write(str(fnfe) + "\n")
+            lang = registry.fallback()              # default language
+        translations.activate(lang)
+
+    def translate(self, message):
+        """
+        translate message by the translation of the current thread resp. asyncio task
+        """
+        return translations.gettext(message)
+
+    def translate_plural(self, msgid1, msgid2, n):
+        """
+        translate the singular resp. plural message (according to n) by the translation of the current context
+        """
+        return translations.ngettext(msgid1, msgid2, n)
+
+    def translate_many(self, messages):
+        """
+        translate messages (msgids resp. (msgid, args) pairs) by one catalog resolution
+        """
+        return translations.gettext_many(messages)
+
+    def translate_languages(self, message):
+        """
+        translate message into each of Config.LANGUAGES, returns a dict language -> translation
+        """
+        localedir = self._config.get_localedir()
+        return registry.translate_languages(self._config.get_app(), localedir, Config.LANGUAGES, message)
+
     def test_print(self):
         """
         print message in configured/currently chosen translation
         """
         
-        print(_("This is a test message. Translated from default language 'en' to '{}'").format(self.get_language()))
+        print(format_message("This is a test message. Translated from default language 'en' to '{}'", self.get_language()))
         
     def test_parse(self):
 
-        
-        parser = argparse.ArgumentParser()
-        parser.add_argument('filename')
-        parser.add_argument('-o', '--overwrite', help=_('overwrite existing "samples" worksheet'), action='store_true')
-        parser.add_argument('-t', '--templates', help=_('create templates files'), action='store_true')
-        parser.add_argument('-v', '--verbose', help=_('increase output verbosity'), action='store_true')
+        parser = parsers.get_parser(self.get_language(), self.translate)
         try:
             parser.parse_args()
         except:
@@ -180,7 +362,7 @@ class App():
     def run(self):
 
         # gettext configuration by non-class way for internationalization of argparse
-        localedir = self._cfg[Config.PATHS][Config.DIR_LOCALE]        
+        localedir = self._config.get_localedir()        
         gettext.bindtextdomain('argparse', localedir)
         gettext.textdomain('argparse')
 
@@ -220,6 +402,14 @@ class App():
         print("inproper (mixed) output in default language and in foreign language")
         print("-------------------------------------------------------------------")
         self.test_parse()
+
+        print('\n')
+        self.set_language('de')
+        self.set_domains('de')
+        print('\n')
+        print("proper (homogeneous) output in foreign language by domain set (without LC_MESSAGES)")
+        print("-------------------------------------------------------------------------------------")
+        self.test_parse()
                 
         print('\n')
         self.set_language()
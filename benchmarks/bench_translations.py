@@ -0,0 +1,281 @@
+# coding:utf-8
+"""
+Benchmarks of translation switching and lookup.
+
+Run from the project directory
+::
+
+    python benchmarks/bench_translations.py [-o results.json] [--compare baseline.json]
+
+Cases
+
+:cold_load: load a catalog into an empty registry
+:warm_switch: switch between loaded catalogs (registry lookup and context activation)
+:set_translation_found: App.set_translation with an existing catalog
+:set_translation_missing: App.set_translation with a missing catalog (fallback path)
+:lookup: gettext() in synthetic catalogs of 10 to 100k entries
+:concurrent_switch: switch and lookup in several threads
+:format: msgformat.format_message (compiled formatter) resp. gettext().format
+:msgindex: gettext() by msgid, MessageIndex.gettext() by id resp. indexing the bound table
+:config: construction of Config resp. Config.instance
+
+The results are written as JSON, --compare reports the ratio to the results
+of a former run and fails if a case got slower than --tolerance.
+"""
+import argparse
+import json
+import os
+import platform
+import struct
+import sys
+import tempfile
+import threading
+import time
+import timeit
+from contextlib import redirect_stderr, redirect_stdout
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import translations                                 # noqa: E402
+from translations import TranslationRegistry        # noqa: E402
+from motranslations import MmapTranslations         # noqa: E402
+from msgformat import format_message                # noqa: E402
+from msgindex import MessageIndex                   # noqa: E402
+from config import Config                           # noqa: E402
+import app1                                         # noqa: E402
+
+LOCALEDIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'locale'))
+MSGID = "This is a test message. Translated from default language 'en' to '{}'"
+SIZES = (10, 100, 1000, 10000, 100000)
+
+
+def write_mo(filename, catalog):
+    """
+    write catalog (dict msgid -> msgstr) as .mo file (without hash table)
+    """
+    catalog = dict(catalog)
+    catalog.setdefault('', 'Content-Type: text/plain; charset=UTF-8\n')
+    keys = sorted(catalog, key = lambda key: key.encode())
+    ids = strs = b''
+    offsets = []
+    for key in keys:
+        msgid = key.encode()
+        msgstr = catalog[key].encode()
+        offsets.append((len(ids), len(msgid), len(strs), len(msgstr)))
+        ids += msgid + b'\x00'
+        strs += msgstr + b'\x00'
+    keystart = 7 * 4 + 16 * len(keys)
+    valuestart = keystart + len(ids)
+    koffsets = []
+    voffsets = []
+    for o1, l1, o2, l2 in offsets:
+        koffsets += [l1, o1 + keystart]
+        voffsets += [l2, o2 + valuestart]
+    with open(filename, 'wb') as fp:
+        fp.write(struct.pack('<7I', 0x950412de, 0, len(keys), 7 * 4, 7 * 4 + 8 * len(keys), 0, 0))
+        fp.write(struct.pack('<%dI' % len(koffsets), *koffsets))
+        fp.write(struct.pack('<%dI' % len(voffsets), *voffsets))
+        fp.write(ids)
+        fp.write(strs)
+
+
+def synthetic_locale(directory, size):
+    """
+    create locale/xx/LC_MESSAGES/bench.mo with size entries, return the locale dir
+    """
+    localedir = os.path.join(directory, 'locale{}'.format(size))
+    lc_messages = os.path.join(localedir, 'xx', 'LC_MESSAGES')
+    os.makedirs(lc_messages)
+    write_mo(os.path.join(lc_messages, 'bench.mo'),
+             {'message number {} of the synthetic catalog'.format(i): 'Meldung Nummer {}'.format(i) for i in range(size)})
+    return localedir
+
+
+def measure(func, number, repeat = 5):
+    """
+    return the best time per call of func in seconds
+    """
+    return min(timeit.repeat(func, number = number, repeat = repeat)) / number
+
+
+def result(name, seconds, **params):
+    return {'name': name, 'params': params, 'seconds': seconds, 'ops_per_second': 1 / seconds if seconds else None}
+
+
+def bench_registry(quick):
+    results = []
+    number = 20 if quick else 200
+    for class_ in (None, MmapTranslations):
+        kwargs = {} if class_ is None else {'class_': class_}
+        registry = TranslationRegistry(**kwargs)
+        class_name = registry.get_class().__name__
+
+        def cold():
+            registry.clear()
+            registry.translation('argparse', LOCALEDIR, 'de')
+        results.append(result('cold_load', measure(cold, number), class_=class_name))
+
+        registry.translation('app', LOCALEDIR, 'de')
+        registry.translation('app', LOCALEDIR, 'fr')
+        languages = ['de', 'fr'] * 50
+
+        def warm():
+            for language in languages:
+                translations.activate(registry.translation('app', LOCALEDIR, language))
+        results.append(result('warm_switch', measure(warm, number) / len(languages), class_=class_name))
+    return results
+
+
+def bench_set_translation(quick):
+    results = []
+    number = 100 if quick else 2000
+    with open(os.devnull, 'w') as devnull, redirect_stdout(devnull), redirect_stderr(devnull):
+        cwd = os.getcwd()
+        os.chdir(os.path.dirname(app1.__file__))
+        try:
+            app = app1.App(install = False)
+            for name, language in (('set_translation_found', 'de'), ('set_translation_missing', 'es')):
+                results.append(result(name, measure(lambda: app.set_translation(language), number), language=language))
+        finally:
+            os.chdir(cwd)
+    return results
+
+
+def bench_lookup(quick, directory):
+    results = []
+    number = 10000 if quick else 100000
+    for size in SIZES[:3] if quick else SIZES:
+        localedir = synthetic_locale(directory, size)
+        for class_ in (None, MmapTranslations):
+            kwargs = {} if class_ is None else {'class_': class_}
+            registry = TranslationRegistry(**kwargs)
+            class_name = registry.get_class().__name__
+            start = time.perf_counter()
+            lang = registry.translation('bench', localedir, 'xx')
+            results.append(result('lookup_load', time.perf_counter() - start, size=size, class_=class_name))
+            hit = 'message number {} of the synthetic catalog'.format(size // 2)
+            results.append(result('lookup_hit', measure(lambda: lang.gettext(hit), number), size=size, class_=class_name))
+            results.append(result('lookup_miss', measure(lambda: lang.gettext('no such message'), number), size=size, class_=class_name))
+    return results
+
+
+def bench_concurrent(quick):
+    results = []
+    iterations = 2000 if quick else 20000
+    registry = TranslationRegistry()
+    for language in ('de', 'fr'):
+        registry.translation('app', LOCALEDIR, language)
+    for threads in (1, 2, 4, 8):
+        barrier = threading.Barrier(threads + 1)
+
+        def work(language):
+            barrier.wait()
+            for _ in range(iterations):
+                translations.activate(registry.translation('app', LOCALEDIR, language))
+                translations.gettext(MSGID)
+
+        workers = [threading.Thread(target = work, args = (('de', 'fr')[i % 2],)) for i in range(threads)]
+        for worker in workers:
+            worker.start()
+        barrier.wait()
+        start = time.perf_counter()
+        for worker in workers:
+            worker.join()
+        seconds = time.perf_counter() - start
+        results.append(result('concurrent_switch', seconds / (threads * iterations), threads=threads))
+    return results
+
+
+def bench_format(quick):
+    number = 20000 if quick else 200000
+    with translations.using(translations.registry.translation('app', LOCALEDIR, 'de')):
+        return [
+            result('format', measure(lambda: format_message(MSGID, 'de'), number), compiled=True),
+            result('format', measure(lambda: translations.gettext(MSGID).format('de'), number), compiled=False),
+            ]
+
+
+def bench_msgindex(quick):
+    number = 20000 if quick else 200000
+    messages = MessageIndex([MSGID])
+    with translations.using(translations.registry.translation('app', LOCALEDIR, 'de')):
+        table = messages.table(translations.get_translation())
+        return [
+            result('msgindex', measure(lambda: translations.gettext(MSGID), number), lookup='msgid'),
+            result('msgindex', measure(lambda: messages.gettext(0), number), lookup='id'),
+            result('msgindex', measure(lambda: table[0], number), lookup='table'),
+            ]
+
+
+def bench_config(quick):
+    number = 20 if quick else 200
+    return [
+        result('config', measure(lambda: Config('app'), number), lazy=False),
+        result('config', measure(lambda: Config('app', lazy = True), number), lazy=True),
+        result('config_instance', measure(lambda: Config.instance('app'), number * 100)),
+        ]
+
+
+def run(quick = False):
+    with tempfile.TemporaryDirectory() as directory:
+        results = []
+        results += bench_registry(quick)
+        results += bench_set_translation(quick)
+        results += bench_lookup(quick, directory)
+        results += bench_concurrent(quick)
+        results += bench_format(quick)
+        results += bench_msgindex(quick)
+        results += bench_config(quick)
+    return {
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+        'platform': platform.platform(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'quick': quick,
+        'results': results,
+        }
+
+
+def _key(entry):
+    return entry['name'], json.dumps(entry['params'], sort_keys = True)
+
+
+def compare(report, baseline, tolerance):
+    """
+    print the ratio current/baseline per case, return the cases slower than tolerance
+    """
+    baseline = {_key(entry): entry['seconds'] for entry in baseline['results']}
+    regressions = []
+    for entry in report['results']:
+        before = baseline.get(_key(entry))
+        if not before:
+            continue
+        ratio = entry['seconds'] / before
+        print('{:<28} {:<45} {:6.2f}x'.format(entry['name'], json.dumps(entry['params'], sort_keys = True), ratio))
+        if ratio > tolerance:
+            regressions.append(entry)
+    return regressions
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description = 'benchmarks of translation switching and lookup')
+    parser.add_argument('-o', '--output', help = 'write the results as JSON to this file (default stdout)')
+    parser.add_argument('--quick', action = 'store_true', help = 'fewer iterations, catalogs up to 1000 entries')
+    parser.add_argument('--compare', help = 'JSON results of a former run')
+    parser.add_argument('--tolerance', type = float, default = 1.25, help = 'maximum ratio current/former run (default 1.25)')
+    args = parser.parse_args()
+
+    Config('app').get_log().setLevel('WARNING')
+    report = run(args.quick)
+    if args.output:
+        with open(args.output, 'w') as fp:
+            json.dump(report, fp, indent = 2)
+    else:
+        json.dump(report, sys.stdout, indent = 2)
+        print()
+    if args.compare:
+        with open(args.compare) as fp:
+            regressions = compare(report, json.load(fp), args.tolerance)
+        if regressions:
+            print('{} case(s) slower than {}x'.format(len(regressions), args.tolerance))
+            sys.exit(1)
@@ -0,0 +1,258 @@
+# coding:utf-8
+"""
+Precompiled bundle of all translation catalogs of a locale tree.
+
+Instead of one .mo file per language and domain
+::
+
+    locale/<language>/LC_MESSAGES/<domain>.mo
+
+all catalogs are packed into one indexed binary file (little endian)
+::
+
+    header          magic, version, number of catalogs
+    catalog table   per catalog (sorted by language, domain):
+                    language, domain, number of entries,
+                    offsets of original/translation/hash table
+    tables          original/translation/hash table per catalog (as in the .mo file)
+    string pool     all strings, NUL terminated, each distinct string stored once
+
+Loading the bundle maps the file and reads the header only,
+so it takes the same time for 3 or 150 languages.
+A catalog is looked up by binary search in the catalog table,
+its messages are looked up like in motranslations.MmapTranslations.
+
+Build the bundle (resp. rebuild it after the .mo files have changed) by
+::
+
+    python bundle.py [localedir] [bundlefile]
+
+"""
+import argparse
+import mmap
+import os
+import struct
+import sys
+from motranslations import MmapTranslations
+from plurals import germanic
+
+MAGIC = b'I18NBNDL'
+VERSION = 1
+FILENAME_DEFAULT = 'locale.bundle'
+
+_HEADER = struct.Struct('<8sII')
+_CATALOG = struct.Struct('<9I')
+_PAIR = struct.Struct('<II')
+
+
+def _read_mo(filename):
+    """
+    return (strings of original table, strings of translation table, hash table) of a .mo file
+    """
+    with open(filename, 'rb') as fp:
+        buf = fp.read()
+    magic = struct.unpack('<I', buf[:4])[0]
+    if magic == MmapTranslations.LE_MAGIC:
+        endian = '<'
+    elif magic == MmapTranslations.BE_MAGIC:
+        endian = '>'
+    else:
+        raise OSError(0, 'Bad magic number', filename)
+    version, count, masteridx, transidx, hashsize, hashidx = struct.unpack(endian + '6I', buf[4:28])
+    if version >> 16 not in MmapTranslations.VERSIONS:
+        raise OSError(0, 'Bad version number ' + str(version >> 16), filename)
+
+    def strings(table):
+        result = []
+        for index in range(count):
+            length, offset = struct.unpack_from(endian + 'II', buf, table + 8 * index)
+            if offset + length >= len(buf):
+                raise OSError(0, 'File is corrupt', filename)
+            result.append(buf[offset:offset + length])
+        return result
+
+    hashtable = list(struct.unpack_from(endian + '%dI' % hashsize, buf, hashidx)) if hashsize > 2 else []
+    return strings(masteridx), strings(transidx), hashtable
+
+
+def find_catalogs(localedir):
+    """
+    yield (language, domain, filename) of all .mo files of the locale tree
+    """
+    for language in sorted(os.listdir(localedir)):
+        lc_messages = os.path.join(localedir, language, 'LC_MESSAGES')
+        if not os.path.isdir(lc_messages):
+            continue
+        for name in sorted(os.listdir(lc_messages)):
+            if name.endswith('.mo'):
+                yield language, name[:-3], os.path.join(lc_messages, name)
+
+
+def build(localedir, filename):
+    """
+    pack all .mo files of localedir into the bundle filename
+
+    returns the number of packed catalogs
+    """
+    catalogs = [(language, domain, _read_mo(mofile)) for language, domain, mofile in find_catalogs(localedir)]
+    catalogs.sort(key = lambda catalog: catalog[:2])  # order of Bundle._find (file names sort 'app-x.mo' < 'app.mo')
+
+    tables_offset = _HEADER.size + _CATALOG.size * len(catalogs)
+    pool_offset = tables_offset + sum(16 * len(originals) + 4 * len(hashtable)
+                                      for language, domain, (originals, translated, hashtable) in catalogs)
+    pool = {}
+    pool_data = bytearray()
+
+    def intern(string):
+        offset = pool.get(string)
+        if offset is None:
+            offset = pool[string] = pool_offset + len(pool_data)
+            pool_data.extend(string + b'\x00')
+        return offset
+
+    records = bytearray()
+    tables = bytearray()
+    for language, domain, (originals, translated, hashtable) in catalogs:
+        language_b = language.encode()
+        domain_b = domain.encode()
+        record = [intern(language_b), len(language_b), intern(domain_b), len(domain_b), len(originals)]
+        for strings in (originals, translated):
+            record.append(tables_offset + len(tables))
+            for string in strings:
+                tables.extend(_PAIR.pack(len(string), intern(string)))
+        record.append(len(hashtable))
+        record.append(tables_offset + len(tables))
+        tables.extend(struct.pack('<%dI' % len(hashtable), *hashtable))
+        records.extend(_CATALOG.pack(*record))
+
+    tmp_filename = filename + '.tmp'
+    with open(tmp_filename, 'wb') as fp:
+        fp.write(_HEADER.pack(MAGIC, VERSION, len(catalogs)))
+        fp.write(records)
+        fp.write(tables)
+        fp.write(pool_data)
+    os.replace(tmp_filename, filename)
+    return len(catalogs)
+
+
+class BundleTranslations(MmapTranslations):
+    """
+    catalog of a Bundle, shares the mapping of the bundle file
+    """
+
+    def __init__(self, bundle, count, masteridx, transidx, hashsize, hashidx):
+        super().__init__()
+        self._filename = bundle.get_filename()
+        self._cache = {}
+        self.plural = germanic                      # germanic plural by default
+        self._map(bundle._buf, '<', count, masteridx, transidx, hashsize, hashidx)
+
+    def close(self):
+        """
+        the mapping belongs to the bundle, only the decoded messages are dropped
+        """
+        self._cache.clear()
+
+
+class Bundle:
+    """
+    Read access to a bundle file
+    """
+
+    def __init__(self, filename):
+        self._filename = filename
+        with open(filename, 'rb') as fp:
+            try:
+                self._buf = mmap.mmap(fp.fileno(), 0, access = mmap.ACCESS_READ)
+            except ValueError:                      # empty file
+                raise OSError(0, 'File is corrupt', filename)
+        if len(self._buf) < _HEADER.size:
+            raise OSError(0, 'File is corrupt', filename)
+        magic, version, self._count = _HEADER.unpack_from(self._buf, 0)
+        if magic != MAGIC:
+            raise OSError(0, 'Bad magic number', filename)
+        if version != VERSION:
+            raise OSError(0, 'Bad version number ' + str(version), filename)
+        self._translations = {}
+
+    def get_filename(self):
+        return self._filename
+
+    def _record(self, index):
+        return _CATALOG.unpack_from(self._buf, _HEADER.size + _CATALOG.size * index)
+
+    def _name(self, offset, length):
+        return self._buf[offset:offset + length].decode()
+
+    def _find(self, language, domain):
+        """
+        return the catalog record of language/domain or None
+        """
+        key = (language, domain)
+        lo, hi = 0, self._count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            record = self._record(mid)
+            name = (self._name(record[0], record[1]), self._name(record[2], record[3]))
+            if name < key:
+                lo = mid + 1
+            elif name > key:
+                hi = mid
+            else:
+                return record
+        return None
+
+    def has_translation(self, domain, language):
+        return (domain, language) in self._translations or self._find(language, domain) is not None
+
+    def translation(self, domain, language):
+        """
+        return the catalog of domain/language
+
+        raises FileNotFoundError if the bundle does not contain it
+        """
+        lang = self._translations.get((domain, language))
+        if lang is None:
+            record = self._find(language, domain)
+            if record is None:
+                raise FileNotFoundError(2, 'No translation found in bundle for domain', domain)
+            lang = self._translations.setdefault((domain, language), BundleTranslations(self, *record[4:]))
+        return lang
+
+    def get_catalogs(self):
+        """
+        return the list of (language, domain) of all catalogs
+        """
+        result = []
+        for index in range(self._count):
+            record = self._record(index)
+            result.append((self._name(record[0], record[1]), self._name(record[2], record[3])))
+        return result
+
+    def close(self):
+        self._translations.clear()
+        self._buf.close()
+
+
+_bundles = {}
+
+
+def open_bundle(filename):
+    """
+    return the (process-wide shared) Bundle of filename
+    """
+    bundle = _bundles.get(filename)
+    if bundle is None:
+        bundle = _bundles.setdefault(filename, Bundle(filename))
+    return bundle
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description = 'pack all .mo files of a locale tree into one bundle')
+    parser.add_argument('localedir', nargs = '?', default = 'locale')
+    parser.add_argument('filename', nargs = '?')
+    args = parser.parse_args()
+    filename = args.filename or os.path.join(args.localedir, FILENAME_DEFAULT)
+    count = build(args.localedir, filename)
+    print('{} catalogs packed into {}'.format(count, filename))
+    sys.exit(0)
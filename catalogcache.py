@@ -0,0 +1,202 @@
+# coding:utf-8
+"""
+Persistent cache of parsed catalogs.
+
+gettext.GNUTranslations parses the .mo file (and decodes every message)
+in each new process. CatalogCache stores the parsed catalog (messages,
+description, charset) as marshal file in a cache directory, keyed by the
+hash of the content of the .mo file and the Python version (prefixed by
+a hash of the path of the .mo file):
+::
+
+    <cache directory>/<hash of path>.<sha256 of the .mo file>.<cache tag, e.g. cpython-311-1>.marshal
+
+So a process starting cold reads the .mo file (to hash it) and loads the
+marshal file instead of parsing. A changed .mo file has another hash, i.e.
+a stale entry is never used; a missing resp. unreadable entry is parsed
+again and written atomically (temporary file and rename). Writing an entry
+removes the former entries of the same .mo file and, beyond MAXFILES_DEFAULT
+entries, the oldest ones, so the directory does not grow with each change
+of a watched catalog (see module watcher).
+
+The cache is used by the translation registry as the class of its catalogs,
+Config sets it up if option dir.cache of section paths is set:
+::
+
+    from catalogcache import catalog_cache
+    from translations import registry
+
+    registry.set_class(catalog_cache('cache').parse)
+
+"""
+import hashlib
+import io
+import marshal
+import os
+import sys
+import threading
+from plurals import PluralTranslations, from_plural_forms, germanic
+
+FORMAT = 1
+EXTENSION = '.marshal'
+MAXFILES_DEFAULT = 1024
+
+
+class CatalogCache:
+    """
+    Cache directory of parsed catalogs
+    """
+
+    def __init__(self, directory, maxfiles = MAXFILES_DEFAULT):
+        self._directory = directory
+        self._maxfiles = maxfiles
+        self._tag = '{}-{}'.format(sys.implementation.cache_tag or sys.implementation.name, FORMAT)
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    @staticmethod
+    def _source(name):
+        """
+        return the prefix of the cache files of the .mo file name
+        """
+        if not name:
+            return '-'
+        return hashlib.sha256(os.path.abspath(name).encode('utf-8', 'surrogateescape')).hexdigest()[:16]
+
+    def get_filename(self, content, name = ''):
+        """
+        return the cache file of the .mo file name with content content
+        """
+        return os.path.join(self._directory, '{}.{}.{}{}'.format(
+            self._source(name), hashlib.sha256(content).hexdigest(), self._tag, EXTENSION))
+
+    def _read(self, filename):
+        """
+        return the catalog of cache file filename or None
+        """
+        try:
+            with open(filename, 'rb') as fp:
+                data = fp.read()
+            catalog, info, charset = marshal.loads(data)    # marshal.load(fp) reads the file in small pieces
+        except (OSError, EOFError, ValueError, TypeError):
+            return None
+        lang = PluralTranslations()                 # no file: nothing is parsed
+        lang._catalog = catalog
+        lang._info = info
+        lang._charset = charset
+        plural_forms = info.get('plural-forms')
+        if plural_forms:
+            lang.plural = from_plural_forms(plural_forms)
+        else:
+            lang.plural = germanic
+        return lang
+
+    def _write(self, filename, lang):
+        """
+        write the catalog lang to cache file filename atomically
+        """
+        tmp_filename = '{}.{}.tmp'.format(filename, os.getpid())
+        try:
+            os.makedirs(self._directory, exist_ok = True)
+            with open(tmp_filename, 'wb') as fp:
+                marshal.dump((lang._catalog, lang._info, lang._charset), fp)
+            os.replace(tmp_filename, filename)
+        except (OSError, ValueError):               # e.g. read-only cache: parse on each start
+            try:
+                os.remove(tmp_filename)
+            except OSError:
+                pass
+            return
+        self._prune(filename)
+
+    def _prune(self, filename):
+        """
+        remove the former entries of the .mo file of cache file filename and the oldest entries beyond maxfiles
+        """
+        keep = os.path.basename(filename)
+        prefix = keep.split('.', 1)[0] + '.'
+        try:
+            names = [name for name in os.listdir(self._directory) if name.endswith(EXTENSION) and name != keep]
+        except OSError:
+            return
+        remaining = []
+        for name in names:
+            path = os.path.join(self._directory, name)
+            if prefix != '-.' and name.startswith(prefix):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+            else:
+                remaining.append(path)
+        excess = len(remaining) + 1 - self._maxfiles
+        if excess > 0:
+            def mtime(path):
+                try:
+                    return os.path.getmtime(path)
+                except OSError:
+                    return 0
+            for path in sorted(remaining, key = mtime)[:excess]:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+    def parse(self, fp):
+        """
+        return the catalog of the open .mo file fp (usable as class_ of TranslationRegistry)
+        """
+        content = fp.read()
+        name = getattr(fp, 'name', '')
+        filename = self.get_filename(content, name if isinstance(name, str) else '')
+        lang = self._read(filename)
+        with self._lock:
+            if lang is not None:
+                self._hits += 1
+            else:
+                self._misses += 1
+        if lang is not None:
+            return lang
+        stream = io.BytesIO(content)
+        stream.name = name
+        lang = PluralTranslations(stream)
+        self._write(filename, lang)
+        return lang
+
+    def clear(self):
+        """
+        remove all cache files
+        """
+        try:
+            names = os.listdir(self._directory)
+        except OSError:
+            return
+        for name in names:
+            if name.endswith(EXTENSION):
+                try:
+                    os.remove(os.path.join(self._directory, name))
+                except OSError:
+                    pass
+
+    def get_directory(self):
+        return self._directory
+
+    def get_stats(self):
+        with self._lock:
+            return {'hits': self._hits, 'misses': self._misses}
+
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+def catalog_cache(directory):
+    """
+    return the (process-wide shared) CatalogCache of directory
+    """
+    with _caches_lock:
+        cache = _caches.get(directory)
+        if cache is None:
+            cache = _caches[directory] = CatalogCache(directory)
+    return cache
@@ -2,7 +2,12 @@
 
 import os
 from os.path import abspath, dirname, join
+import atexit
 import logging
+import queue
+import threading
+import time
+from logging.handlers import QueueHandler, QueueListener
 from configparser import ConfigParser
 
 class Constants:
@@ -15,6 +20,12 @@ class Constants:
     GENERAL = 'general'
 
     LANGUAGE = 'language'
+    PRELOAD = 'preload'
+    PRELOAD_DOMAINS = 'preload.domains'
+    PRELOAD_WORKERS = 'preload.workers'
+    LOG_QUEUE = 'log.queue'
+    LOG_PER_RUN = 'log.per_run'
+    WATCH_INTERVAL = 'watch.interval'
     
     LOCALE = 'locale'
     LC_MESSAGES = 'LC_MESSAGES'
@@ -29,12 +40,18 @@ class Constants:
         LANGUAGE_FR,
         ]
     
+    FALLBACKS = 'fallbacks'
+
     PATHS = 'paths'
     
     DIR_LOCALE = 'dir.locale'
     DIR_LOCALE_DEFAULTNAME = 'locale'
     DIR_LOGS = 'dir.logs'
     DIR_LOGS_DEFAULTNAME = 'logs'
+    DIR_CACHE = 'dir.cache'
+    DIR_CACHE_DEFAULTNAME = 'cache'
+    FILE_BUNDLE = 'file.bundle'
+    FILE_BUNDLE_DEFAULTNAME = 'locale.bundle'
 
 class Config(Constants):
     """
@@ -43,78 +60,311 @@ class Config(Constants):
     - cfg file
     - paths
     - log
+    - translation bundle (if built, see module bundle)
+    - persistent cache of parsed catalogs (if dir.cache is set in section paths, see module catalogcache)
+    - preload of the catalogs of all LANGUAGES (if option preload is set in section general)
+    - fallback chains of languages (section fallbacks, e.g. de_ch = de)
+    - negotiation of requested languages (Accept-Language headers, locale strings, see module negotiation)
     
+    In lazy mode, the cfg file is read on first access to the config parser and
+    the paths and the log are set up on first access to the log.
+    Config.instance() returns a process-wide (lazy) Config per app,
+    so repeated construction of an App reuses it.
+
+    The log handlers are set up once per app and process.
+    Options of section general:
+
+    :log.queue: the handlers run on a background thread (QueueHandler/QueueListener)
+    :log.per_run: separate log file per run (<app>_<timestamp>_<pid>.log)
+    :watch.interval: reload changed catalogs, polling every watch.interval seconds (0: off)
     """
 
     cfg = ConfigParser()
 
-    def __init__(self, app):
+    _instances = {}
+    _instances_lock = threading.Lock()
+
+    _logs = {}
+    _listeners = {}
+    _logs_lock = threading.Lock()
+
+    def __init__(self, app, lazy = False):
         
         self._app = app
 
         self._cfg_filename = join(dirname(abspath(__file__)), self.get_app() + ".cfg")
 
-        try:
-            with open(self._cfg_filename):
-                self.cfg.read(self._cfg_filename)
-        except IOError:
-            self._create_config()
+        self._lock = threading.RLock()
+        self._loaded = False
+        self._log = None
+        self._bundle = None
+        self._cache = None
+        self._preload_report = None
 
-        self.check_paths()
+        if not lazy:
+            self._load()
+            self.get_log()
+
+    @classmethod
+    def instance(cls, app, lazy = True):
+        """
+        return the process-wide Config of app
+        """
+        with cls._instances_lock:
+            config = cls._instances.get(app)
+            if config is None:
+                config = cls._instances[app] = cls(app, lazy = lazy)
+        return config
 
-        self._init_log()
+    def _load(self):
+        """
+        read resp. create the cfg file, map the bundle and preload the catalogs (once)
+        """
+        with self._lock:
+            if self._loaded:
+                return
+            self._loaded = True
+
+            try:
+                with open(self._cfg_filename):
+                    self.cfg.read(self._cfg_filename)
+            except IOError:
+                self._create_config()
+
+            self._init_bundle()
+            self._init_cache()
+
+            if self.cfg[Config.GENERAL].getboolean(Config.PRELOAD, fallback = False):
+                self.preload()
+
+            interval = self.cfg[Config.GENERAL].getfloat(Config.WATCH_INTERVAL, fallback = 0)
+            if interval > 0:
+                from translations import registry
+                from watcher import watch
+                watch(registry, self.cfg[Config.PATHS][Config.DIR_LOCALE], interval, self.get_log())
     
     def _create_config(self):
 
         root_directory = dirname(abspath(__file__))
         locale_directory = os.path.join(root_directory, Config.DIR_LOCALE_DEFAULTNAME)
         logs_directory = os.path.join(root_directory, Config.DIR_LOGS_DEFAULTNAME)
+        cache_directory = os.path.join(root_directory, Config.DIR_CACHE_DEFAULTNAME)
 
         self.cfg[Config.GENERAL] = {
             Config.LANGUAGE: Config.LANGUAGE_DEFAULT,
+            Config.PRELOAD: 'no',
+            Config.PRELOAD_DOMAINS: self.get_app(),
+            Config.PRELOAD_WORKERS: '0',
+            Config.LOG_QUEUE: 'no',
+            Config.LOG_PER_RUN: 'no',
+            Config.WATCH_INTERVAL: '0',
             }
 
+        self.cfg[Config.FALLBACKS] = {}
+
         self.cfg[Config.PATHS] = {
             Config.DIR_LOCALE: locale_directory,
             Config.DIR_LOGS: logs_directory,
+            Config.DIR_CACHE: cache_directory,
+            Config.FILE_BUNDLE: os.path.join(locale_directory, Config.FILE_BUNDLE_DEFAULTNAME),
             }
         
         with open(self.get_config_filename(), 'w') as config_file:
             self.cfg.write(config_file)
         
     def _init_log(self):
+        """
+        set up the log of the app, the handlers are added only once per app and process
+        """
+        with Config._logs_lock:
+            log = Config._logs.get(self.get_app())
+            if log is None:
+                log = Config._logs[self.get_app()] = self._create_log()
+        self._log = log
+
+    def _create_log(self):
         
-        # TODO: separate log file per run
+        self.check_paths()
+
+        general = self.cfg[Config.GENERAL]
+
         # LOG
-        self._log = logging.getLogger(self.get_app())
-        self._log.setLevel(logging.DEBUG)
+        log = logging.getLogger(self.get_app())
+        log.setLevel(logging.DEBUG)
         fmt = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
         
         sh = logging.StreamHandler()
         sh.setFormatter(fmt)
         sh.setLevel(logging.DEBUG)
-        self._log.addHandler(sh)
         
-        file_name = os.path.join(self.cfg[Config.PATHS][Config.DIR_LOGS], self.get_app() + '.log')
+        if general.getboolean(Config.LOG_PER_RUN, fallback = False):
+            log_name = '{}_{}_{}.log'.format(self.get_app(), time.strftime('%Y%m%d_%H%M%S'), os.getpid())
+        else:
+            log_name = self.get_app() + '.log'
+        file_name = os.path.join(self.cfg[Config.PATHS][Config.DIR_LOGS], log_name)
         fh = logging.FileHandler(file_name, mode='a')
         fh.setFormatter(fmt)
         fh.setLevel(logging.DEBUG)
-        self._log.addHandler(fh)
+
+        if general.getboolean(Config.LOG_QUEUE, fallback = False):
+            log_queue = queue.SimpleQueue()
+            listener = QueueListener(log_queue, sh, fh, respect_handler_level = True)
+            listener.start()
+            atexit.register(listener.stop)
+            Config._listeners[self.get_app()] = listener
+            log.addHandler(QueueHandler(log_queue))
+        else:
+            log.addHandler(sh)
+            log.addHandler(fh)
+        return log
+
+    @classmethod
+    def shutdown_log(cls, app):
+        """
+        flush and remove the handlers of the log of app (resp. stop its background thread)
+        """
+        with cls._logs_lock:
+            log = cls._logs.pop(app, None)
+            listener = cls._listeners.pop(app, None)
+        if log is None:
+            return
+        handlers = list(log.handlers)
+        if listener is not None:
+            listener.stop()
+            atexit.unregister(listener.stop)
+            handlers.extend(listener.handlers)
+        for handler in handlers:
+            log.removeHandler(handler)
+            handler.close()
+        for config in list(cls._instances.values()):
+            if config.get_app() == app:
+                config._log = None
+
+    def _init_bundle(self):
+        """
+        map the translation bundle and let the registry take the catalogs from it
+        """
+        file_name = self.cfg[Config.PATHS].get(Config.FILE_BUNDLE)
+        if not file_name:
+            return
+        file_name = join(dirname(abspath(__file__)), file_name)
+        if os.path.exists(file_name):
+            from bundle import open_bundle
+            from translations import registry
+            self._bundle = open_bundle(file_name)
+            registry.add_bundle(self.cfg[Config.PATHS][Config.DIR_LOCALE], self._bundle)
+
+    def _init_cache(self):
+        """
+        let the registry parse the catalogs by the persistent cache of parsed catalogs (if dir.cache is set)
+
+        the cache is installed once and only if the registry parses by the default class,
+        the loaded catalogs are kept
+        """
+        directory = self.cfg[Config.PATHS].get(Config.DIR_CACHE)
+        if not directory:
+            return
+        directory = join(dirname(abspath(__file__)), directory)
+        from catalogcache import CatalogCache, catalog_cache
+        from plurals import PluralTranslations
+        from translations import registry
+        class_ = registry.get_class()
+        owner = getattr(class_, '__self__', None)
+        if isinstance(owner, CatalogCache) and owner.get_directory() == directory:
+            self._cache = owner                     # installed already (e.g. by another Config)
+        elif class_ is PluralTranslations:          # a custom class (e.g. MmapTranslations) is kept
+            self._cache = catalog_cache(directory)
+            registry.set_class(self._cache.parse)
+
+    def get_cache(self):
+        return self._cache
+
+    def preload(self):
+        """
+        load and validate the catalogs of all LANGUAGES and preload domains,
+        log the load time per catalog
+
+        returns the report of TranslationRegistry.preload
+        """
+        general = self.get_config_parser()[Config.GENERAL]
+        domains = [domain.strip() for domain in general.get(Config.PRELOAD_DOMAINS, self.get_app()).split(',') if domain.strip()]
+        workers = general.getint(Config.PRELOAD_WORKERS, fallback = 0)
+        localedir = self.cfg[Config.PATHS][Config.DIR_LOCALE]
+
+        from translations import registry
+        maxsize = registry.get_maxsize()
+        self._preload_report = registry.preload(domains, localedir, Config.LANGUAGES, workers)
+        if registry.get_maxsize() != maxsize:
+            self.get_log().warning("preload: registry size raised from {} to {} catalogs".format(maxsize, registry.get_maxsize()))
+        for entry in self._preload_report:
+            if entry['status'] in ('ok', 'missing'):
+                level = logging.INFO
+            else:
+                level = logging.ERROR
+            self.get_log().log(level, "preload {domain}/{language}: {status} ({seconds:.6f}s)".format(**entry))
+        return self._preload_report
+
+    def get_preload_report(self):
+        return self._preload_report
 
     def get_app(self):
         return self._app
     
     def get_log(self):
+        if self._log is None:
+            with self._lock:
+                self._load()                        # may log itself (preload)
+                if self._log is None:
+                    self._init_log()
         return self._log
+
+    def get_bundle(self):
+        return self._bundle
+
+    def get_fallback_chain(self, language):
+        """
+        return the languages to translate language by, most specific first
+
+        the chain is configured in section fallbacks (e.g. de_ch = de_at, de),
+        otherwise it leads from the region to the base language (de_CH -> de).
+        It ends before the default language, which needs no catalog.
+        """
+        from negotiation import fallback_chain, normalize
+        language = normalize(language)
+        fallbacks = self.get_config_parser().get(Config.FALLBACKS, language.lower(), fallback = None)
+        if fallbacks is None:
+            languages = fallback_chain(language)
+        else:
+            languages = [language] + [normalize(fallback) for fallback in fallbacks.split(',') if fallback.strip()]
+        chain = []
+        for fallback in languages:
+            if fallback == Config.LANGUAGE_DEFAULT and chain:
+                break
+            if fallback not in chain:
+                chain.append(fallback)
+        return chain
+
+    def get_negotiator(self):
+        """
+        return the (process-wide) negotiator resolving requested languages to the LANGUAGES with catalog
+        """
+        from negotiation import negotiator
+        localedir = self.get_config_parser()[Config.PATHS][Config.DIR_LOCALE]
+        return negotiator(Config.LANGUAGES, self.get_app(), localedir, Config.LANGUAGE_DEFAULT)
     
+    def get_localedir(self):
+        return self.get_config_parser()[Config.PATHS][Config.DIR_LOCALE]
+
     def get_config_filename(self):
         return self._cfg_filename
     
     def get_config_parser(self):
+        if not self._loaded:
+            self._load()
         return self.cfg
 
     def check_paths(self):
-        self.check_path(self.cfg[Config.PATHS][Config.DIR_LOGS])
+        self.check_path(self.get_config_parser()[Config.PATHS][Config.DIR_LOGS])
 
     def check_path(self, directory):
         path = join(dirname(abspath(__file__)), directory)
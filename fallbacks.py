@@ -0,0 +1,76 @@
+# coding:utf-8
+"""
+Fallback chains of catalogs, flattened into one lookup table.
+
+A chain like de_CH -> de -> en translates a message by the first catalog
+containing it (the default language 'en' needs no catalog: the msgid).
+gettext links such catalogs by add_fallback(), so each miss walks the
+linked catalogs one by one.
+
+FlatTranslations instead merges the entries of all catalogs of the chain
+into one dict when the chain is built, so a lookup is a single dictionary
+probe regardless of the length of the chain:
+::
+
+    from translations import registry
+
+    lang = registry.chain('app', localedir, ['de_CH', 'de'])
+
+The flat table of a chain is built from the flat table of its tail
+(de_CH -> de is built from de), so the message strings are shared by all
+chains, only the tables (dicts) are separate.
+
+The plural forms are evaluated by the plural rule of the first catalog of
+the chain, so a chain should consist of variants of one language.
+
+"""
+import gettext
+
+
+def catalog_items(lang):
+    """
+    return the entries of catalog lang as (key, translation) pairs in the form of
+    gettext.GNUTranslations (key is the msgid resp. (msgid, index of plural form))
+    """
+    get_translation = getattr(lang, 'get_translation', None)
+    if get_translation is not None:                 # e.g. instrumentation.InstrumentedTranslations
+        lang = get_translation()
+    items = getattr(lang, 'items', None)
+    if items is not None:                           # e.g. motranslations.MmapTranslations
+        return items()
+    return getattr(lang, '_catalog', {}).items()
+
+
+class FlatTranslations(gettext.GNUTranslations):
+    """
+    gettext.GNUTranslations of a flat table built from a chain of catalogs
+    """
+
+    def __init__(self, catalogs, tail = None):
+        """
+        catalogs: the catalogs of the chain, most specific first
+        tail: FlatTranslations of catalogs[1:] (if already built) to build the table from
+        """
+        gettext.NullTranslations.__init__(self)
+        first = catalogs[0]
+        self._catalogs = tuple(catalogs)
+        self._info = dict(first.info())
+        self._charset = first.charset()
+        self.plural = getattr(first, 'plural', None) or (lambda n: int(n != 1))
+        if tail is not None:
+            table = dict(tail._catalog)
+            catalogs = catalogs[:1]
+        else:
+            table = {}
+        for lang in reversed(catalogs):
+            table.update(catalog_items(lang))
+        self._catalog = table
+
+    def get_catalogs(self):
+        """
+        return the catalogs of the chain
+        """
+        return self._catalogs
+
+    def __len__(self):
+        return len(self._catalog)
@@ -0,0 +1,258 @@
+# coding:utf-8
+"""
+Optional instrumentation of translation lookups.
+
+When enabled at the translation registry
+::
+
+    from instrumentation import Instrumentation, logging_sink
+    from translations import registry
+
+    instrumentation = Instrumentation()
+    instrumentation.add_sink(logging_sink(log))
+    registry.enable_instrumentation(instrumentation)
+    instrumentation.start_dump(60)                  # emit a snapshot every 60 seconds
+
+the registry records per domain and language
+
+- lookups found in the catalog (hits) resp. falling back to the msgid (misses),
+  also of the fallback catalog of a missing language (fallback = True) and of
+  chains (counted for the first language of the chain)
+- requests of languages without catalog (missing)
+- the load time of catalogs (histogram)
+
+and optionally the number of lookups per msgid.
+A lookup counts as miss if the translation equals the msgid.
+The counters are updated without locking, so under concurrency they are
+approximate.
+
+When disabled (the default), the registry returns the plain catalogs,
+so lookups have no overhead at all.
+
+"""
+import builtins
+import json
+import logging
+import threading
+import time
+
+BUCKETS = (0.0001, 0.001, 0.01, 0.1, 1.0)
+
+
+class CatalogStats:
+    """
+    counters of one domain/language
+    """
+
+    __slots__ = ('hits', 'misses', 'missing', 'loads', 'load_buckets', 'load_seconds')
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.missing = 0
+        self.loads = 0
+        self.load_buckets = [0] * (len(BUCKETS) + 1)
+        self.load_seconds = 0.0
+
+    def as_dict(self):
+        histogram = {'<={}'.format(bound): count for bound, count in zip(BUCKETS, self.load_buckets)}
+        histogram['>{}'.format(BUCKETS[-1])] = self.load_buckets[-1]
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'missing': self.missing,
+            'loads': self.loads,
+            'load_seconds': self.load_seconds,
+            'load_histogram': histogram,
+            }
+
+
+class InstrumentedTranslations:
+    """
+    catalog wrapper counting the lookups, other attributes are taken from the catalog
+    """
+
+    __slots__ = ('_lang', '_stats', '_msgids', '__weakref__')
+
+    def __init__(self, lang, stats, msgids = None):
+        self._lang = lang
+        self._stats = stats
+        self._msgids = msgids
+
+    def _count(self, message, found):
+        if found:
+            self._stats.hits += 1
+        else:
+            self._stats.misses += 1
+        if self._msgids is not None:
+            self._msgids[message] = self._msgids.get(message, 0) + 1
+
+    def gettext(self, message):
+        tmsg = self._lang.gettext(message)
+        self._count(message, tmsg != message)
+        return tmsg
+
+    def ngettext(self, msgid1, msgid2, n):
+        tmsg = self._lang.ngettext(msgid1, msgid2, n)
+        self._count(msgid1, tmsg != msgid1 and tmsg != msgid2)
+        return tmsg
+
+    def pgettext(self, context, message):
+        tmsg = self._lang.pgettext(context, message)
+        self._count(message, tmsg != message)
+        return tmsg
+
+    def npgettext(self, context, msgid1, msgid2, n):
+        tmsg = self._lang.npgettext(context, msgid1, msgid2, n)
+        self._count(msgid1, tmsg != msgid1 and tmsg != msgid2)
+        return tmsg
+
+    def wrap_formatter(self, msgid, compile_template):
+        """
+        hook of msgformat: compile the translation of msgid, count each call of the formatter
+        """
+        tmsg = self._lang.gettext(msgid)
+        found = tmsg != msgid
+        formatter = compile_template(tmsg)
+        count = self._count
+
+        def _format(*args, **kwargs):
+            count(msgid, found)
+            return formatter(*args, **kwargs)
+        return _format
+
+    def install(self, names = None):
+        """
+        same as gettext.NullTranslations.install, but installs the counting functions
+        """
+        builtins.__dict__['_'] = self.gettext
+        if names is not None:
+            allowed = {'gettext', 'ngettext', 'npgettext', 'pgettext'}
+            for name in allowed & set(names):
+                builtins.__dict__[name] = getattr(self, name)
+
+    def get_translation(self):
+        return self._lang
+
+    def __getattr__(self, name):
+        return getattr(self._lang, name)
+
+
+class Instrumentation:
+    """
+    Collects the counters of all domains/languages and emits snapshots to sinks
+    """
+
+    def __init__(self, count_msgids = False):
+        self._count_msgids = count_msgids
+        self._stats = {}
+        self._msgids = {}
+        self._sinks = []
+        self._lock = threading.Lock()
+        self._dump_thread = None
+        self._dump_stop = threading.Event()
+
+    def stats(self, domain, language):
+        """
+        return the counters of domain/language
+        """
+        key = (domain, language)
+        stats = self._stats.get(key)
+        if stats is None:
+            with self._lock:
+                stats = self._stats.setdefault(key, CatalogStats())
+        return stats
+
+    def wrap(self, domain, language, lang):
+        """
+        return lang wrapped into the counting catalog of domain/language
+        """
+        msgids = None
+        if self._count_msgids:
+            with self._lock:
+                msgids = self._msgids.setdefault((domain, language), {})
+        return InstrumentedTranslations(lang, self.stats(domain, language), msgids)
+
+    def record_load(self, domain, language, seconds):
+        stats = self.stats(domain, language)
+        stats.loads += 1
+        stats.load_seconds += seconds
+        for index, bound in enumerate(BUCKETS):
+            if seconds <= bound:
+                break
+        else:
+            index = len(BUCKETS)
+        stats.load_buckets[index] += 1
+
+    def record_missing(self, domain, language):
+        self.stats(domain, language).missing += 1
+
+    def snapshot(self):
+        """
+        return all counters as dict (JSON serializable)
+        """
+        with self._lock:
+            items = list(self._stats.items())
+            msgids = {key: dict(counts) for key, counts in self._msgids.items()}
+        catalogs = []
+        for (domain, language), stats in items:
+            entry = {'domain': domain, 'language': language}
+            entry.update(stats.as_dict())
+            if (domain, language) in msgids:
+                entry['msgids'] = msgids[(domain, language)]
+            catalogs.append(entry)
+        return {'timestamp': time.time(), 'catalogs': catalogs}
+
+    def reset(self):
+        with self._lock:
+            for stats in self._stats.values():
+                stats.__init__()
+            for counts in self._msgids.values():
+                counts.clear()
+
+    def add_sink(self, sink):
+        """
+        add a callable receiving the snapshots
+        """
+        self._sinks.append(sink)
+
+    def remove_sink(self, sink):
+        self._sinks.remove(sink)
+
+    def emit(self):
+        """
+        pass a snapshot to all sinks
+        """
+        snapshot = self.snapshot()
+        for sink in list(self._sinks):
+            sink(snapshot)
+        return snapshot
+
+    def start_dump(self, interval):
+        """
+        emit a snapshot every interval seconds on a background thread
+        """
+        self.stop_dump()
+        self._dump_stop.clear()
+
+        def dump():
+            while not self._dump_stop.wait(interval):
+                self.emit()
+
+        self._dump_thread = threading.Thread(target = dump, name = 'instrumentation-dump', daemon = True)
+        self._dump_thread.start()
+
+    def stop_dump(self):
+        if self._dump_thread is not None:
+            self._dump_stop.set()
+            self._dump_thread.join()
+            self._dump_thread = None
+
+
+def logging_sink(log, level = logging.INFO):
+    """
+    return a sink writing the snapshots as JSON to log
+    """
+    def sink(snapshot):
+        log.log(level, 'translation stats %s', json.dumps(snapshot))
+    return sink
@@ -0,0 +1,261 @@
+# coding:utf-8
+"""
+Memory-mapped reader of compiled translation files (.mo).
+
+gettext.GNUTranslations reads the whole .mo file and decodes every
+msgid/msgstr into a dict when the catalog is loaded.
+MmapTranslations instead maps the file into memory and only reads the
+header at load time. A message is looked up
+
+- via the hash table of the .mo file (if the file contains one) or
+- via binary search in the sorted table of original strings
+
+and decoded when it is looked up for the first time. Only found translations
+are kept decoded, so looking up arbitrary messages does not grow the catalog.
+Like gettext.GNUTranslations, gettext() of a plural msgid returns the form
+of n = 1.
+As the file is mapped read-only, several worker processes share the same
+pages of the page cache.
+
+Usage:
+::
+
+    from motranslations import MmapTranslations
+    from translations import TranslationRegistry
+
+    registry = TranslationRegistry(class_=MmapTranslations)
+
+"""
+import gettext
+import mmap
+import struct
+from plurals import germanic, plural_function
+
+def hashpjw(key):
+    """
+    hash function of GNU gettext for the hash table of .mo files
+    """
+    hval = 0
+    for c in key:
+        hval = ((hval << 4) + c) & 0xffffffff
+        g = hval & 0xf0000000
+        if g:
+            hval ^= g >> 24
+            hval ^= g
+    return hval
+
+
+class MmapTranslations(gettext.GNUTranslations):
+    """
+    gettext.GNUTranslations with lazy lookups in a memory-mapped .mo file
+    """
+
+    def _parse(self, fp):
+        filename = getattr(fp, 'name', '')
+        self._filename = filename
+        self._cache = {}
+        self.plural = germanic                      # germanic plural by default
+        try:
+            buf = mmap.mmap(fp.fileno(), 0, access = mmap.ACCESS_READ)
+        except ValueError:                          # empty file
+            raise OSError(0, 'File is corrupt', filename)
+        if len(buf) < 28:
+            buf.close()
+            raise OSError(0, 'File is corrupt', filename)
+
+        magic = struct.unpack('<I', buf[:4])[0]
+        if magic == self.LE_MAGIC:
+            endian = '<'
+        elif magic == self.BE_MAGIC:
+            endian = '>'
+        else:
+            buf.close()
+            raise OSError(0, 'Bad magic number', filename)
+
+        version, count, masteridx, transidx, hashsize, hashidx = struct.unpack(endian + '6I', buf[4:28])
+        major_version, minor_version = self._get_versions(version)
+        if major_version not in self.VERSIONS:
+            buf.close()
+            raise OSError(0, 'Bad version number ' + str(major_version), filename)
+
+        self._map(buf, endian, count, masteridx, transidx, hashsize, hashidx)
+
+    def _map(self, buf, endian, count, masteridx, transidx, hashsize, hashidx):
+        """
+        set up the lookup tables of buf and parse the catalog description
+        """
+        self._buf = buf
+        self._count = count
+        self._masteridx = masteridx
+        self._transidx = transidx
+        self._hashsize = hashsize if hashsize > 2 else 0
+        self._hashidx = hashidx
+        self._pair = struct.Struct(endian + 'II')
+        self._word = struct.Struct(endian + 'I')
+
+        index = self._find(b'')
+        if index is not None:
+            self._parse_info(self._string(self._transidx, index))
+        self._encoding = self._charset or 'ascii'
+
+    def _parse_info(self, tmsg):
+        """
+        parse the catalog description (same as gettext.GNUTranslations)
+        """
+        lastk = None
+        for b_item in tmsg.split(b'\n'):
+            item = b_item.decode().strip()
+            if not item:
+                continue
+            if item.startswith('#-#-#-#-#') and item.endswith('#-#-#-#-#'):
+                continue
+            k = v = None
+            if ':' in item:
+                k, v = item.split(':', 1)
+                k = k.strip().lower()
+                v = v.strip()
+                self._info[k] = v
+                lastk = k
+            elif lastk:
+                self._info[lastk] += '\n' + item
+            if k == 'content-type':
+                self._charset = v.split('charset=')[1]
+            elif k == 'plural-forms':
+                v = v.split(';')
+                plural = v[1].split('plural=')[1]
+                self.plural = plural_function(plural)
+
+    def _string(self, table, index):
+        """
+        return the raw bytes of entry index of the original resp. translation table
+        """
+        length, offset = self._pair.unpack_from(self._buf, table + 8 * index)
+        end = offset + length
+        if end >= len(self._buf):
+            raise OSError(0, 'File is corrupt', self._filename)
+        return self._buf[offset:end]
+
+    def _key(self, index):
+        """
+        return the msgid of entry index (i.e. without plural msgid)
+        """
+        msg = self._string(self._masteridx, index)
+        nul = msg.find(b'\x00')
+        return msg if nul < 0 else msg[:nul]
+
+    def _find(self, key):
+        """
+        return the index of msgid key or None
+        """
+        if self._hashsize:
+            hashsize = self._hashsize
+            hval = hashpjw(key)
+            idx = hval % hashsize
+            incr = 1 + hval % (hashsize - 2)
+            while True:
+                nstr = self._word.unpack_from(self._buf, self._hashidx + 4 * idx)[0]
+                if nstr == 0:
+                    return None
+                if self._key(nstr - 1) == key:
+                    return nstr - 1
+                if idx >= hashsize - incr:
+                    idx -= hashsize - incr
+                else:
+                    idx += incr
+
+        lo, hi = 0, self._count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            msg = self._key(mid)
+            if msg < key:
+                lo = mid + 1
+            elif msg > key:
+                hi = mid
+            else:
+                return mid
+        return None
+
+    def _lookup(self, message, form):
+        """
+        return the decoded translation of message resp. of its plural form or None
+        """
+        cache_key = message if form is None else (message, form)
+        tmsg = self._cache.get(cache_key)
+        if tmsg is not None:
+            return tmsg
+
+        tmsg = None
+        try:
+            index = self._find(message.encode(self._encoding))
+        except UnicodeEncodeError:
+            index = None
+        if index is not None:
+            translated = self._string(self._transidx, index)
+            if b'\x00' in self._string(self._masteridx, index):
+                translated = translated.split(b'\x00')
+                if form is None:
+                    form = self.plural(1)
+                translated = translated[form] if form < len(translated) else None
+            elif form is not None:
+                translated = None
+            if translated is not None:
+                tmsg = self._cache[cache_key] = translated.decode(self._encoding)
+        return tmsg
+
+    def gettext(self, message):
+        tmsg = self._lookup(message, None)
+        if tmsg is not None:
+            return tmsg
+        if self._fallback:
+            return self._fallback.gettext(message)
+        return message
+
+    def ngettext(self, msgid1, msgid2, n):
+        tmsg = self._lookup(msgid1, self.plural(n))
+        if tmsg is not None:
+            return tmsg
+        if self._fallback:
+            return self._fallback.ngettext(msgid1, msgid2, n)
+        return msgid1 if n == 1 else msgid2
+
+    def pgettext(self, context, message):
+        tmsg = self._lookup(self.CONTEXT % (context, message), None)
+        if tmsg is not None:
+            return tmsg
+        if self._fallback:
+            return self._fallback.pgettext(context, message)
+        return message
+
+    def npgettext(self, context, msgid1, msgid2, n):
+        tmsg = self._lookup(self.CONTEXT % (context, msgid1), self.plural(n))
+        if tmsg is not None:
+            return tmsg
+        if self._fallback:
+            return self._fallback.npgettext(context, msgid1, msgid2, n)
+        return msgid1 if n == 1 else msgid2
+
+    def items(self):
+        """
+        return all entries as (key, translation) pairs in the form of gettext.GNUTranslations
+        (key is the msgid resp. (msgid, index of plural form)), decoded on each call
+        """
+        encoding = self._encoding
+        for index in range(self._count):
+            msg = self._string(self._masteridx, index)
+            tmsg = self._string(self._transidx, index)
+            if b'\x00' in msg:
+                msgid = msg.split(b'\x00', 1)[0].decode(encoding)
+                for form, translated in enumerate(tmsg.split(b'\x00')):
+                    yield (msgid, form), translated.decode(encoding)
+            else:
+                yield msg.decode(encoding), tmsg.decode(encoding)
+
+    def __len__(self):
+        return self._count
+
+    def close(self):
+        """
+        release the mapping, the catalog must not be used afterwards
+        """
+        self._cache.clear()
+        self._buf.close()
@@ -0,0 +1,159 @@
+# coding:utf-8
+"""
+Compiled formatters for translated format strings.
+
+The usual pattern
+::
+
+    _("... to '{}'").format(language)
+
+looks up the message in the catalog and parses the translated format string
+on every call. Instead, format_message() compiles each translated format string
+once per catalog (i.e. per language) and msgid into a function, keeps it in a
+cache and formats by calling it:
+::
+
+    from msgformat import format_message
+
+    print(format_message("... to '{}'", language))
+
+A format string is compiled into the concatenation of its literal parts and
+its formatted fields. Format strings using attribute or index access in field
+names (e.g. '{0.name}', '{0[1]}') or nested fields in the format spec are not
+compiled, they are formatted by str.format.
+
+"""
+import threading
+import weakref
+from string import Formatter
+import translations
+
+_CONVERSIONS = {'r': 'repr', 's': 'str', 'a': 'ascii'}
+
+
+def compile_template(template):
+    """
+    return a function formatting template like template.format
+    """
+    namespace = {}
+    pieces = []
+    auto = manual = False
+    index = 0
+    try:
+        parsed = list(Formatter().parse(template))
+    except ValueError:
+        return template.format                      # raises the error of str.format on call
+    for literal, field_name, format_spec, conversion in parsed:
+        if literal:
+            name = '_l{}'.format(len(namespace))
+            namespace[name] = literal
+            pieces.append(name)
+        if field_name is None:
+            continue
+        if '{' in format_spec:
+            return template.format
+        if field_name == '':
+            auto = True
+            expr = 'args[{}]'.format(index)
+            index += 1
+        elif field_name.isdigit():
+            manual = True
+            expr = 'args[{}]'.format(int(field_name))
+        elif field_name.isidentifier():
+            expr = 'kwargs[{!r}]'.format(field_name)
+        else:
+            return template.format
+        if conversion:
+            if conversion not in _CONVERSIONS:
+                return template.format
+            expr = '{}({})'.format(_CONVERSIONS[conversion], expr)
+        name = '_s{}'.format(len(namespace))
+        namespace[name] = format_spec
+        pieces.append('format({}, {})'.format(expr, name))
+    if auto and manual:
+        return template.format
+
+    source = 'def _format(*args, **kwargs):\n    return {}\n'.format(' + '.join(pieces) or "''")
+    exec(source, namespace)
+    return namespace['_format']
+
+
+class CatalogDict(dict):
+    """
+    dict id(catalog) -> value, the entry of a catalog is dropped together with the catalog
+
+    unlike weakref.WeakKeyDictionary, a lookup (d[id(lang)]) allocates no weak reference
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._refs = {}
+        self._lock = threading.Lock()
+
+    def add(self, lang, value):
+        """
+        return the value of catalog lang, set to value if lang has none
+        """
+        key = id(lang)
+        with self._lock:
+            if key in self:
+                return self[key]
+            refs = self._refs
+
+            def remove(ref, key = key, values = self):  # called before the id can be reused
+                values.pop(key, None)
+                refs.pop(key, None)
+            refs[key] = weakref.ref(lang, remove)
+            self[key] = value
+        return value
+
+    def clear(self):
+        with self._lock:
+            super().clear()
+            self._refs.clear()
+
+
+class MessageFormatterCache:
+    """
+    Compiled formatters per catalog and msgid
+
+    the formatters of a catalog are dropped together with the catalog
+    """
+
+    def __init__(self):
+        self._formatters = CatalogDict()
+
+    def get(self, lang, msgid):
+        """
+        return the compiled formatter of the translation of msgid by catalog lang
+        """
+        try:
+            return self._formatters[id(lang)][msgid]
+        except KeyError:
+            pass
+        wrap_formatter = getattr(lang, 'wrap_formatter', None)
+        if wrap_formatter is None:
+            formatter = compile_template(lang.gettext(msgid))
+        else:                                       # e.g. instrumentation.InstrumentedTranslations
+            formatter = wrap_formatter(msgid, compile_template)
+        self._formatters.add(lang, {})[msgid] = formatter
+        return formatter
+
+    def clear(self):
+        self._formatters.clear()
+
+
+formatters = MessageFormatterCache()
+_formatters = formatters._formatters
+
+
+def format_message(msgid, *args, **kwargs):
+    """
+    translate msgid by the translation of the current context and format it with args/kwargs
+    """
+    lang = translations.get_translation()
+    try:
+        formatter = _formatters[id(lang)][msgid]                # the hit without a method call
+    except KeyError:
+        formatter = formatters.get(lang, msgid)
+    return formatter(*args, **kwargs)
@@ -0,0 +1,216 @@
+# coding:utf-8
+"""
+Integer ids of msgids for hot call sites.
+
+_() resp. format_message() look up the (often long) msgid in a dict per call.
+This module assigns each msgid of a message template (.pot, as extracted by
+pygettext) resp. of .po files a stable integer id and generates a constants
+module:
+::
+
+    python msgindex.py messages.pot app_msgids.py
+
+    # app_msgids.py (generated)
+    MSGIDS = (
+        'create templates files',
+        "This is a test message. Translated from default language 'en' to '{}'",
+        )
+    MSG_CREATE_TEMPLATES_FILES = 0
+    MSG_THIS_IS_A_TEST_MESSAGE_TRANSLATED_FROM_DEFAULT = 1
+
+A msgid keeps its id when the module is generated again (new msgids are
+appended, removed msgids keep their slot), so ids may be stored elsewhere.
+
+MessageIndex translates by id: per catalog it builds the list of the
+translations once, so a lookup is an index into that list:
+::
+
+    import app_msgids
+    from msgindex import MessageIndex
+
+    messages = MessageIndex(app_msgids.MSGIDS)
+    print(messages.format(app_msgids.MSG_THIS_IS_A_TEST_MESSAGE_TRANSLATED_FROM_DEFAULT, 'de'))
+
+A call of messages.gettext() resp. messages.format() still resolves the catalog
+of the current context. Hot call sites (e.g. loops) bind the table of the
+catalog once and index it directly, which is the fastest lookup:
+::
+
+    table = messages.table(translations.get_translation())
+    for ...:
+        print(table[app_msgids.MSG_CREATE_TEMPLATES_FILES])
+
+The plain string API remains: passing a msgid (str) instead of an id
+translates it by translations.gettext().
+Only simple msgids (without context and plural) get an id.
+
+"""
+import argparse
+import ast
+import keyword
+import os
+import re
+import sys
+import translations
+from msgformat import CatalogDict, compile_template
+from pocompiler import read_po
+
+PREFIX = 'MSG_'
+WORDS_MAX = 8
+HEADER = '# coding:utf-8\n# generated by msgindex.py - do not edit, ids are stable across runs\n'
+
+
+def extract_msgids(filenames):
+    """
+    return the simple msgids of the .pot/.po files in order of first occurrence
+    """
+    msgids = []
+    seen = set()
+    for filename in filenames:
+        entries = read_po(filename)
+        charset = 'utf-8'
+        for entry in entries:
+            if entry.is_header():
+                match = re.search(rb'charset=([\w-]+)', entry.get_value())
+                if match and match.group(1).upper() != b'CHARSET':
+                    charset = match.group(1).decode('ascii')
+                continue
+            if entry.obsolete or entry.msgctxt is not None or entry.msgid_plural is not None:
+                continue
+            msgid = entry.msgid.decode(charset)
+            if msgid not in seen:
+                seen.add(msgid)
+                msgids.append(msgid)
+    return msgids
+
+
+def read_msgids(module_filename):
+    """
+    return MSGIDS of a generated module ([] if it does not exist)
+    """
+    try:
+        with open(module_filename, encoding = 'utf-8') as fp:
+            tree = ast.parse(fp.read(), module_filename)
+    except FileNotFoundError:
+        return []
+    for node in tree.body:
+        if isinstance(node, ast.Assign) and [target.id for target in node.targets if isinstance(target, ast.Name)] == ['MSGIDS']:
+            return list(ast.literal_eval(node.value))
+    return []
+
+
+def constant_name(msgid, names):
+    """
+    return a new name of the constant of msgid (unique within names)
+    """
+    words = re.findall(r'[A-Za-z0-9]+', msgid)[:WORDS_MAX]
+    name = PREFIX + '_'.join(words).upper() if words else PREFIX + 'EMPTY'
+    unique = name
+    number = 2
+    while unique in names or keyword.iskeyword(unique):
+        unique = '{}_{}'.format(name, number)
+        number += 1
+    return unique
+
+
+def generate(msgids, previous = ()):
+    """
+    return the source of the constants module of msgids, keeping the ids of previous
+    """
+    all_msgids = list(previous)
+    known = set(all_msgids)
+    all_msgids.extend(msgid for msgid in msgids if msgid not in known)
+
+    lines = [HEADER, 'MSGIDS = (\n']
+    lines.extend('    {!r},\n'.format(msgid) for msgid in all_msgids)
+    lines.append('    )\n\n')
+    names = set()
+    for index, msgid in enumerate(all_msgids):
+        name = constant_name(msgid, names)
+        names.add(name)
+        lines.append('{} = {}\n'.format(name, index))
+    return ''.join(lines)
+
+
+def compile_index(filenames, module_filename):
+    """
+    generate the constants module module_filename of the msgids of the .pot/.po files
+
+    returns the number of msgids
+    """
+    previous = read_msgids(module_filename)
+    source = generate(extract_msgids(filenames), previous)
+    tmp_filename = module_filename + '.tmp'
+    with open(tmp_filename, 'w', encoding = 'utf-8') as fp:
+        fp.write(source)
+    os.replace(tmp_filename, module_filename)
+    return len(read_msgids(module_filename))
+
+
+class MessageIndex:
+    """
+    Translations by msgid id, one list of translations per catalog
+    """
+
+    def __init__(self, msgids):
+        self._msgids = tuple(msgids)
+        self._tables = CatalogDict()
+        self._formatters = CatalogDict()
+
+    def table(self, lang):
+        """
+        return the translations of all msgids by catalog lang (list indexed by id)
+        """
+        try:
+            return self._tables[id(lang)]
+        except KeyError:
+            pass
+        return self._tables.add(lang, [lang.gettext(msgid) for msgid in self._msgids])
+
+    def gettext(self, message, lang = None):
+        """
+        translate the msgid of id message (resp. msgid message) by lang (default: translation of the current context)
+        """
+        if lang is None:
+            lang = translations.get_translation()
+        if isinstance(message, int):
+            try:
+                return self._tables[id(lang)][message]
+            except KeyError:
+                return self.table(lang)[message]
+        return lang.gettext(message)
+
+    def format(self, message, *args, **kwargs):
+        """
+        translate the msgid of id message by the translation of the current context and format it
+        """
+        lang = translations.get_translation()
+        if not isinstance(message, int):
+            return self.gettext(message, lang).format(*args, **kwargs)
+        try:
+            formatter = self._formatters[id(lang)][message]
+        except KeyError:
+            formatter = self._formatters.add(lang, [None] * len(self._msgids))[message]
+        if formatter is None:
+            formatter = self._formatters[id(lang)][message] = compile_template(self.table(lang)[message])
+        return formatter(*args, **kwargs)
+
+    def get_msgid(self, index):
+        return self._msgids[index]
+
+    def __len__(self):
+        return len(self._msgids)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description = 'generate the constants module of the msgids of .pot/.po files')
+    parser.add_argument('sources', nargs = '+', help = '.pot resp. .po files')
+    parser.add_argument('module', help = 'constants module to generate (.py)')
+    args = parser.parse_args()
+
+    try:
+        count = compile_index(args.sources, args.module)
+    except (OSError, ValueError) as e:
+        sys.stderr.write(str(e) + '\n')
+        sys.exit(1)
+    print('{}: {} msgids'.format(args.module, count))
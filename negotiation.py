@@ -0,0 +1,219 @@
+# coding:utf-8
+"""
+Negotiation of the language of a request.
+
+Requested languages come as Accept-Language headers resp. locale strings,
+e.g.
+::
+
+    de-AT,de;q=0.9,en;q=0.5
+    pt-BR;q=0.8
+    fr_CA.UTF-8
+
+LanguageNegotiator resolves such a value to one of the supported languages
+(e.g. Config.LANGUAGES) whose catalog actually exists (in the locale tree
+resp. in the bundle, as found by the translation registry). The default
+language needs no catalog.
+
+The requested languages are tried in order of their quality (q), each by its
+fallback chain from the most specific to the base language
+(e.g. de_AT -> de, zh_Hant_TW -> zh_Hant -> zh). If none of them is
+supported, the default language is returned.
+
+The supported languages with catalog are determined on first use and again
+after the registry reloaded catalogs resp. found new ones (see
+TranslationRegistry.add_listener).
+
+As the number of distinct values is limited (in practice some ten thousands a
+day), the result is cached per value in a bounded LRU, so a repeated value
+costs a dictionary lookup.
+
+Usage:
+::
+
+    from negotiation import negotiator
+    from translations import registry
+
+    languages = negotiator(['en', 'de', 'fr'], 'app', localedir, default = 'en')
+    language = languages.resolve('de-AT,de;q=0.9,en;q=0.5')     # 'de'
+    lang = registry.translation('app', localedir = localedir, language = language)
+
+"""
+import threading
+from collections import OrderedDict
+import translations
+
+WILDCARD = '*'
+
+
+def normalize(tag):
+    """
+    return the language tag resp. locale string in gettext form (e.g. 'pt-br' -> 'pt_BR'),
+    '' if it is empty
+
+    encoding and modifier of locale strings ('fr_CA.UTF-8', 'de_DE@euro') are dropped
+    """
+    tag = tag.strip().split('.', 1)[0].split('@', 1)[0]
+    parts = [part for part in tag.replace('-', '_').split('_') if part]
+    if not parts:
+        return ''
+    result = [parts[0].lower()]
+    for part in parts[1:]:
+        if len(part) == 4 and part.isalpha():     # script, e.g. Hant
+            result.append(part.title())
+        elif len(part) == 2 or part.isdigit():    # region, e.g. BR or 419
+            result.append(part.upper())
+        else:
+            result.append(part)
+    return '_'.join(result)
+
+
+def fallback_chain(tag):
+    """
+    return the tags from tag to its base language, e.g. 'zh_Hant_TW' -> ['zh_Hant_TW', 'zh_Hant', 'zh']
+    """
+    parts = tag.split('_')
+    return ['_'.join(parts[:index]) for index in range(len(parts), 0, -1)]
+
+
+def parse_accept_language(value):
+    """
+    return the normalized language tags of an Accept-Language header
+    (resp. a locale string) ordered by descending quality
+
+    tags of quality 0 and malformed entries (e.g. q outside 0..1, inf, nan) are dropped
+    """
+    entries = []
+    for position, item in enumerate(value.split(',')):
+        tag, *params = item.split(';')
+        quality = 1.0
+        for param in params:
+            key, _, number = param.partition('=')
+            if key.strip().lower() == 'q':
+                try:
+                    quality = float(number)
+                except ValueError:
+                    quality = 0.0
+                if not 0 <= quality <= 1:           # also nan
+                    quality = 0.0
+        tag = tag.strip()
+        if tag != WILDCARD:
+            tag = normalize(tag)
+        if tag and quality > 0:
+            entries.append((-quality, position, tag))
+    return [tag for _, _, tag in sorted(entries)]
+
+
+class LanguageNegotiator:
+    """
+    Resolves requested languages to the supported languages with catalog, caches the results
+    """
+
+    MAXSIZE_DEFAULT = 16384
+
+    def __init__(self, languages, domain, localedir = None, default = None,
+                 registry = translations.registry, maxsize = MAXSIZE_DEFAULT):
+        self._languages = list(languages)
+        self._domain = domain
+        self._localedir = localedir
+        self._default = self._languages[0] if default is None else default
+        self._registry = registry
+        self._maxsize = maxsize
+        self._available = None
+        self._resolved = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    def _get_available(self):
+        """
+        return {lower case tag: language} of the default language and the supported languages with catalog
+        """
+        available = self._available
+        if available is None:
+            available = {self._default.lower(): self._default}
+            for language in self._languages:
+                if language.lower() in available:
+                    continue
+                try:
+                    self._registry.translation(self._domain, localedir = self._localedir, language = language)
+                except FileNotFoundError:
+                    continue
+                available[language.lower()] = language
+            self._available = available
+        return available
+
+    def _negotiate(self, value):
+        available = self._get_available()
+        for tag in parse_accept_language(value):
+            if tag == WILDCARD:
+                return self._default
+            for candidate in fallback_chain(tag):
+                language = available.get(candidate.lower())
+                if language is not None:
+                    return language
+            # a base language requested, a regional variant supported (e.g. pt -> pt_BR)
+            base = tag.split('_', 1)[0].lower()
+            for key, language in available.items():
+                if key.split('_', 1)[0] == base:
+                    return language
+        return self._default
+
+    def resolve(self, value):
+        """
+        return the supported language for value (Accept-Language header resp. locale string),
+        the default language if no requested language is supported
+        """
+        with self._lock:
+            language = self._resolved.get(value)
+            if language is not None:
+                self._resolved.move_to_end(value)
+                self._hits += 1
+                return language
+            self._misses += 1
+        language = self._negotiate(value or '')
+        with self._lock:
+            self._resolved[value] = language
+            while len(self._resolved) > self._maxsize:
+                self._resolved.popitem(last = False)
+        return language
+
+    def clear(self):
+        """
+        forget the resolved values and the available catalogs (e.g. after adding a catalog)
+        """
+        with self._lock:
+            self._resolved.clear()
+            self._available = None
+
+    def get_available(self):
+        return sorted(self._get_available().values())
+
+    def get_default(self):
+        return self._default
+
+    def get_stats(self):
+        with self._lock:
+            return {
+                'size': len(self._resolved),
+                'maxsize': self._maxsize,
+                'hits': self._hits,
+                'misses': self._misses,
+                }
+
+
+_negotiators = {}
+_negotiators_lock = threading.Lock()
+
+
+def negotiator(languages, domain, localedir = None, default = None):
+    """
+    return the process-wide negotiator of languages/domain/localedir/default
+    """
+    key = (tuple(languages), domain, localedir, default)
+    with _negotiators_lock:
+        result = _negotiators.get(key)
+        if result is None:
+            result = _negotiators[key] = LanguageNegotiator(languages, domain, localedir, default)
+            translations.registry.add_listener(result.clear)
+    return result
@@ -0,0 +1,235 @@
+# coding:utf-8
+"""
+Streaming translation of bulk exports (CSV, JSON lines).
+
+Each row of the input contains a msgid (column resp. key 'msgid' by default).
+The rows are read one by one, translated in chunks into each language
+(e.g. Config.LANGUAGES) by the catalogs of the translation registry and
+written with the translations added as columns resp. keys <field>_<language>:
+::
+
+    msgid,msgid_en,msgid_de,msgid_fr
+    create templates files,create templates files,Erzeuge Vorlagen-Dateien,...
+
+Only a bounded number of chunks is held in memory, so files of millions of
+rows are translated in constant memory.
+
+A row which is not an object (JSON lines), has more values than columns (CSV)
+or whose msgid is not a string raises ValueError with its line number. The
+columns of a CSV output are those of the first row; a later row with other
+keys raises ValueError instead of losing them.
+
+Optionally the chunks are translated in a process pool (each process loads
+the catalogs once); the output keeps the order of the input.
+
+Usage:
+::
+
+    python pipeline.py input.csv output.csv [--field msgid] [-j workers] [--chunksize 1000]
+    python pipeline.py input.jsonl output.jsonl
+
+Domain, locale directory and languages are taken from Config ('app').
+
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from translations import registry
+
+FIELD_DEFAULT = 'msgid'
+CHUNKSIZE_DEFAULT = 1000
+FORMAT_CSV = 'csv'
+FORMAT_JSONL = 'jsonl'
+FORMATS = {
+    '.csv': FORMAT_CSV,
+    '.jsonl': FORMAT_JSONL,
+    '.json': FORMAT_JSONL,
+    }
+
+
+def get_format(filename):
+    """
+    return the format of filename by its extension
+    """
+    extension = os.path.splitext(filename)[1].lower()
+    try:
+        return FORMATS[extension]
+    except KeyError:
+        raise ValueError('unknown format of {!r} (expected {})'.format(filename, ', '.join(sorted(FORMATS))))
+
+
+def read_rows(fp, format, field = FIELD_DEFAULT):
+    """
+    return a generator of the rows (dicts) of the open text file fp
+
+    raises ValueError (with the line number) for invalid rows resp. if field is not a string
+    """
+    if format == FORMAT_CSV:
+        reader = csv.DictReader(fp)
+        for row in reader:
+            if None in row:
+                raise ValueError('line {}: more values than columns'.format(reader.line_num))
+            yield row
+        return
+    for number, line in enumerate(fp, 1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as e:
+            raise ValueError('line {}: {}'.format(number, e))
+        if not isinstance(row, dict):
+            raise ValueError('line {}: row is not an object'.format(number))
+        message = row.get(field)
+        if message is not None and not isinstance(message, str):
+            raise ValueError('line {}: {!r} is not a string'.format(number, field))
+        yield row
+
+
+def write_rows(rows, fp, format, fieldnames = None):
+    """
+    write the rows to the open text file fp, returns the number of rows
+
+    fieldnames: the columns of a CSV file
+    """
+    count = 0
+    if format == FORMAT_CSV:
+        writer = csv.DictWriter(fp, fieldnames)
+        writer.writeheader()
+        columns = set(fieldnames)
+        for row in rows:
+            count += 1
+            extra = row.keys() - columns
+            if extra:
+                raise ValueError('row {}: {} not in the columns of the first row'.format(count, ', '.join(sorted(map(str, extra)))))
+            writer.writerow(row)
+    else:
+        for row in rows:
+            fp.write(json.dumps(row, ensure_ascii = False))
+            fp.write('\n')
+            count += 1
+    return count
+
+
+def get_fieldnames(fieldnames, field, languages):
+    """
+    return the columns of the output, i.e. fieldnames and the translation columns
+    """
+    return list(fieldnames) + ['{}_{}'.format(field, language) for language in languages]
+
+
+def chunks(rows, size):
+    """
+    return a generator of lists of (up to) size rows
+    """
+    rows = iter(rows)
+    while True:
+        chunk = list(islice(rows, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def translate_chunk(job):
+    """
+    translate the rows of job = (domain, localedir, languages, field, rows)
+
+    returns the rows with the translations added
+    """
+    domain, localedir, languages, field, rows = job
+    columns = [('{}_{}'.format(field, language), registry.translation(domain, localedir, language, fallback = True).gettext)
+               for language in languages]
+    for row in rows:
+        message = row.get(field) or ''
+        for column, gettext in columns:
+            row[column] = gettext(message) if message else message      # gettext('') is the catalog header
+    return rows
+
+
+def _ordered(executor, jobs, window):
+    """
+    map translate_chunk over jobs in executor with at most window chunks in flight, in order of jobs
+    """
+    pending = deque()
+    for job in jobs:
+        pending.append(executor.submit(translate_chunk, job))
+        if len(pending) >= window:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+def translate_rows(rows, domain, localedir, languages, field = FIELD_DEFAULT,
+                   chunksize = CHUNKSIZE_DEFAULT, workers = 0):
+    """
+    return a generator of the rows with the translations of field into languages added
+
+    workers: size of the process pool (None: number of CPUs, 0: no pool)
+    """
+    languages = list(languages)
+    jobs = ((domain, localedir, languages, field, chunk) for chunk in chunks(rows, chunksize))
+    if workers == 0:
+        for job in jobs:
+            yield from translate_chunk(job)
+        return
+    with ProcessPoolExecutor(max_workers = workers) as executor:
+        window = 2 * (workers or os.cpu_count() or 1)
+        for chunk in _ordered(executor, jobs, window):
+            yield from chunk
+
+
+def _prepend(first, rows):
+    yield first
+    yield from rows
+
+
+def translate_file(input_filename, output_filename, domain, localedir, languages, field = FIELD_DEFAULT,
+                   chunksize = CHUNKSIZE_DEFAULT, workers = 0):
+    """
+    translate the CSV resp. JSON lines file input_filename into output_filename (format by extension)
+
+    returns the number of rows
+    """
+    input_format = get_format(input_filename)
+    output_format = get_format(output_filename)
+    with open(input_filename, newline = '', encoding = 'utf-8') as input_fp, \
+         open(output_filename, 'w', newline = '', encoding = 'utf-8') as output_fp:
+        rows = read_rows(input_fp, input_format, field)
+        fieldnames = None
+        if output_format == FORMAT_CSV:
+            first = next(rows, None)
+            if first is None:
+                rows = iter(())
+                fieldnames = get_fieldnames([field], field, languages)
+            else:
+                rows = _prepend(first, rows)
+                fieldnames = get_fieldnames(first.keys(), field, languages)
+        translated = translate_rows(rows, domain, localedir, languages, field, chunksize, workers)
+        return write_rows(translated, output_fp, output_format, fieldnames)
+
+
+if __name__ == '__main__':
+    from config import Config
+
+    parser = argparse.ArgumentParser(description = 'translate the msgids of a CSV resp. JSON lines file into all languages')
+    parser.add_argument('input', help = 'input file (.csv, .jsonl)')
+    parser.add_argument('output', help = 'output file (.csv, .jsonl)')
+    parser.add_argument('--field', default = FIELD_DEFAULT, help = 'column resp. key of the msgid')
+    parser.add_argument('-j', '--workers', type = int, default = 0, help = 'size of the process pool (0: no pool)')
+    parser.add_argument('--chunksize', type = int, default = CHUNKSIZE_DEFAULT, help = 'rows per chunk')
+    args = parser.parse_args()
+
+    config = Config.instance('app')
+    localedir = config.get_config_parser()[Config.PATHS][Config.DIR_LOCALE]
+    try:
+        count = translate_file(args.input, args.output, config.get_app(), localedir, Config.LANGUAGES,
+                               args.field, args.chunksize, args.workers)
+    except (OSError, ValueError) as e:
+        sys.stderr.write(str(e) + '\n')
+        sys.exit(1)
+    print('{} rows translated into {}'.format(count, ', '.join(Config.LANGUAGES)))
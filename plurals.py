@@ -0,0 +1,203 @@
+# coding:utf-8
+"""
+Shared, precompiled evaluation of Plural-Forms expressions.
+
+The .po headers declare the plural rule of the language, e.g.
+::
+
+    Plural-Forms: nplurals=2; plural=(n != 1);
+
+gettext compiles this C expression for every catalog by gettext.c2py.
+plural_function() compiles each distinct expression only once and returns
+plain Python functions for the common families of expressions:
+
+:germanic: n != 1 (e.g. en, de)
+:romance: n > 1 (e.g. fr, pt_BR)
+:slavic: n%10==1 && n%100!=11 ? 0 : n%10>=2 && n%10<=4 && (n%100<10 || n%100>=20) ? 1 : 2 (e.g. ru, uk)
+:polish: n==1 ? 0 : n%10>=2 && n%10<=4 && (n%100<10 || n%100>=20) ? 1 : 2
+:single: 0 (e.g. ja, zh)
+
+Other expressions are compiled by gettext.c2py. Like the functions of
+gettext.c2py, the functions raise TypeError if n is not a number and warn
+(DeprecationWarning) if n is not an integer.
+
+PluralTranslations parses .mo files like gettext.GNUTranslations, but
+takes the plural function from plural_function(), i.e. a catalog load
+compiles no expression.
+
+"""
+import functools
+import gettext
+from struct import unpack
+
+_as_int = gettext._as_int                           # same check of n as the functions of gettext.c2py
+
+
+def germanic(n):
+    if not isinstance(n, int):
+        n = _as_int(n)
+    return int(n != 1)
+
+
+def romance(n):
+    if not isinstance(n, int):
+        n = _as_int(n)
+    return int(n > 1)
+
+
+def slavic(n):
+    if not isinstance(n, int):
+        n = _as_int(n)
+    if n % 10 == 1 and n % 100 != 11:
+        return 0
+    if 2 <= n % 10 <= 4 and (n % 100 < 10 or n % 100 >= 20):
+        return 1
+    return 2
+
+
+def polish(n):
+    if not isinstance(n, int):
+        n = _as_int(n)
+    if n == 1:
+        return 0
+    if 2 <= n % 10 <= 4 and (n % 100 < 10 or n % 100 >= 20):
+        return 1
+    return 2
+
+
+def single(n):
+    if not isinstance(n, int):
+        n = _as_int(n)
+    return 0
+
+
+FAMILIES = {
+    'n!=1': germanic,
+    'n>1': romance,
+    'n%10==1&&n%100!=11?0:n%10>=2&&n%10<=4&&(n%100<10||n%100>=20)?1:2': slavic,
+    'n==1?0:n%10>=2&&n%10<=4&&(n%100<10||n%100>=20)?1:2': polish,
+    '0': single,
+    }
+
+
+def normalize(expression):
+    """
+    return expression without blanks and enclosing parentheses
+    """
+    expression = ''.join(expression.split()).rstrip(';')
+    while expression.startswith('(') and expression.endswith(')') and _balanced(expression[1:-1]):
+        expression = expression[1:-1]
+    return expression
+
+
+def _balanced(expression):
+    depth = 0
+    for c in expression:
+        if c == '(':
+            depth += 1
+        elif c == ')':
+            depth -= 1
+            if depth < 0:
+                return False
+    return depth == 0
+
+
+@functools.lru_cache(maxsize = None)
+def _compile(expression):
+    function = FAMILIES.get(expression)
+    if function is None:
+        function = gettext.c2py(expression)
+    return function
+
+
+def plural_function(expression):
+    """
+    return the (shared) function n -> index of plural form of the C expression
+
+    raises ValueError for invalid expressions (like gettext.c2py)
+    """
+    return _compile(normalize(expression))
+
+
+def from_plural_forms(plural_forms):
+    """
+    return the function of a Plural-Forms header value ('nplurals=2; plural=(n != 1);')
+    """
+    for part in plural_forms.split(';'):
+        key, _, value = part.partition('=')
+        if key.strip() == 'plural':
+            return plural_function(value)
+    raise ValueError('plural expression missing: {!r}'.format(plural_forms))
+
+
+class PluralTranslations(gettext.GNUTranslations):
+    """
+    gettext.GNUTranslations sharing the plural function (see plural_function)
+    """
+
+    def _parse(self, fp):
+        """
+        same as gettext.GNUTranslations._parse, but without compiling Plural-Forms per catalog
+        """
+        filename = getattr(fp, 'name', '')
+        self._catalog = catalog = {}
+        self.plural = germanic                      # germanic plural by default
+        buf = fp.read()
+        buflen = len(buf)
+        magic = unpack('<I', buf[:4])[0]
+        if magic == self.LE_MAGIC:
+            version, msgcount, masteridx, transidx = unpack('<4I', buf[4:20])
+            ii = '<II'
+        elif magic == self.BE_MAGIC:
+            version, msgcount, masteridx, transidx = unpack('>4I', buf[4:20])
+            ii = '>II'
+        else:
+            raise OSError(0, 'Bad magic number', filename)
+        major_version, minor_version = self._get_versions(version)
+        if major_version not in self.VERSIONS:
+            raise OSError(0, 'Bad version number ' + str(major_version), filename)
+
+        for i in range(0, msgcount):
+            mlen, moff = unpack(ii, buf[masteridx:masteridx + 8])
+            mend = moff + mlen
+            tlen, toff = unpack(ii, buf[transidx:transidx + 8])
+            tend = toff + tlen
+            if mend < buflen and tend < buflen:
+                msg = buf[moff:mend]
+                tmsg = buf[toff:tend]
+            else:
+                raise OSError(0, 'File is corrupt', filename)
+            if mlen == 0:                           # catalog description
+                self._parse_info(tmsg)
+            charset = self._charset or 'ascii'
+            if b'\x00' in msg:                      # plural forms
+                msgid1, msgid2 = msg.split(b'\x00')
+                msgid1 = str(msgid1, charset)
+                for i, x in enumerate(tmsg.split(b'\x00')):
+                    catalog[(msgid1, i)] = str(x, charset)
+            else:
+                catalog[str(msg, charset)] = str(tmsg, charset)
+            masteridx += 8
+            transidx += 8
+
+    def _parse_info(self, tmsg):
+        lastk = None
+        for b_item in tmsg.split(b'\n'):
+            item = b_item.decode().strip()
+            if not item:
+                continue
+            if item.startswith('#-#-#-#-#') and item.endswith('#-#-#-#-#'):
+                continue
+            k = v = None
+            if ':' in item:
+                k, v = item.split(':', 1)
+                k = k.strip().lower()
+                v = v.strip()
+                self._info[k] = v
+                lastk = k
+            elif lastk:
+                self._info[lastk] += '\n' + item
+            if k == 'content-type':
+                self._charset = v.split('charset=')[1]
+            elif k == 'plural-forms':
+                self.plural = from_plural_forms(v)
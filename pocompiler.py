@@ -0,0 +1,395 @@
+# coding:utf-8
+"""
+Compiler of translations in plain text (.po) into compiled translation files (.mo).
+
+Replaces the build of the .mo files by poedit/msgfmt:
+
+- parse_po() parses a .po file as a stream of entries
+  (header, msgctxt, plural forms, multiline strings, flags, obsolete entries)
+- compile_po() writes the .mo file including the hash table
+- compile_tree() compiles all .po files of a locale tree in a process pool,
+  only those which changed since the last build (by modification time or content hash)
+
+Fuzzy and untranslated entries are not compiled (like msgfmt), unless use_fuzzy is set.
+
+Usage:
+::
+
+    python pocompiler.py [localedir] [-j workers] [--mode mtime|hash] [--force] [--use-fuzzy]
+    python pocompiler.py locale/de/LC_MESSAGES/app.po
+
+"""
+import argparse
+import hashlib
+import json
+import os
+import re
+import struct
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from motranslations import hashpjw
+
+MANIFEST = '.pocompiler.json'
+MODE_MTIME = 'mtime'
+MODE_HASH = 'hash'
+
+_ESCAPES = {
+    b'n': b'\n', b't': b'\t', b'r': b'\r', b'a': b'\a', b'b': b'\b', b'f': b'\f', b'v': b'\v',
+    b'\\': b'\\', b'"': b'"', b"'": b"'", b'?': b'?',
+    }
+_ESCAPE_RE = re.compile(rb'\\(x[0-9a-fA-F]{1,2}|[0-7]{1,3}|.)', re.S)
+_KEYWORD_RE = re.compile(rb'^(msgctxt|msgid_plural|msgid|msgstr(?:\[(\d+)\])?)\s+(".*)$')
+
+
+class PoSyntaxError(ValueError):
+    """
+    syntax error in a .po file
+    """
+
+    def __init__(self, filename, lineno, message):
+        super().__init__('{}:{}: {}'.format(filename, lineno, message))
+        self.filename = filename
+        self.lineno = lineno
+
+
+class PoEntry:
+    """
+    entry of a .po file, all strings are bytes in the charset of the file
+    """
+
+    __slots__ = ('msgctxt', 'msgid', 'msgid_plural', 'msgstr', 'flags', 'obsolete', 'lineno')
+
+    def __init__(self, lineno = 0):
+        self.msgctxt = None
+        self.msgid = None
+        self.msgid_plural = None
+        self.msgstr = {}                            # plural index -> msgstr (index 0 without plural)
+        self.flags = set()
+        self.obsolete = False
+        self.lineno = lineno
+
+    def is_header(self):
+        return self.msgid == b'' and self.msgctxt is None
+
+    def is_fuzzy(self):
+        return 'fuzzy' in self.flags
+
+    def is_translated(self):
+        return bool(self.msgstr) and all(self.msgstr.values())
+
+    def get_msgstrs(self):
+        """
+        return the msgstr resp. the plural msgstrs in order of the plural index
+        """
+        return [self.msgstr.get(index, b'') for index in range(max(self.msgstr) + 1)] if self.msgstr else [b'']
+
+    def get_key(self):
+        """
+        return the original string of the .mo file
+        """
+        key = self.msgid
+        if self.msgctxt is not None:
+            key = self.msgctxt + b'\x04' + key
+        if self.msgid_plural is not None:
+            key = key + b'\x00' + self.msgid_plural
+        return key
+
+    def get_value(self):
+        """
+        return the translated string of the .mo file
+        """
+        return b'\x00'.join(self.get_msgstrs())
+
+
+def _unescape(string):
+    def replace(match):
+        escape = match.group(1)
+        if escape[:1] == b'x':
+            return bytes([int(escape[1:], 16)])
+        if escape[:1].isdigit():
+            return bytes([int(escape, 8) & 0xff])
+        return _ESCAPES.get(escape, b'\\' + escape)
+    return _ESCAPE_RE.sub(replace, string)
+
+
+def _string(filename, lineno, text):
+    """
+    return the unescaped content of a quoted string
+    """
+    text = text.strip()
+    if len(text) < 2 or text[:1] != b'"' or text[-1:] != b'"':
+        raise PoSyntaxError(filename, lineno, 'string expected')
+    return _unescape(text[1:-1])
+
+
+def parse_po(lines, filename = '<po>'):
+    """
+    yield the entries (PoEntry) of the lines (bytes) of a .po file
+    """
+    entry = PoEntry()
+    field = None                                    # field continued by a following string line
+    index = 0
+
+    for lineno, line in enumerate(lines, 1):
+        line = line.strip()
+        obsolete = False
+        if line.startswith(b'#~'):
+            obsolete = True
+            line = line[2:].strip()
+            if line.startswith(b'|'):               # previous msgid of an obsolete entry
+                continue
+        elif line.startswith(b'#'):
+            if field == 'msgstr':
+                yield entry
+                entry, field = PoEntry(lineno), None
+            if line.startswith(b'#,'):
+                entry.flags.update(flag.strip().decode('ascii', 'replace') for flag in line[2:].split(b',') if flag.strip())
+            continue
+
+        if not line:
+            if entry.msgid is not None and field == 'msgstr':
+                yield entry
+                entry, field = PoEntry(lineno), None
+            continue
+
+        if line[:1] == b'"':
+            if field is None:
+                raise PoSyntaxError(filename, lineno, 'string without keyword')
+            value = _string(filename, lineno, line)
+            if field == 'msgstr':
+                entry.msgstr[index] += value
+            else:
+                setattr(entry, field, getattr(entry, field) + value)
+            continue
+
+        match = _KEYWORD_RE.match(line)
+        if match is None:
+            raise PoSyntaxError(filename, lineno, 'unknown keyword')
+        keyword, plural_index, text = match.groups()
+        value = _string(filename, lineno, text)
+
+        if keyword in (b'msgctxt', b'msgid') and field == 'msgstr':
+            yield entry
+            entry = PoEntry(lineno)
+        if not entry.lineno:
+            entry.lineno = lineno
+        entry.obsolete = entry.obsolete or obsolete
+
+        if keyword == b'msgctxt':
+            entry.msgctxt, field = value, 'msgctxt'
+        elif keyword == b'msgid':
+            entry.msgid, field = value, 'msgid'
+        elif keyword == b'msgid_plural':
+            entry.msgid_plural, field = value, 'msgid_plural'
+        else:
+            if entry.msgid is None:
+                raise PoSyntaxError(filename, lineno, 'msgstr without msgid')
+            index = int(plural_index) if plural_index is not None else 0
+            entry.msgstr[index] = value
+            field = 'msgstr'
+
+    if entry.msgid is not None:
+        yield entry
+
+
+def read_po(filename):
+    """
+    return the list of entries of the .po file filename
+    """
+    with open(filename, 'rb') as fp:
+        return list(parse_po(fp, filename))
+
+
+def _next_prime(n):
+    def is_prime(n):
+        if n < 2:
+            return False
+        i = 2
+        while i * i <= n:
+            if n % i == 0:
+                return False
+            i += 1
+        return True
+    while not is_prime(n):
+        n += 1
+    return n
+
+
+def make_mo(entries, use_fuzzy = False):
+    """
+    return the content of the .mo file (bytes) of entries
+    """
+    messages = {}
+    for entry in entries:
+        if entry.obsolete:
+            continue
+        if not entry.is_header():
+            if entry.is_fuzzy() and not use_fuzzy:
+                continue
+            if not entry.is_translated():
+                continue
+        messages[entry.get_key()] = entry.get_value()
+
+    keys = sorted(messages)
+    count = len(keys)
+    hashsize = _next_prime(max(3, count * 4 // 3 + 1))
+
+    masteridx = 28
+    transidx = masteridx + 8 * count
+    hashidx = transidx + 8 * count
+    offset = hashidx + 4 * hashsize
+
+    originals = []
+    translated = []
+    strings = bytearray()
+    for key in keys:
+        originals.append((len(key), offset + len(strings)))
+        strings += key + b'\x00'
+    for key in keys:
+        value = messages[key]
+        translated.append((len(value), offset + len(strings)))
+        strings += value + b'\x00'
+
+    hashtable = [0] * hashsize
+    for index, key in enumerate(keys):
+        nul = key.find(b'\x00')
+        hval = hashpjw(key if nul < 0 else key[:nul])
+        idx = hval % hashsize
+        incr = 1 + hval % (hashsize - 2)
+        while hashtable[idx]:
+            if idx >= hashsize - incr:
+                idx -= hashsize - incr
+            else:
+                idx += incr
+        hashtable[idx] = index + 1
+
+    output = bytearray(struct.pack('<7I', 0x950412de, 0, count, masteridx, transidx, hashsize, hashidx))
+    for length, position in originals:
+        output += struct.pack('<II', length, position)
+    for length, position in translated:
+        output += struct.pack('<II', length, position)
+    output += struct.pack('<%dI' % hashsize, *hashtable)
+    output += strings
+    return bytes(output)
+
+
+def compile_po(po_filename, mo_filename = None, use_fuzzy = False):
+    """
+    compile po_filename into mo_filename (default: same name with extension .mo)
+
+    the .mo file is replaced atomically, returns mo_filename
+    """
+    if mo_filename is None:
+        mo_filename = os.path.splitext(po_filename)[0] + '.mo'
+    with open(po_filename, 'rb') as fp:
+        content = make_mo(parse_po(fp, po_filename), use_fuzzy)
+    tmp_filename = mo_filename + '.tmp'
+    with open(tmp_filename, 'wb') as fp:
+        fp.write(content)
+    os.replace(tmp_filename, mo_filename)
+    return mo_filename
+
+
+def find_po(localedir):
+    """
+    return the .po files of the locale tree (<localedir>/<language>/LC_MESSAGES/<domain>.po)
+    """
+    result = []
+    for language in sorted(os.listdir(localedir)):
+        lc_messages = os.path.join(localedir, language, 'LC_MESSAGES')
+        if os.path.isdir(lc_messages):
+            result.extend(os.path.join(lc_messages, name) for name in sorted(os.listdir(lc_messages)) if name.endswith('.po'))
+    return result
+
+
+def content_hash(filename):
+    with open(filename, 'rb') as fp:
+        return hashlib.sha256(fp.read()).hexdigest()
+
+
+def _compile_job(job):
+    po_filename, use_fuzzy = job
+    try:
+        compile_po(po_filename, use_fuzzy = use_fuzzy)
+        return po_filename, 'compiled'
+    except (OSError, ValueError) as e:
+        return po_filename, 'error: {}'.format(e)
+
+
+def compile_tree(localedir, workers = None, mode = MODE_MTIME, force = False, use_fuzzy = False):
+    """
+    compile the changed .po files of the locale tree in a process pool
+
+    mode 'mtime': compile if the .mo file is missing or older than the .po file
+    mode 'hash': compile if the content hash of the .po file differs from the last build
+    (kept in <localedir>/.pocompiler.json)
+    workers: size of the process pool (None: number of CPUs, 0: no pool)
+    returns a dict .po filename -> 'compiled', 'unchanged' or 'error: ...'
+    """
+    manifest_filename = os.path.join(localedir, MANIFEST)
+    manifest = {}
+    if mode == MODE_HASH:
+        try:
+            with open(manifest_filename) as fp:
+                manifest = json.load(fp)
+        except (OSError, ValueError):
+            manifest = {}
+
+    result = {}
+    hashes = {}
+    jobs = []
+    for po_filename in find_po(localedir):
+        mo_filename = os.path.splitext(po_filename)[0] + '.mo'
+        name = os.path.relpath(po_filename, localedir)
+        if mode == MODE_HASH:
+            hashes[name] = content_hash(po_filename)
+            changed = manifest.get(name) != hashes[name]
+        else:
+            changed = not os.path.exists(mo_filename) or os.path.getmtime(mo_filename) < os.path.getmtime(po_filename)
+        if force or changed or not os.path.exists(mo_filename):
+            jobs.append((po_filename, use_fuzzy))
+        else:
+            result[po_filename] = 'unchanged'
+
+    if workers == 0 or len(jobs) < 2:
+        results = map(_compile_job, jobs)
+    else:
+        executor = ProcessPoolExecutor(max_workers = workers)
+        results = executor.map(_compile_job, jobs)
+    try:
+        for po_filename, status in results:
+            result[po_filename] = status
+    finally:
+        if not (workers == 0 or len(jobs) < 2):
+            executor.shutdown()
+
+    if mode == MODE_HASH:
+        for po_filename, status in result.items():
+            name = os.path.relpath(po_filename, localedir)
+            if status.startswith('error'):
+                hashes.pop(name, None)
+        tmp_filename = manifest_filename + '.tmp'
+        with open(tmp_filename, 'w') as fp:
+            json.dump(hashes, fp, indent = 1, sort_keys = True)
+        os.replace(tmp_filename, manifest_filename)
+    return result
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description = 'compile .po files into .mo files')
+    parser.add_argument('path', nargs = '?', default = 'locale', help = 'locale tree or single .po file')
+    parser.add_argument('-o', '--output', help = '.mo file (single .po file only)')
+    parser.add_argument('-j', '--workers', type = int, help = 'size of the process pool (0: no pool)')
+    parser.add_argument('--mode', choices = (MODE_MTIME, MODE_HASH), default = MODE_MTIME)
+    parser.add_argument('--force', action = 'store_true', help = 'compile all .po files')
+    parser.add_argument('--use-fuzzy', action = 'store_true', help = 'compile fuzzy entries too')
+    args = parser.parse_args()
+
+    if args.path.endswith('.po'):
+        print(compile_po(args.path, args.output, args.use_fuzzy))
+        sys.exit(0)
+    errors = 0
+    for po_filename, status in sorted(compile_tree(args.path, args.workers, args.mode, args.force, args.use_fuzzy).items()):
+        print('{}: {}'.format(po_filename, status))
+        errors += status.startswith('error')
+    sys.exit(1 if errors else 0)
@@ -0,0 +1,94 @@
+# coding:utf-8
+'''
+tests for the module analyzer
+'''
+import unittest
+import json
+import os
+import tempfile
+import analyzer
+from analyzer import analyze_tree, placeholders, quoted
+from pocompiler import compile_po
+
+LOCALEDIR = os.path.join(os.path.dirname(analyzer.__file__), 'locale')
+
+PO = '''
+msgid ""
+msgstr ""
+"Content-Type: text/plain; charset=UTF-8\\n"
+"Plural-Forms: nplurals=2; plural=(n != 1);\\n"
+
+msgid "ok '{}'"
+msgstr "gut '{}'"
+
+msgid "to {name}"
+msgstr "nach {nmae}"
+
+msgid "%(count)d of %s"
+msgstr "%s"
+
+msgid "one file"
+msgid_plural "{} files"
+msgstr[0] "eine Datei"
+
+#, fuzzy
+msgid "fuzzy"
+msgstr "unscharf"
+
+msgid "untranslated"
+msgstr ""
+
+#~ msgid "obsolete"
+#~ msgstr "veraltet"
+'''
+
+class Test(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.localedir = self.tmpdir.name
+        for language in ('de', 'nl'):
+            os.makedirs(os.path.join(self.localedir, language, 'LC_MESSAGES'))
+        self.po = os.path.join(self.localedir, 'de', 'LC_MESSAGES', 'app.po')
+        with open(self.po, 'w', encoding = 'utf-8') as fp:
+            fp.write(PO)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_placeholders(self):
+
+        self.assertEqual(placeholders("to '{}' {0.name} {x[1]} %(n)d %s 100%%"), ['%(n)', '%s', '{0}', '{x}', '{}'])
+        self.assertEqual(quoted("to '{}' and {}'"), ["'{}'"])
+
+    def test_po(self):
+
+        result = analyze_tree(self.localedir, workers = 0)
+        report = result['catalogs'][0]
+        self.assertEqual((report['language'], report['domain']), ('de', 'app'))
+        self.assertEqual(report['untranslated'], ['untranslated'])
+        self.assertEqual(report['fuzzy'], ['fuzzy'])
+        self.assertEqual(report['obsolete'], ['obsolete'])
+        self.assertEqual([entry['msgid'] for entry in report['placeholders']], ['to {name}', '%(count)d of %s'])
+        self.assertEqual(report['plurals'], [{'msgid': 'one file', 'expected': 2, 'found': 1}])
+        self.assertEqual(result['summary']['problems'], 3)
+        json.dumps(result)
+
+    def test_stale_and_mo(self):
+
+        mo = compile_po(self.po)
+        os.replace(mo, os.path.join(self.localedir, 'nl', 'LC_MESSAGES', 'app.mo'))
+        compile_po(self.po)
+        with open(self.po, 'a', encoding = 'utf-8') as fp:
+            fp.write('\nmsgid "new"\nmsgstr "neu"\n')
+        result = analyze_tree(self.localedir, workers = 2)
+        de, nl = result['catalogs']
+        self.assertEqual(de['stale'], ['new'])
+        self.assertEqual(nl['po'], None)
+        self.assertEqual(len(nl['placeholders']), 2)
+
+    def test_locale(self):
+
+        result = analyze_tree(LOCALEDIR, workers = 0)
+        fr = [report for report in result['catalogs'] if report['language'] == 'fr'][0]
+        self.assertEqual(len(fr['quoting']), 1)         # en {}' instead of en '{}'
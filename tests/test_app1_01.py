@@ -84,3 +84,14 @@ class Test(unittest.TestCase):
 #         print(err_msg)
         self.assertEqual(err_msg, "[Errno 2] No translation file found for domain: 'app'", "unknown language 'es' error")
         self.assertEqual(out_msg, "This is a test message. Translated from default language 'en' to 'es'")
+
+    def test_language_context_local(self):
+
+        language = "de"
+        self.app = app.App(install=False)
+        self.app.set_language(language)
+        with self.captured_output() as (out, err):
+            self.app.set_translation(language)
+            self.app.test_print()
+        out_msg = out.getvalue().strip()
+        self.assertEqual(out_msg, "Dieses ist eine Test-Meldung. Übersetzt aus der Vorgabe-Sprache 'en' nach 'de'")
@@ -3,6 +3,7 @@
 tests for the module app2
 '''
 import unittest
+import asyncio
 import os
 import sys
 from contextlib import contextmanager
@@ -84,3 +85,31 @@ class Test(unittest.TestCase):
 #         print(err_msg)
         self.assertEqual(err_msg, "[Errno 2] No translation file found for domain: 'app'", "unknown language 'es' error")
         self.assertEqual(out_msg, "This is a test message. Translated from default language 'en' to 'es'")
+
+    def test_translate_languages(self):
+
+        msgid = "This is a test message. Translated from default language 'en' to '{}'"
+        result = self.app.translate_languages(msgid)
+        self.assertEqual(result['en'], msgid)
+        self.assertEqual(result['de'], "Dieses ist eine Test-Meldung. Übersetzt aus der Vorgabe-Sprache 'en' nach '{}'")
+
+    def test_negotiate_language(self):
+
+        self.assertEqual(self.app.negotiate_language('de-AT,de;q=0.9,en;q=0.5'), 'de')
+        self.assertEqual(self.app.negotiate_language('fr_CA.UTF-8'), 'fr')
+        self.assertEqual(self.app.negotiate_language('es-ES'), 'en')
+
+    def test_set_translation_async(self):
+
+        msgid = "This is a test message. Translated from default language 'en' to '{}'"
+
+        async def run(language):
+            await self.app.set_translation_async(language)
+            return self.app.translate(msgid)
+
+        async def main():
+            return await asyncio.gather(run('de'), run('fr-CA'))
+
+        de, fr = asyncio.run(main())
+        self.assertTrue(de.startswith('Dieses ist eine Test-Meldung'))
+        self.assertTrue(fr.startswith("C'est une message de test"))
@@ -0,0 +1,108 @@
+# coding:utf-8
+'''
+tests for the module app3
+'''
+import unittest
+import os
+import sys
+import threading
+from contextlib import contextmanager
+from io import StringIO
+import app3 as app
+
+class Test(unittest.TestCase):
+
+    @contextmanager
+    def captured_output(self):
+        new_out, new_err = StringIO(), StringIO()
+        old_out, old_err = sys.stdout, sys.stderr
+        try:
+            sys.stdout, sys.stderr = new_out, new_err
+            yield sys.stdout, sys.stderr
+        finally:
+            sys.stdout, sys.stderr = old_out, old_err
+
+    def setUp(self):
+        with self.captured_output():
+            self.app = app.App()
+        app_path = os.path.dirname(app.__file__)
+        os.chdir(app_path)
+        self.factory = app.ParserFactory()
+
+    def tearDown(self):
+        self.app = None
+
+    def test_parser_cached(self):
+
+        language = "de"
+        with self.captured_output():
+            self.app.set_language(language)
+            self.app.set_translation(language)
+        parser = self.factory.get_parser(language, self.app.translate)
+        self.assertIs(self.factory.get_parser(language, self.app.translate), parser)
+        self.assertIsNot(self.factory.get_parser('en', str), parser)
+
+    def test_parser_per_catalog(self):
+
+        language = "de"
+        with self.captured_output():
+            self.app.set_language(language)
+        with app.translations.using(app.registry.fallback()):
+            parser = self.factory.get_parser(language, self.app.translate)
+        self.assertNotIn('Erzeuge Vorlagen-Dateien', parser.format_help())
+        with self.captured_output():
+            self.app.set_translation(language)
+        parser = self.factory.get_parser(language, self.app.translate)
+        self.assertIn('Erzeuge Vorlagen-Dateien', parser.format_help())
+
+    def test_parser_dropped_on_reload(self):
+
+        language = "de"
+        with self.captured_output():
+            self.app.set_language(language)
+            self.app.set_translation(language)
+        parser = app.parsers.get_parser(language, self.app.translate)
+        self.assertIs(app.parsers.get_parser(language, self.app.translate), parser)
+        for domain, localedir, language_ in app.registry.get_keys():
+            app.registry.reload(domain, localedir, language_)
+        self.assertIsNot(app.parsers.get_parser(language, self.app.translate), parser)
+
+    def test_help_memoized(self):
+
+        language = "de"
+        with self.captured_output():
+            self.app.set_language(language)
+            self.app.set_translation(language)
+        parser = self.factory.get_parser(language, self.app.translate)
+        help_text = parser.format_help()
+        self.assertIn('Erzeuge Vorlagen-Dateien', help_text)
+        self.assertIs(parser.format_help(), help_text)
+        self.assertIs(parser.format_usage(), parser.format_usage())
+
+    def test_parse_error(self):
+
+        parser = self.factory.get_parser('en', str)
+        with self.captured_output() as (out, err), self.assertRaises(SystemExit):
+            parser.parse_args([])
+        self.assertIn('the following arguments are required: filename', err.getvalue())
+
+    def test_domains_concurrent(self):
+
+        results = {}
+        barrier = threading.Barrier(2)
+
+        def run(language):
+            self.app.set_domains(language)
+            barrier.wait()
+            parser = self.factory.get_parser(language, self.app.translate)
+            results[language] = (parser.format_usage(), parser.format_help())
+
+        threads = [threading.Thread(target=run, args=(language,)) for language in ('de', 'en')]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertTrue(results['de'][0].startswith('Starten mit:'))
+        self.assertIn('Erzeuge Vorlagen-Dateien', results['de'][1])
+        self.assertTrue(results['en'][0].startswith('usage:'))
+        self.assertIn('create templates files', results['en'][1])
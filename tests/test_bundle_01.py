@@ -0,0 +1,88 @@
+# coding:utf-8
+'''
+tests for the module bundle
+'''
+import unittest
+import os
+import shutil
+import tempfile
+import gettext
+import bundle
+from bundle import Bundle
+from translations import TranslationRegistry
+
+LOCALEDIR = os.path.join(os.path.dirname(bundle.__file__), 'locale')
+
+class Test(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.filename = os.path.join(self.tmpdir.name, bundle.FILENAME_DEFAULT)
+        bundle.build(LOCALEDIR, self.filename)
+        self.bundle = Bundle(self.filename)
+
+    def tearDown(self):
+        self.bundle.close()
+        self.tmpdir.cleanup()
+
+    def test_catalogs(self):
+
+        self.assertEqual(self.bundle.get_catalogs(), [('de', 'app'), ('de', 'argparse'), ('fr', 'app')])
+
+    def test_same_as_mo(self):
+
+        for language, domain in self.bundle.get_catalogs():
+            expected = gettext.translation(domain, localedir=LOCALEDIR, languages=[language])
+            lang = self.bundle.translation(domain, language)
+            self.assertEqual(lang.info(), expected.info())
+            for msgid in expected._catalog:
+                if isinstance(msgid, str):
+                    self.assertEqual(lang.gettext(msgid), expected.gettext(msgid))
+
+    def test_order(self):
+
+        localedir = os.path.join(self.tmpdir.name, 'locale')
+        shutil.copytree(LOCALEDIR, localedir)
+        lc_messages = os.path.join(localedir, 'de', 'LC_MESSAGES')
+        shutil.copyfile(os.path.join(lc_messages, 'app.mo'), os.path.join(lc_messages, 'app-extra.mo'))
+        filename = os.path.join(self.tmpdir.name, 'extra.bundle')
+        bundle.build(localedir, filename)
+        extra = Bundle(filename)
+        self.addCleanup(extra.close)
+        for language, domain in extra.get_catalogs():
+            self.assertTrue(extra.has_translation(domain, language), (language, domain))
+        self.assertIn(('de', 'app-extra'), extra.get_catalogs())
+
+    def test_missing(self):
+
+        with self.assertRaises(FileNotFoundError):
+            self.bundle.translation('app', 'es')
+
+    def test_registry(self):
+
+        registry = TranslationRegistry()
+        registry.add_bundle(LOCALEDIR, self.bundle)
+        lang = registry.translation('app', localedir=LOCALEDIR, language='de')
+        self.assertIs(lang, self.bundle.translation('app', 'de'))
+
+    def test_reload(self):
+
+        localedir = os.path.join(self.tmpdir.name, 'locale')
+        shutil.copytree(LOCALEDIR, localedir)
+        registry = TranslationRegistry()
+        registry.add_bundle(localedir, self.bundle)
+        lang = registry.translation('app', localedir=localedir, language='de')
+        self.assertIs(lang, self.bundle.translation('app', 'de'))
+        mofile = os.path.join(localedir, 'fr', 'LC_MESSAGES', 'app.mo')
+        shutil.copyfile(mofile, os.path.join(localedir, 'de', 'LC_MESSAGES', 'app.mo'))
+        self.assertTrue(registry.reload('app', localedir, 'de'))
+        with open(mofile, 'rb') as fp:
+            expected = gettext.GNUTranslations(fp)
+        message = "This is a test message. Translated from default language 'en' to '{}'"
+        self.assertNotEqual(lang.gettext(message), expected.gettext(message))
+        self.assertEqual(registry.translation('app', localedir=localedir, language='de').gettext(message),
+                         expected.gettext(message))
+        registry.discard('app', localedir, 'de')    # loaded again from the .mo file, not from the bundle
+        self.assertEqual(registry.translation('app', localedir=localedir, language='de').gettext(message),
+                         expected.gettext(message))
+
@@ -0,0 +1,148 @@
+# coding:utf-8
+'''
+tests for the module catalogcache
+'''
+import unittest
+import gettext
+import os
+import shutil
+import tempfile
+import time
+import catalogcache
+import translations
+from catalogcache import CatalogCache
+from config import Config
+from motranslations import MmapTranslations
+from plurals import PluralTranslations
+from pocompiler import PoEntry, make_mo
+from translations import TranslationRegistry
+
+LOCALEDIR = os.path.join(os.path.dirname(catalogcache.__file__), 'locale')
+MSGID = "This is a test message. Translated from default language 'en' to '{}'"
+
+class Test(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.directory = os.path.join(self.tmpdir.name, 'cache')
+        self.mo = os.path.join(LOCALEDIR, 'de', 'LC_MESSAGES', 'app.mo')
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def parse(self, cache, filename):
+        with open(filename, 'rb') as fp:
+            return cache.parse(fp)
+
+    def test_roundtrip(self):
+
+        with open(self.mo, 'rb') as fp:
+            expected = gettext.GNUTranslations(fp)
+        cache = CatalogCache(self.directory)
+        first = self.parse(cache, self.mo)
+        self.assertEqual(len(os.listdir(self.directory)), 1)
+        second = self.parse(cache, self.mo)
+        self.assertEqual(cache.get_stats(), {'hits': 1, 'misses': 1})
+        for lang in (first, second):
+            self.assertEqual(lang._catalog, expected._catalog)
+            self.assertEqual(lang.info(), expected.info())
+            self.assertEqual(lang.charset(), expected.charset())
+            self.assertEqual(lang.gettext(MSGID), expected.gettext(MSGID))
+            self.assertEqual(lang.ngettext('a', 'b', 2), 'b')
+
+    def test_stale_and_corrupt(self):
+
+        cache = CatalogCache(self.directory)
+        mo = os.path.join(self.tmpdir.name, 'app.mo')
+        shutil.copy(self.mo, mo)
+        self.parse(cache, mo)
+        shutil.copy(os.path.join(LOCALEDIR, 'fr', 'LC_MESSAGES', 'app.mo'), mo)
+        self.assertTrue(self.parse(cache, mo).gettext(MSGID).startswith("C'est"))
+        self.assertEqual(cache.get_stats()['misses'], 2)
+        for name in os.listdir(self.directory):
+            with open(os.path.join(self.directory, name), 'wb') as fp:
+                fp.write(b'\x00')
+        self.assertTrue(self.parse(cache, mo).gettext(MSGID).startswith("C'est"))
+        self.assertEqual(cache.get_stats()['misses'], 3)
+        self.assertEqual(self.parse(cache, mo).gettext(MSGID), self.parse(cache, mo).gettext(MSGID))
+        cache.clear()
+        self.assertEqual(os.listdir(self.directory), [])
+
+    def test_hit_faster_than_parse(self):
+
+        entries = []
+        for number in range(50000):
+            entry = PoEntry()
+            entry.msgid = b'message number %d with some text' % number
+            entry.msgstr = {0: b'Nachricht Nummer %d mit etwas Text' % number}
+            entries.append(entry)
+        mo = os.path.join(self.tmpdir.name, 'large.mo')
+        with open(mo, 'wb') as fp:
+            fp.write(make_mo(entries))
+        cache = CatalogCache(self.directory)
+        self.parse(cache, mo)                       # miss: written to the cache
+
+        def best(function):
+            seconds = []
+            for _ in range(3):
+                start = time.perf_counter()
+                function()
+                seconds.append(time.perf_counter() - start)
+            return min(seconds)
+
+        def parse():
+            with open(mo, 'rb') as fp:
+                PluralTranslations(fp)
+
+        hit = best(lambda: self.parse(cache, mo))
+        self.assertEqual(cache.get_stats(), {'hits': 3, 'misses': 1})
+        self.assertLess(2 * hit, best(parse))       # a hit must beat parsing clearly, not just break even
+
+    def test_prune(self):
+
+        cache = CatalogCache(self.directory, maxfiles = 2)
+        mo = os.path.join(self.tmpdir.name, 'app.mo')
+        for language in ('de', 'fr', 'de'):
+            shutil.copy(os.path.join(LOCALEDIR, language, 'LC_MESSAGES', 'app.mo'), mo)
+            self.parse(cache, mo)
+        self.assertEqual(len(os.listdir(self.directory)), 1)   # former entries of app.mo removed
+        for language in ('de', 'fr'):
+            self.parse(cache, os.path.join(LOCALEDIR, language, 'LC_MESSAGES', 'app.mo'))
+        self.assertEqual(len(os.listdir(self.directory)), 2)   # capped
+
+    def test_config(self):
+
+        config = Config.instance('app')
+        cfg = config.get_config_parser()
+        previous = cfg[Config.PATHS].get(Config.DIR_CACHE)
+        class_ = translations.registry.get_class()
+        cfg[Config.PATHS][Config.DIR_CACHE] = self.directory
+        try:
+            translations.registry.translation('app', LOCALEDIR, 'de')
+            size = translations.registry.get_stats()['size']
+            Config('app')._init_cache()
+            installed = translations.registry.get_class()
+            Config('app')._init_cache()
+            self.assertIs(translations.registry.get_class().__self__, installed.__self__)
+            self.assertEqual(translations.registry.get_stats()['size'], size)
+            translations.registry.set_class(MmapTranslations)
+            Config('app')._init_cache()
+            self.assertIs(translations.registry.get_class(), MmapTranslations)
+        finally:
+            translations.registry.set_class(class_)
+            if previous is None:
+                cfg.remove_option(Config.PATHS, Config.DIR_CACHE)
+            else:
+                cfg[Config.PATHS][Config.DIR_CACHE] = previous
+
+    def test_registry(self):
+
+        registry = TranslationRegistry()
+        registry.translation('app', LOCALEDIR, 'de')
+        cache = CatalogCache(self.directory)
+        registry.set_class(cache.parse)
+        self.assertEqual(registry.get_stats()['size'], 1)
+        registry.clear()
+        lang = registry.translation('app', LOCALEDIR, 'de')
+        self.assertEqual(lang.gettext('create templates files'), 'Erzeuge Vorlagen-Dateien')
+        self.assertEqual(cache.get_stats()['misses'], 1)
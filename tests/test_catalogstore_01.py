@@ -0,0 +1,82 @@
+# coding:utf-8
+'''
+tests for the module catalogstore
+'''
+import unittest
+import gettext
+import io
+import os
+import catalogstore
+from catalogstore import CatalogStore, CompactTranslations
+from pocompiler import make_mo, parse_po
+from translations import TranslationRegistry
+
+LOCALEDIR = os.path.join(os.path.dirname(catalogstore.__file__), 'locale')
+
+PO = b'''
+msgid ""
+msgstr ""
+"Content-Type: text/plain; charset=UTF-8\\n"
+"Plural-Forms: nplurals=2; plural=(n != 1);\\n"
+
+msgid "create templates files"
+msgstr "Vorlagen erzeugen"
+
+msgctxt "menu"
+msgid "File"
+msgstr "Datei"
+
+msgid "one file"
+msgid_plural "{} files"
+msgstr[0] "eine Datei"
+msgstr[1] "{} Dateien"
+'''
+
+class Test(unittest.TestCase):
+
+    def setUp(self):
+        self.store = CatalogStore()
+        self.mo = make_mo(parse_po(PO.splitlines(keepends = True)))
+
+    def test_lookups(self):
+
+        expected = gettext.GNUTranslations(io.BytesIO(self.mo))
+        lang = self.store.parse(io.BytesIO(self.mo))
+        self.assertIsInstance(lang, CompactTranslations)
+        self.assertEqual(dict(lang.items()), expected._catalog)
+        for message in ('create templates files', 'unknown', 'one file'):
+            self.assertEqual(lang.gettext(message), expected.gettext(message))
+        for n in range(4):
+            self.assertEqual(lang.ngettext('one file', '{} files', n), expected.ngettext('one file', '{} files', n))
+            self.assertEqual(lang.ngettext('unknown', 'unknowns', n), expected.ngettext('unknown', 'unknowns', n))
+        self.assertEqual(lang.pgettext('menu', 'File'), 'Datei')
+        self.assertEqual(lang.pgettext('edit', 'File'), 'File')
+        self.assertEqual(lang.npgettext('menu', 'File', 'Files', 2), 'Files')
+        self.assertEqual(lang.info()['plural-forms'], expected.info()['plural-forms'])
+
+    def test_shared_keys(self):
+
+        registry = TranslationRegistry(class_ = self.store.parse)
+        de = registry.translation('app', LOCALEDIR, 'de')
+        fr = registry.translation('app', LOCALEDIR, 'fr')
+        lang = self.store.parse(io.BytesIO(self.mo))
+        self.assertEqual(de.gettext('create templates files'), 'Erzeuge Vorlagen-Dateien')
+        self.assertEqual(lang.gettext('create templates files'), 'Vorlagen erzeugen')
+        keys = set()
+        for catalog in (de, fr, lang):
+            keys.update(key if isinstance(key, str) else key[0] for key, _ in catalog.items())
+        self.assertEqual(len(self.store.get_table()), len(keys))
+        msgid = 'create templates files'
+        de_key = next(key for key, _ in de.items() if key == msgid)
+        lang_key = next(key for key, _ in lang.items() if key == msgid)
+        self.assertIs(de_key, lang_key)
+
+    def test_sparse(self):
+
+        registry = TranslationRegistry(class_ = self.store.parse)
+        de = registry.translation('app', LOCALEDIR, 'de')
+        fr = registry.translation('app', LOCALEDIR, 'fr')
+        self.assertGreater(len(self.store.get_table()), len(list(fr.items())))
+        self.assertEqual(len(fr), len(list(fr.items())))
+        self.assertEqual(fr.gettext('create templates files'), 'create templates files')
+        self.assertEqual(len(de), len(list(de.items())))
@@ -0,0 +1,113 @@
+# coding:utf-8
+'''
+tests for the module config
+'''
+import unittest
+import os
+import subprocess
+import sys
+from logging.handlers import QueueHandler
+import config as config_module
+from config import Config
+from translations import registry
+
+class Test(unittest.TestCase):
+
+    def test_instance(self):
+
+        self.assertIs(Config.instance('app'), Config.instance('app'))
+
+    def test_lazy(self):
+
+        config = Config('app', lazy=True)
+        self.assertFalse(config._loaded)
+        self.assertIsNone(config._log)
+        cfg = config.get_config_parser()
+        self.assertTrue(cfg.has_section(Config.PATHS))
+        self.assertIsNone(config._log)
+        self.assertIsNotNone(config.get_log())
+
+    def test_lazy_imports(self):
+
+        directory = os.path.dirname(os.path.abspath(config_module.__file__))
+        script = ("import sys, config; config.Config('app', lazy=True); "
+                  "print(sorted(set(sys.modules) & {'bundle', 'catalogcache', 'negotiation', 'translations', 'watcher'}))")
+        result = subprocess.run([sys.executable, '-c', script], cwd=directory, check=True,
+                                capture_output=True, text=True)
+        self.assertEqual(result.stdout.strip(), '[]')
+
+    def test_app_lazy(self):
+
+        directory = os.path.dirname(os.path.abspath(config_module.__file__))
+        script = "import app3; app3.App(); print(app3.Config.instance('app')._loaded)"
+        result = subprocess.run([sys.executable, '-c', script], cwd=directory, check=True,
+                                capture_output=True, text=True)
+        self.assertEqual(result.stdout.strip().splitlines()[-1], 'False')
+
+    def test_eager(self):
+
+        config = Config('app')
+        self.assertTrue(config._loaded)
+        self.assertIsNotNone(config._log)
+
+    def test_handlers_once(self):
+
+        log = Config('app').get_log()
+        handlers = list(log.handlers)
+        Config('app')
+        Config('app', lazy=True).get_log()
+        self.assertEqual(log.handlers, handlers)
+
+    def test_log_queue(self):
+
+        config = Config('app', lazy=True)
+        general = config.get_config_parser()[Config.GENERAL]
+        Config.shutdown_log('app')
+        general[Config.LOG_QUEUE] = 'yes'
+        try:
+            log = config.get_log()
+            self.assertEqual(len(log.handlers), 1)
+            self.assertIsInstance(log.handlers[0], QueueHandler)
+            log.debug('queued')
+        finally:
+            Config.shutdown_log('app')
+            general[Config.LOG_QUEUE] = 'no'
+        self.assertEqual(log.handlers, [])
+
+    def test_fallback_chain(self):
+
+        config = Config.instance('app')
+        cfg = config.get_config_parser()
+        self.assertEqual(config.get_fallback_chain('de-CH'), ['de_CH', 'de'])
+        self.assertEqual(config.get_fallback_chain('en'), ['en'])
+        had_section = cfg.has_section(Config.FALLBACKS)
+        if not had_section:
+            cfg.add_section(Config.FALLBACKS)
+        cfg.set(Config.FALLBACKS, 'de_ch', 'de_AT, de, en, fr')
+        try:
+            self.assertEqual(config.get_fallback_chain('de_CH.UTF-8'), ['de_CH', 'de_AT', 'de'])
+        finally:
+            cfg.remove_option(Config.FALLBACKS, 'de_ch')
+            if not had_section:
+                cfg.remove_section(Config.FALLBACKS)
+
+    def test_preload(self):
+
+        config = Config('app', lazy=True)
+        general = config.get_config_parser()[Config.GENERAL]
+        domains = general.get(Config.PRELOAD_DOMAINS)
+        maxsize = registry.get_maxsize()
+        general[Config.PRELOAD_DOMAINS] = 'app, argparse'
+        registry.clear()
+        registry.set_maxsize(2)
+        try:
+            report = config.preload()
+            self.assertEqual(len(report), 2 * len(Config.LANGUAGES))
+            self.assertEqual(registry.get_maxsize(), len(report))
+            stats = registry.get_stats()
+            self.assertEqual(stats['evictions'], 0)
+            self.assertEqual(stats['size'], sum(entry['status'] == 'ok' for entry in report))
+        finally:
+            general[Config.PRELOAD_DOMAINS] = domains
+            registry.set_maxsize(maxsize)
+            registry.clear()
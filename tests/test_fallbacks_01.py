@@ -0,0 +1,81 @@
+# coding:utf-8
+'''
+tests for the module fallbacks
+'''
+import unittest
+import gettext
+import os
+import shutil
+import tempfile
+import fallbacks
+from fallbacks import FlatTranslations, catalog_items
+from motranslations import MmapTranslations
+from pocompiler import make_mo, parse_po
+from translations import TranslationRegistry
+
+LOCALEDIR = os.path.join(os.path.dirname(fallbacks.__file__), 'locale')
+MSGID = "This is a test message. Translated from default language 'en' to '{}'"
+
+PO_DE_CH = '''
+msgid ""
+msgstr ""
+"Content-Type: text/plain; charset=UTF-8\\n"
+"Plural-Forms: nplurals=2; plural=(n != 1);\\n"
+
+msgid "{}"
+msgstr "Das isch e Test-Meldig. Übersetzt us de Vorgabe-Sproch 'en' uf '{{}}'"
+'''.format(MSGID)
+
+class Test(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.localedir = self.tmpdir.name
+        for language in ('de', 'de_CH'):
+            os.makedirs(os.path.join(self.localedir, language, 'LC_MESSAGES'))
+        shutil.copy(os.path.join(LOCALEDIR, 'de', 'LC_MESSAGES', 'app.mo'),
+                    os.path.join(self.localedir, 'de', 'LC_MESSAGES', 'app.mo'))
+        with open(os.path.join(self.localedir, 'de_CH', 'LC_MESSAGES', 'app.mo'), 'wb') as fp:
+            fp.write(make_mo(parse_po(PO_DE_CH.encode('utf-8').splitlines(keepends = True))))
+        self.registry = TranslationRegistry()
+        self.de = self.registry.translation('app', self.localedir, 'de')
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_chain(self):
+
+        lang = self.registry.chain('app', self.localedir, ['de_CH', 'de'])
+        self.assertIsInstance(lang, FlatTranslations)
+        self.assertTrue(lang.gettext(MSGID).startswith('Das isch'))
+        self.assertEqual(lang.gettext('create templates files'), self.de.gettext('create templates files'))
+        self.assertEqual(lang.gettext('unknown'), 'unknown')
+        self.assertEqual(lang.ngettext('file', 'files', 2), 'files')
+        self.assertIs(self.registry.chain('app', self.localedir, ['de_CH', 'de']), lang)
+        self.assertIs(self.registry.chain('app', self.localedir, ['es', 'de']), self.de)
+        with self.assertRaises(FileNotFoundError):
+            self.registry.chain('app', self.localedir, ['es'])
+
+    def test_shared_tail(self):
+
+        shutil.copytree(os.path.join(self.localedir, 'de_CH'), os.path.join(self.localedir, 'gsw'))
+        lang = self.registry.chain('app', self.localedir, ['gsw', 'de_CH', 'de'])
+        tail = self.registry.chain('app', self.localedir, ['de_CH', 'de'])
+        self.assertEqual(lang.get_catalogs()[1:], tail.get_catalogs())
+        self.assertIs(lang._catalog['create templates files'], tail._catalog['create templates files'])
+
+    def test_reload(self):
+
+        lang = self.registry.chain('app', self.localedir, ['de_CH', 'de'])
+        self.registry.reload('app', self.localedir, 'de')
+        self.assertIsNot(self.registry.chain('app', self.localedir, ['de_CH', 'de']), lang)
+
+    def test_mmap_items(self):
+
+        filename = os.path.join(LOCALEDIR, 'de', 'LC_MESSAGES', 'app.mo')
+        with open(filename, 'rb') as fp:
+            expected = gettext.GNUTranslations(fp)
+        with open(filename, 'rb') as fp:
+            lang = MmapTranslations(fp)
+        self.assertEqual(dict(catalog_items(lang)), expected._catalog)
+        lang.close()
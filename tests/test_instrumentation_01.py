@@ -0,0 +1,81 @@
+# coding:utf-8
+'''
+tests for the module instrumentation
+'''
+import unittest
+import os
+import instrumentation
+import translations
+from instrumentation import Instrumentation
+from msgformat import MessageFormatterCache
+from translations import TranslationRegistry
+
+LOCALEDIR = os.path.join(os.path.dirname(instrumentation.__file__), 'locale')
+MSGID = "This is a test message. Translated from default language 'en' to '{}'"
+
+class Test(unittest.TestCase):
+
+    def setUp(self):
+        self.instrumentation = Instrumentation(count_msgids=True)
+        self.registry = TranslationRegistry()
+        self.registry.enable_instrumentation(self.instrumentation)
+
+    def tearDown(self):
+        self.instrumentation.stop_dump()
+
+    def catalog(self, snapshot, domain, language):
+        for entry in snapshot['catalogs']:
+            if (entry['domain'], entry['language']) == (domain, language):
+                return entry
+
+    def test_counters(self):
+
+        lang = self.registry.translation('app', localedir=LOCALEDIR, language='de')
+        lang.gettext(MSGID)
+        lang.gettext('unknown')
+        lang.gettext('unknown')
+        for _ in range(2):
+            with self.assertRaises(FileNotFoundError):
+                self.registry.translation('app', localedir=LOCALEDIR, language='es')
+        snapshot = self.instrumentation.snapshot()
+        entry = self.catalog(snapshot, 'app', 'de')
+        self.assertEqual((entry['hits'], entry['misses'], entry['loads']), (1, 2, 1))
+        self.assertEqual(sum(entry['load_histogram'].values()), 1)
+        self.assertEqual(entry['msgids'], {MSGID: 1, 'unknown': 2})
+        self.assertEqual(self.catalog(snapshot, 'app', 'es')['missing'], 2)
+
+    def test_fallback_and_chain(self):
+
+        self.registry.translation('app', localedir=LOCALEDIR, language='es', fallback=True).gettext(MSGID)
+        lang = self.registry.chain('app', LOCALEDIR, ['de', 'fr'])
+        lang.gettext(MSGID)
+        lang.gettext('unknown')
+        self.assertIs(self.registry.chain('app', LOCALEDIR, ['de', 'fr']), lang)
+        snapshot = self.instrumentation.snapshot()
+        entry = self.catalog(snapshot, 'app', 'es')
+        self.assertEqual((entry['hits'], entry['misses'], entry['missing']), (0, 1, 1))
+        entry = self.catalog(snapshot, 'app', 'de')
+        self.assertEqual((entry['hits'], entry['misses']), (1, 1))
+
+    def test_formatter(self):
+
+        lang = self.registry.translation('app', localedir=LOCALEDIR, language='de')
+        cache = MessageFormatterCache()
+        with translations.using(lang):
+            for _ in range(3):
+                cache.get(translations.get_translation(), MSGID)('de')
+        self.assertEqual(self.catalog(self.instrumentation.snapshot(), 'app', 'de')['hits'], 3)
+
+    def test_sink(self):
+
+        snapshots = []
+        self.instrumentation.add_sink(snapshots.append)
+        self.registry.translation('app', localedir=LOCALEDIR, language='fr').gettext(MSGID)
+        self.instrumentation.emit()
+        self.assertEqual(self.catalog(snapshots[0], 'app', 'fr')['hits'], 1)
+
+    def test_disabled(self):
+
+        self.registry.disable_instrumentation()
+        lang = self.registry.translation('app', localedir=LOCALEDIR, language='de')
+        self.assertNotIsInstance(lang, instrumentation.InstrumentedTranslations)
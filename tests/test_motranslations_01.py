@@ -0,0 +1,101 @@
+# coding:utf-8
+'''
+tests for the module motranslations
+'''
+import unittest
+import os
+import struct
+import tempfile
+import gettext
+import motranslations
+from pocompiler import make_mo, parse_po
+from motranslations import MmapTranslations
+
+LOCALEDIR = os.path.join(os.path.dirname(motranslations.__file__), 'locale')
+
+PO = b'''
+msgid ""
+msgstr ""
+"Content-Type: text/plain; charset=UTF-8\\n"
+"Plural-Forms: nplurals=2; plural=(n != 1);\\n"
+
+msgid "one file"
+msgid_plural "{} files"
+msgstr[0] "eine Datei"
+msgstr[1] "{} Dateien"
+'''
+
+class Test(unittest.TestCase):
+
+    def open_pair(self, filename):
+        with open(filename, 'rb') as fp:
+            expected = gettext.GNUTranslations(fp)
+        with open(filename, 'rb') as fp:
+            lang = MmapTranslations(fp)
+        self.addCleanup(lang.close)
+        return expected, lang
+
+    def test_same_as_gnutranslations(self):
+
+        for language in ('de', 'fr'):
+            for domain in ('app', 'argparse'):
+                filename = os.path.join(LOCALEDIR, language, 'LC_MESSAGES', domain + '.mo')
+                if not os.path.exists(filename):
+                    continue
+                expected, lang = self.open_pair(filename)
+                self.assertEqual(lang.info(), expected.info())
+                self.assertEqual(lang.charset(), expected.charset())
+                for msgid in expected._catalog:
+                    if isinstance(msgid, tuple):
+                        continue
+                    self.assertEqual(lang.gettext(msgid), expected.gettext(msgid))
+
+    def test_missing(self):
+
+        expected, lang = self.open_pair(os.path.join(LOCALEDIR, 'de', 'LC_MESSAGES', 'app.mo'))
+        self.assertEqual(lang.gettext('no such message'), 'no such message')
+        self.assertEqual(lang.ngettext('one file', 'many files', 2), 'many files')
+        self.assertEqual(lang.gettext('Übersetzung'), 'Übersetzung')
+
+    def test_plural_msgid(self):
+
+        with tempfile.NamedTemporaryFile(suffix='.mo', delete=False) as fp:
+            fp.write(make_mo(parse_po(PO.splitlines(keepends=True))))
+        self.addCleanup(os.remove, fp.name)
+        expected, lang = self.open_pair(fp.name)
+        self.assertEqual(lang.gettext('one file'), expected.gettext('one file'))
+        for n in (1, 2):
+            self.assertEqual(lang.ngettext('one file', '{} files', n), expected.ngettext('one file', '{} files', n))
+
+    def test_misses_not_kept(self):
+
+        expected, lang = self.open_pair(os.path.join(LOCALEDIR, 'de', 'LC_MESSAGES', 'app.mo'))
+        for number in range(100):
+            lang.gettext('no such message {}'.format(number))
+        self.assertEqual(len(lang._cache), 0)
+        msgid = next(msgid for msgid in expected._catalog if msgid)
+        self.assertEqual(lang.gettext(msgid), expected.gettext(msgid))
+        self.assertEqual(len(lang._cache), 1)
+
+    def test_binary_search(self):
+
+        filename = os.path.join(LOCALEDIR, 'de', 'LC_MESSAGES', 'argparse.mo')
+        with open(filename, 'rb') as fp:
+            buf = bytearray(fp.read())
+        struct.pack_into('<I', buf, 20, 0)          # no hash table
+        with tempfile.NamedTemporaryFile(suffix='.mo', delete=False) as fp:
+            fp.write(buf)
+        self.addCleanup(os.remove, fp.name)
+        expected, lang = self.open_pair(fp.name)
+        for msgid in expected._catalog:
+            if isinstance(msgid, tuple):
+                continue
+            self.assertEqual(lang.gettext(msgid), expected.gettext(msgid))
+
+    def test_bad_magic(self):
+
+        with tempfile.NamedTemporaryFile(suffix='.mo', delete=False) as fp:
+            fp.write(b'\x00' * 28)
+        self.addCleanup(os.remove, fp.name)
+        with open(fp.name, 'rb') as f, self.assertRaises(OSError):
+            MmapTranslations(f)
@@ -0,0 +1,68 @@
+# coding:utf-8
+'''
+tests for the module msgformat
+'''
+import unittest
+import gc
+import gettext
+import os
+import subprocess
+import sys
+import msgformat
+import translations
+from msgformat import compile_template, MessageFormatterCache, format_message
+
+class Test(unittest.TestCase):
+
+    def test_compile(self):
+
+        for template, args, kwargs in (
+                ("to '{}'", ('de',), {}),
+                ("{1} {0!r} {0:>5}", ('a', 'b'), {}),
+                ("{name} has {count:d} items", (), {'name': 'x', 'count': 3}),
+                ("no fields, {{escaped}}", (), {}),
+                ("", (), {}),
+                ("{0.real}", (3,), {}),
+                ("{:{}}", ('a', 3), {}),
+                ):
+            self.assertEqual(compile_template(template)(*args, **kwargs), template.format(*args, **kwargs))
+
+    def test_errors(self):
+
+        with self.assertRaises(IndexError):
+            compile_template("{} {}")('a')
+        with self.assertRaises(ValueError):
+            compile_template("{} {0}")('a')
+        with self.assertRaises(ValueError):
+            compile_template("{")()
+
+    def test_shared_cache(self):
+
+        lang = gettext.NullTranslations()
+        self.assertEqual(translations.gettext_many([("to '{}'", ('de',)), 'plain'], lang), ["to 'de'", 'plain'])
+        self.assertIn("to '{}'", msgformat.formatters._formatters[id(lang)])
+
+    def test_import_order(self):
+
+        directory = os.path.dirname(os.path.abspath(msgformat.__file__))
+        for modules in ('msgformat, translations', 'translations, msgformat'):
+            subprocess.run([sys.executable, '-c', 'import ' + modules], cwd=directory, check=True)
+
+    def test_cache(self):
+
+        cache = MessageFormatterCache()
+        lang = gettext.NullTranslations()
+        formatter = cache.get(lang, "to '{}'")
+        self.assertIs(cache.get(lang, "to '{}'"), formatter)
+        self.assertEqual(formatter('de'), "to 'de'")
+
+        self.assertEqual(len(cache._formatters), 1)
+        del lang
+        gc.collect()
+        self.assertEqual(len(cache._formatters), 0)
+        self.assertEqual(len(cache._formatters._refs), 0)
+
+    def test_format_message(self):
+
+        with translations.using(gettext.NullTranslations()):
+            self.assertEqual(format_message("to '{}'", 'fr'), "to 'fr'")
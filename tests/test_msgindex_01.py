@@ -0,0 +1,60 @@
+# coding:utf-8
+'''
+tests for the module msgindex
+'''
+import unittest
+import importlib.util
+import os
+import tempfile
+import msgindex
+import translations
+from msgindex import MessageIndex, compile_index, read_msgids
+from translations import registry
+
+LOCALEDIR = os.path.join(os.path.dirname(msgindex.__file__), 'locale')
+PO = os.path.join(LOCALEDIR, 'de', 'LC_MESSAGES', 'app.po')
+POT = os.path.join(os.path.dirname(msgindex.__file__), 'argparse.pot')
+MSGID = "This is a test message. Translated from default language 'en' to '{}'"
+
+class Test(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.module = os.path.join(self.tmpdir.name, 'app_msgids.py')
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def load(self):
+        spec = importlib.util.spec_from_file_location('app_msgids', self.module)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        return module
+
+    def test_stable_ids(self):
+
+        compile_index([PO], self.module)
+        first = read_msgids(self.module)
+        self.assertIn(MSGID, first)
+        compile_index([POT, PO], self.module)
+        second = read_msgids(self.module)
+        self.assertEqual(second[:len(first)], first)
+        self.assertIn('usage: ', second)
+        module = self.load()
+        self.assertEqual(module.MSGIDS[module.MSG_THIS_IS_A_TEST_MESSAGE_TRANSLATED_FROM_DEFAULT], MSGID)
+
+    def test_lookup(self):
+
+        compile_index([PO], self.module)
+        module = self.load()
+        messages = MessageIndex(module.MSGIDS)
+        index = module.MSG_THIS_IS_A_TEST_MESSAGE_TRANSLATED_FROM_DEFAULT
+        de = registry.translation('app', LOCALEDIR, 'de')
+        self.assertIs(messages.table(de), messages.table(de))
+        with translations.using(de):
+            self.assertEqual(messages.gettext(index), de.gettext(MSGID))
+            self.assertEqual(messages.gettext(MSGID), de.gettext(MSGID))
+            self.assertEqual(messages.format(index, 'de'), de.gettext(MSGID).format('de'))
+            self.assertEqual(messages.format(MSGID, 'de'), de.gettext(MSGID).format('de'))
+        with translations.using(registry.fallback()):
+            self.assertEqual(messages.format(index, 'en'), MSGID.format('en'))
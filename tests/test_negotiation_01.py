@@ -0,0 +1,69 @@
+# coding:utf-8
+'''
+tests for the module negotiation
+'''
+import unittest
+import os
+import negotiation
+from negotiation import LanguageNegotiator, normalize, fallback_chain, parse_accept_language
+from translations import TranslationRegistry, registry
+
+LOCALEDIR = os.path.join(os.path.dirname(negotiation.__file__), 'locale')
+
+class Test(unittest.TestCase):
+
+    def setUp(self):
+
+        self.negotiator = LanguageNegotiator(['en', 'de', 'fr', 'es'], 'app', LOCALEDIR, 'en',
+                                             registry = TranslationRegistry())
+
+    def test_normalize(self):
+
+        self.assertEqual(normalize('pt-br'), 'pt_BR')
+        self.assertEqual(normalize('fr_CA.UTF-8'), 'fr_CA')
+        self.assertEqual(normalize('de_DE@euro'), 'de_DE')
+        self.assertEqual(normalize('ZH-hant-tw'), 'zh_Hant_TW')
+        self.assertEqual(normalize('es-419'), 'es_419')
+        self.assertEqual(fallback_chain('zh_Hant_TW'), ['zh_Hant_TW', 'zh_Hant', 'zh'])
+
+    def test_parse(self):
+
+        self.assertEqual(parse_accept_language('fr;q=0.5, de-AT, en;q=0.8, es;q=0'), ['de_AT', 'en', 'fr'])
+        self.assertEqual(parse_accept_language('pt-BR;q=0.8'), ['pt_BR'])
+        self.assertEqual(parse_accept_language('de;q=x, , fr'), ['fr'])
+        self.assertEqual(parse_accept_language('de;q=inf, it;q=nan, es;q=2, fr;q=0.5'), ['fr'])
+
+    def test_resolve(self):
+
+        self.assertEqual(self.negotiator.get_available(), ['de', 'en', 'fr'])
+        for value, expected in (
+                ('de-AT', 'de'),
+                ('fr_CA.UTF-8', 'fr'),
+                ('pt-BR;q=0.8', 'en'),
+                ('es, fr;q=0.7', 'fr'),             # no catalog of es
+                ('it, *;q=0.1', 'en'),
+                ('en-GB,de;q=0.9', 'en'),
+                ('', 'en'),
+                ):
+            self.assertEqual(self.negotiator.resolve(value), expected, value)
+
+    def test_cache(self):
+
+        self.negotiator.resolve('de-AT,de;q=0.9')
+        self.negotiator.resolve('de-AT,de;q=0.9')
+        stats = self.negotiator.get_stats()
+        self.assertEqual((stats['size'], stats['hits'], stats['misses']), (1, 1, 1))
+        negotiator = LanguageNegotiator(['en', 'de'], 'app', LOCALEDIR, registry = TranslationRegistry(), maxsize = 2)
+        for value in ('de', 'de-AT', 'de-CH'):
+            negotiator.resolve(value)
+        self.assertEqual(negotiator.get_stats()['size'], 2)
+
+    def test_cleared_by_registry(self):
+
+        shared = negotiation.negotiator(['en', 'de'], 'app', LOCALEDIR, 'en')
+        self.assertIs(negotiation.negotiator(['en', 'de'], 'app', LOCALEDIR, 'en'), shared)
+        shared.resolve('de-AT')
+        self.assertEqual(shared.get_stats()['size'], 1)
+        registry.invalidate_missing(LOCALEDIR)      # e.g. the watcher found a new catalog
+        self.assertEqual(shared.get_stats()['size'], 0)
+        self.assertEqual(shared.resolve('de-AT'), 'de')
@@ -0,0 +1,96 @@
+# coding:utf-8
+'''
+tests for the module pipeline
+'''
+import unittest
+import csv
+import json
+import os
+import tempfile
+import pipeline
+from pipeline import chunks, translate_file, translate_rows
+
+LOCALEDIR = os.path.join(os.path.dirname(pipeline.__file__), 'locale')
+LANGUAGES = ['en', 'de', 'fr']
+MSGIDS = ['create templates files', 'unknown message', '']
+
+class Test(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def rows(self, count):
+        return ({'id': str(index), 'msgid': MSGIDS[index % len(MSGIDS)]} for index in range(count))
+
+    def test_chunks(self):
+
+        self.assertEqual([len(chunk) for chunk in chunks(range(7), 3)], [3, 3, 1])
+
+    def test_translate_rows(self):
+
+        rows = list(translate_rows(self.rows(3), 'app', LOCALEDIR, LANGUAGES, chunksize = 2))
+        self.assertEqual(rows[0]['msgid_en'], 'create templates files')
+        self.assertEqual(rows[0]['msgid_de'], 'Erzeuge Vorlagen-Dateien')
+        self.assertEqual(rows[1]['msgid_de'], 'unknown message')
+        self.assertEqual(rows[2]['msgid_de'], '')
+
+    def test_pool_order(self):
+
+        expected = list(translate_rows(self.rows(100), 'app', LOCALEDIR, LANGUAGES, chunksize = 7))
+        rows = list(translate_rows(self.rows(100), 'app', LOCALEDIR, LANGUAGES, chunksize = 7, workers = 2))
+        self.assertEqual(rows, expected)
+
+    def test_files(self):
+
+        input_filename = os.path.join(self.tmpdir.name, 'input.csv')
+        with open(input_filename, 'w', newline = '') as fp:
+            writer = csv.DictWriter(fp, ['id', 'msgid'])
+            writer.writeheader()
+            writer.writerows(self.rows(5))
+
+        output_filename = os.path.join(self.tmpdir.name, 'output.csv')
+        self.assertEqual(translate_file(input_filename, output_filename, 'app', LOCALEDIR, LANGUAGES), 5)
+        with open(output_filename, newline = '', encoding = 'utf-8') as fp:
+            reader = csv.DictReader(fp)
+            self.assertEqual(reader.fieldnames, ['id', 'msgid', 'msgid_en', 'msgid_de', 'msgid_fr'])
+            self.assertEqual(len(list(reader)), 5)
+
+        jsonl_filename = os.path.join(self.tmpdir.name, 'output.jsonl')
+        self.assertEqual(translate_file(output_filename, jsonl_filename, 'app', LOCALEDIR, ['de'], field = 'msgid_en'), 5)
+        with open(jsonl_filename, encoding = 'utf-8') as fp:
+            first = json.loads(fp.readline())
+        self.assertEqual(first['msgid_en_de'], 'Erzeuge Vorlagen-Dateien')
+
+        with self.assertRaises(ValueError):
+            translate_file(input_filename, os.path.join(self.tmpdir.name, 'output.txt'), 'app', LOCALEDIR, LANGUAGES)
+
+    def test_invalid_rows(self):
+
+        output_filename = os.path.join(self.tmpdir.name, 'output.jsonl')
+        for lines, line in (
+                (['{"msgid": "a"}', '', '["a"]'], 3),
+                (['{"msgid": "a"}', '{"msgid": 1}'], 2),
+                (['{"msgid": '], 1),
+                ):
+            input_filename = os.path.join(self.tmpdir.name, 'input.jsonl')
+            with open(input_filename, 'w', encoding = 'utf-8') as fp:
+                fp.write('\n'.join(lines) + '\n')
+            with self.assertRaisesRegex(ValueError, 'line {}:'.format(line)):
+                translate_file(input_filename, output_filename, 'app', LOCALEDIR, LANGUAGES)
+
+        input_filename = os.path.join(self.tmpdir.name, 'input.csv')
+        with open(input_filename, 'w', newline = '') as fp:
+            fp.write('id,msgid\r\n1,a\r\n2,b,c\r\n')
+        with self.assertRaisesRegex(ValueError, 'line 3:'):
+            translate_file(input_filename, output_filename, 'app', LOCALEDIR, LANGUAGES)
+
+    def test_extra_keys(self):
+
+        input_filename = os.path.join(self.tmpdir.name, 'input.jsonl')
+        with open(input_filename, 'w', encoding = 'utf-8') as fp:
+            fp.write('{"msgid": "a"}\n{"msgid": "b", "note": "x"}\n')
+        with self.assertRaisesRegex(ValueError, 'row 2: note'):
+            translate_file(input_filename, os.path.join(self.tmpdir.name, 'output.csv'), 'app', LOCALEDIR, LANGUAGES)
@@ -0,0 +1,63 @@
+# coding:utf-8
+'''
+tests for the module plurals
+'''
+import unittest
+import gettext
+import plurals
+import warnings
+from plurals import plural_function, from_plural_forms, PluralTranslations
+
+LOCALEDIR = 'locale'
+
+class Test(unittest.TestCase):
+
+    def test_families(self):
+
+        for expression, function in (
+                ('(n != 1)', plurals.germanic),
+                ('n>1', plurals.romance),
+                ('(n%10==1 && n%100!=11 ? 0 : n%10>=2 && n%10<=4 && (n%100<10 || n%100>=20) ? 1 : 2)', plurals.slavic),
+                ('n==1 ? 0 : n%10>=2 && n%10<=4 && (n%100<10 || n%100>=20) ? 1 : 2', plurals.polish),
+                ('0', plurals.single),
+                ):
+            self.assertIs(plural_function(expression), function)
+            expected = gettext.c2py(expression)
+            for n in range(0, 250):
+                self.assertEqual(function(n), expected(n), (expression, n))
+
+    def test_shared(self):
+
+        expression = 'n==0 ? 0 : n==1 ? 1 : 2'
+        self.assertIs(plural_function(expression), plural_function('(n == 0 ? 0 : n == 1 ? 1 : 2)'))
+        self.assertEqual([plural_function(expression)(n) for n in range(3)], [0, 1, 2])
+
+    def test_plural_forms(self):
+
+        self.assertIs(from_plural_forms('nplurals=2; plural=(n > 1);'), plurals.romance)
+        with self.assertRaises(ValueError):
+            from_plural_forms('nplurals=2;')
+        with self.assertRaises(ValueError):
+            plural_function('n +')
+
+    def test_plural_translations(self):
+
+        mofile = gettext.find('app', LOCALEDIR, ['de'])
+        with open(mofile, 'rb') as fp:
+            lang = PluralTranslations(fp)
+        with open(mofile, 'rb') as fp:
+            expected = gettext.GNUTranslations(fp)
+        self.assertEqual(lang._catalog, expected._catalog)
+        self.assertEqual(lang.info(), expected.info())
+        self.assertEqual(lang.charset(), expected.charset())
+        self.assertIs(lang.plural, plurals.germanic)
+
+    def test_type_check(self):
+
+        for function in (plurals.germanic, plurals.romance, plurals.slavic, plurals.polish, plurals.single):
+            with self.assertRaises(TypeError):
+                function('1')
+            with warnings.catch_warnings():
+                warnings.simplefilter('error')
+                with self.assertRaises(DeprecationWarning):
+                    function(1.5)
@@ -0,0 +1,113 @@
+# coding:utf-8
+'''
+tests for the module pocompiler
+'''
+import unittest
+import os
+import shutil
+import tempfile
+import gettext
+import pocompiler
+from motranslations import MmapTranslations
+
+LOCALEDIR = os.path.join(os.path.dirname(pocompiler.__file__), 'locale')
+
+PO = '''# comment
+msgid ""
+msgstr ""
+"Content-Type: text/plain; charset=UTF-8\\n"
+"Plural-Forms: nplurals=2; plural=(n != 1);\\n"
+
+#: app.py:1
+msgid "multi"
+"line"
+msgstr "mehr"
+"zeilig\\n"
+
+msgctxt "menu"
+msgid "File"
+msgstr "Datei"
+
+msgid "one file"
+msgid_plural "{} files"
+msgstr[0] "eine Datei"
+msgstr[1] "{} Dateien"
+
+#, fuzzy
+msgid "fuzzy"
+msgstr "unscharf"
+
+msgid "untranslated"
+msgstr ""
+
+#~ msgid "obsolete"
+#~ msgstr "veraltet"
+'''
+
+class Test(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.po = os.path.join(self.tmpdir.name, 'test.po')
+        with open(self.po, 'w', encoding='utf-8') as fp:
+            fp.write(PO)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_parse(self):
+
+        entries = pocompiler.read_po(self.po)
+        self.assertEqual([entry.msgid for entry in entries],
+                         [b'', b'multiline', b'File', b'one file', b'fuzzy', b'untranslated', b'obsolete'])
+        self.assertEqual(entries[1].msgstr, {0: b'mehrzeilig\n'})
+        self.assertEqual(entries[2].msgctxt, b'menu')
+        self.assertEqual(entries[3].msgid_plural, b'{} files')
+        self.assertEqual(entries[3].get_msgstrs(), [b'eine Datei', b'{} Dateien'])
+        self.assertTrue(entries[4].is_fuzzy())
+        self.assertFalse(entries[5].is_translated())
+        self.assertTrue(entries[6].obsolete)
+
+    def test_syntax_error(self):
+
+        with self.assertRaises(pocompiler.PoSyntaxError):
+            list(pocompiler.parse_po([b'msgid "a"', b'bogus "b"']))
+
+    def test_compile(self):
+
+        mo = pocompiler.compile_po(self.po)
+        for class_ in (gettext.GNUTranslations, MmapTranslations):
+            with open(mo, 'rb') as fp:
+                lang = class_(fp)
+            self.assertEqual(lang.gettext('multiline'), 'mehrzeilig\n')
+            self.assertEqual(lang.pgettext('menu', 'File'), 'Datei')
+            self.assertEqual(lang.ngettext('one file', '{} files', 1), 'eine Datei')
+            self.assertEqual(lang.ngettext('one file', '{} files', 2), '{} Dateien')
+            self.assertEqual(lang.gettext('fuzzy'), 'fuzzy')
+            self.assertEqual(lang.gettext('obsolete'), 'obsolete')
+
+    def test_same_as_shipped(self):
+
+        for po in pocompiler.find_po(LOCALEDIR):
+            mo = pocompiler.compile_po(po, os.path.join(self.tmpdir.name, 'compiled.mo'))
+            with open(mo, 'rb') as fp:
+                compiled = gettext.GNUTranslations(fp)
+            with open(os.path.splitext(po)[0] + '.mo', 'rb') as fp:
+                shipped = gettext.GNUTranslations(fp)
+            self.assertEqual(compiled._catalog, shipped._catalog, po)
+
+    def test_compile_tree(self):
+
+        localedir = os.path.join(self.tmpdir.name, 'locale')
+        for language in ('de', 'fr'):
+            os.makedirs(os.path.join(localedir, language, 'LC_MESSAGES'))
+            shutil.copy(self.po, os.path.join(localedir, language, 'LC_MESSAGES', 'app.po'))
+        for mode in (pocompiler.MODE_MTIME, pocompiler.MODE_HASH):
+            result = pocompiler.compile_tree(localedir, workers=2, mode=mode, force=True)
+            self.assertEqual(set(result.values()), {'compiled'})
+            result = pocompiler.compile_tree(localedir, workers=0, mode=mode)
+            self.assertEqual(set(result.values()), {'unchanged'})
+        with open(os.path.join(localedir, 'de', 'LC_MESSAGES', 'app.po'), 'a') as fp:
+            fp.write('\nmsgid "new"\nmsgstr "neu"\n')
+        result = pocompiler.compile_tree(localedir, workers=0, mode=pocompiler.MODE_HASH)
+        self.assertEqual(sorted(result.values()), ['compiled', 'unchanged'])
@@ -0,0 +1,236 @@
+# coding:utf-8
+'''
+tests for the module translations
+'''
+import unittest
+import argparse
+import asyncio
+import gettext
+import os
+import shutil
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import plurals
+import translations
+from translations import TranslationRegistry
+
+LOCALEDIR = os.path.join(os.path.dirname(translations.__file__), 'locale')
+
+class Test(unittest.TestCase):
+
+    def setUp(self):
+        self.registry = TranslationRegistry(maxsize=2)
+        self.token = translations.activate(gettext.NullTranslations())
+
+    def tearDown(self):
+        translations.deactivate(self.token)
+        self.registry = None
+
+    def test_cache_hit(self):
+
+        lang1 = self.registry.translation('app', localedir=LOCALEDIR, language='de')
+        lang2 = self.registry.translation('app', localedir=LOCALEDIR, language='de')
+        self.assertIs(lang1, lang2)
+        stats = self.registry.get_stats()
+        self.assertEqual(stats['misses'], 1)
+        self.assertEqual(stats['hits'], 1)
+
+    def test_translation(self):
+
+        lang = self.registry.translation('app', localedir=LOCALEDIR, language='de')
+        self.assertEqual(lang.gettext("This is a test message. Translated from default language 'en' to '{}'"),
+                         "Dieses ist eine Test-Meldung. Übersetzt aus der Vorgabe-Sprache 'en' nach '{}'")
+
+    def test_eviction(self):
+
+        lang_de = self.registry.translation('app', localedir=LOCALEDIR, language='de')
+        self.registry.translation('app', localedir=LOCALEDIR, language='fr')
+        self.registry.translation('argparse', localedir=LOCALEDIR, language='de')
+        stats = self.registry.get_stats()
+        self.assertEqual(stats['size'], 2)
+        self.assertEqual(stats['evictions'], 1)
+        self.assertIsNot(lang_de, self.registry.translation('app', localedir=LOCALEDIR, language='de'))
+
+    def test_missing(self):
+
+        with self.assertRaises(FileNotFoundError) as cm:
+            self.registry.translation('app', localedir=LOCALEDIR, language='es')
+        self.assertEqual(str(cm.exception), "[Errno 2] No translation file found for domain: 'app'")
+
+    def test_missing_cached(self):
+
+        for _ in range(3):
+            with self.assertRaises(FileNotFoundError):
+                self.registry.translation('app', localedir=LOCALEDIR, language='es')
+        stats = self.registry.get_stats()
+        self.assertEqual(stats['misses'], 1)
+        self.assertEqual(stats['negative_hits'], 2)
+
+    def test_missing_invalidated_by_new_catalog(self):
+
+        with tempfile.TemporaryDirectory() as localedir:
+            self.registry = TranslationRegistry(negative_ttl=0)
+            with self.assertRaises(FileNotFoundError):
+                self.registry.translation('app', localedir=localedir, language='de')
+            lc_messages = os.path.join(localedir, 'de', 'LC_MESSAGES')
+            os.makedirs(lc_messages)
+            shutil.copy(os.path.join(LOCALEDIR, 'de', 'LC_MESSAGES', 'app.mo'), lc_messages)
+            lang = self.registry.translation('app', localedir=localedir, language='de')
+            self.assertNotEqual(lang.gettext("This is a test message. Translated from default language 'en' to '{}'"),
+                                "This is a test message. Translated from default language 'en' to '{}'")
+
+    def test_context_local(self):
+
+        msgid = "This is a test message. Translated from default language 'en' to '{}'"
+        lang_de = self.registry.translation('app', localedir=LOCALEDIR, language='de')
+        lang_fr = self.registry.translation('app', localedir=LOCALEDIR, language='fr')
+        results = {}
+
+        def run(name, lang):
+            translations.activate(lang)
+            barrier.wait()
+            results[name] = translations.gettext(msgid)
+
+        barrier = threading.Barrier(2)
+        threads = [threading.Thread(target=run, args=('de', lang_de)), threading.Thread(target=run, args=('fr', lang_fr))]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(results['de'], lang_de.gettext(msgid))
+        self.assertEqual(results['fr'], lang_fr.gettext(msgid))
+        self.assertEqual(translations.gettext(msgid), msgid)
+
+    def test_using(self):
+
+        msgid = "This is a test message. Translated from default language 'en' to '{}'"
+        lang_de = self.registry.translation('app', localedir=LOCALEDIR, language='de')
+        with translations.using(lang_de):
+            self.assertEqual(translations.gettext(msgid), lang_de.gettext(msgid))
+        self.assertEqual(translations.gettext(msgid), msgid)
+
+    def test_preload(self):
+
+        self.registry = TranslationRegistry()
+        report = self.registry.preload(['app', 'argparse'], LOCALEDIR, ['en', 'de', 'fr'], workers=2)
+        status = {(entry['domain'], entry['language']): entry['status'] for entry in report}
+        self.assertEqual(status[('app', 'de')], 'ok')
+        self.assertEqual(status[('argparse', 'de')], 'ok')
+        self.assertEqual(status[('app', 'en')], 'missing')
+        self.assertEqual(status[('argparse', 'fr')], 'missing')
+        self.registry.translation('app', localedir=LOCALEDIR, language='fr')
+        self.assertEqual(self.registry.get_stats()['hits'], 1)
+
+    def test_translate_many(self):
+
+        msgid = "This is a test message. Translated from default language 'en' to '{}'"
+        lang_de = self.registry.translation('app', localedir=LOCALEDIR, language='de')
+        result = self.registry.translate_many('app', LOCALEDIR, 'de', [msgid, (msgid, ('de',)), 'unknown'])
+        self.assertEqual(result, [lang_de.gettext(msgid), lang_de.gettext(msgid).format('de'), 'unknown'])
+        result = self.registry.translate_many('app', LOCALEDIR, 'es', [(msgid, ('es',))])
+        self.assertEqual(result, [msgid.format('es')])
+
+    def test_translate_languages(self):
+
+        msgid = "This is a test message. Translated from default language 'en' to '{}'"
+        result = self.registry.translate_languages('app', LOCALEDIR, ['en', 'de', 'fr'], msgid)
+        self.assertEqual(result['en'], msgid)
+        self.assertEqual(result['de'], self.registry.translation('app', localedir=LOCALEDIR, language='de').gettext(msgid))
+        self.assertEqual(result['fr'], self.registry.translation('app', localedir=LOCALEDIR, language='fr').gettext(msgid))
+
+    def test_plural_shared(self):
+
+        lang_fr = self.registry.translation('app', localedir=LOCALEDIR, language='fr')
+        self.assertIs(lang_fr.plural, plurals.romance)
+        self.assertEqual(lang_fr.plural(0), 0)
+        with translations.using(lang_fr):
+            self.assertEqual(translations.ngettext('one file', '{} files', 2), '{} files')
+
+    def test_domain_set(self):
+
+        self.registry = TranslationRegistry()
+        domain_set = self.registry.domain_set(('app', 'argparse'), LOCALEDIR, 'de')
+        self.assertIs(self.registry.domain_set(('app', 'argparse'), LOCALEDIR, 'de'), domain_set)
+        self.assertEqual(domain_set.dgettext('argparse', 'usage: '), 'Starten mit:')
+        self.assertEqual(domain_set.gettext('create templates files'), 'Erzeuge Vorlagen-Dateien')
+        domain_set = self.registry.domain_set(('app', 'argparse'), LOCALEDIR, 'fr')
+        self.assertEqual(domain_set.dgettext('argparse', 'usage: '), 'usage: ')
+
+    def test_domain_sets_bounded(self):
+
+        for language in ('de', 'fr', 'es'):
+            self.registry.domain_set(('app', 'argparse'), LOCALEDIR, language)
+        self.assertEqual(len(self.registry._domain_sets), 2)
+
+    def test_argparse_hooked(self):
+
+        translations.unhook_argparse()
+        original = argparse._
+        domain_set = self.registry.domain_set(('app', 'argparse'), LOCALEDIR, 'de')
+        with translations.argparse_hooked():
+            self.assertIsNot(argparse._, original)
+            with translations.using(domain_set):
+                self.assertEqual(argparse._('usage: '), 'Starten mit:')
+        self.assertIs(argparse._, original)
+        self.assertTrue(translations.hook_argparse())
+        self.assertFalse(translations.hook_argparse())
+        with translations.argparse_hooked():
+            pass
+        self.assertIsNot(argparse._, original)      # hooked before the with-block: stays hooked
+        translations.unhook_argparse()
+        self.assertIs(argparse._, original)
+
+    def test_get_async(self):
+
+        async def main():
+            langs = await asyncio.gather(*[self.registry.get('app', LOCALEDIR, 'de') for _ in range(10)])
+            self.assertEqual(self.registry.get_stats()['misses'], 1)
+            self.assertTrue(all(lang is langs[0] for lang in langs))
+            self.assertIs(await self.registry.get('app', LOCALEDIR, 'de'), langs[0])
+            self.assertIs(await self.registry.get('app', LOCALEDIR, 'es', fallback = True), self.registry.fallback())
+            with self.assertRaises(FileNotFoundError):
+                await self.registry.get('app', LOCALEDIR, 'es')
+
+        asyncio.run(main())
+
+    def test_get_async_missing(self):
+
+        class Executor(ThreadPoolExecutor):
+            calls = 0
+
+            def submit(self, *args, **kwargs):
+                Executor.calls += 1
+                return super().submit(*args, **kwargs)
+
+        async def main():
+            with Executor(max_workers = 1) as executor:
+                for _ in range(5):
+                    lang = await self.registry.get('app', LOCALEDIR, 'es', fallback = True, executor = executor)
+                    self.assertIs(lang, self.registry.fallback())
+                self.assertEqual(Executor.calls, 1)
+                lang = await self.registry.get_chain('app', LOCALEDIR, ['es', 'de'], executor = executor)
+                self.assertEqual(lang.gettext('create templates files'), 'Erzeuge Vorlagen-Dateien')
+                self.assertEqual(Executor.calls, 2)
+                self.registry._missing[('app', LOCALEDIR, 'es')] = (0, ())     # TTL expired
+                await self.registry.get_chain('app', LOCALEDIR, ['es', 'de'], executor = executor)
+                self.assertEqual(Executor.calls, 3)
+
+        asyncio.run(main())
+
+    def test_task_context(self):
+
+        msgid = 'create templates files'
+        registry = translations.registry
+
+        async def task(language, expected):
+            await translations.activate_language('app', LOCALEDIR, language)
+            await asyncio.sleep(0)
+            self.assertEqual(translations.gettext(msgid), expected)
+            self.assertIs(translations.get_translation(), await registry.get('app', LOCALEDIR, language, fallback = True))
+
+        async def main():
+            await asyncio.gather(task('de', 'Erzeuge Vorlagen-Dateien'), task('es', msgid), task('de', 'Erzeuge Vorlagen-Dateien'))
+
+        asyncio.run(main())
+        self.assertIsInstance(translations.get_translation(), gettext.NullTranslations)
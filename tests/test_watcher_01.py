@@ -0,0 +1,64 @@
+# coding:utf-8
+'''
+tests for the module watcher
+'''
+import unittest
+import os
+import shutil
+import tempfile
+import watcher
+from translations import TranslationRegistry
+from watcher import CatalogWatcher
+
+LOCALEDIR = os.path.join(os.path.dirname(watcher.__file__), 'locale')
+MSGID = "This is a test message. Translated from default language 'en' to '{}'"
+
+class Test(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.localedir = self.tmpdir.name
+        self.lc_messages = os.path.join(self.localedir, 'de', 'LC_MESSAGES')
+        os.makedirs(self.lc_messages)
+        self.install('de')
+        self.registry = TranslationRegistry()
+        self.watcher = CatalogWatcher(self.registry, self.localedir)
+
+    def tearDown(self):
+        self.watcher.stop()
+        self.tmpdir.cleanup()
+
+    def install(self, language, mtime=None):
+        source = os.path.join(LOCALEDIR, language, 'LC_MESSAGES', 'app.mo')
+        target = os.path.join(self.lc_messages, 'app.mo')
+        shutil.copy(source, target + '.tmp')
+        os.replace(target + '.tmp', target)
+        if mtime is not None:
+            os.utime(target, ns=(mtime, mtime))
+
+    def test_reload(self):
+
+        lang = self.registry.translation('app', localedir=self.localedir, language='de')
+        german = lang.gettext(MSGID)
+        self.install('fr', mtime=1)
+        self.assertEqual(self.watcher.check(), [os.path.join(self.lc_messages, 'app.mo')])
+        reloaded = self.registry.translation('app', localedir=self.localedir, language='de')
+        self.assertIsNot(reloaded, lang)
+        self.assertNotEqual(reloaded.gettext(MSGID), german)
+        self.assertEqual(lang.gettext(MSGID), german)
+        self.assertEqual(self.watcher.check(), [])
+
+    def test_removed(self):
+
+        self.registry.translation('app', localedir=self.localedir, language='de')
+        os.remove(os.path.join(self.lc_messages, 'app.mo'))
+        self.watcher.check()
+        self.assertEqual(self.registry.get_keys(), [])
+
+    def test_new_catalog(self):
+
+        with self.assertRaises(FileNotFoundError):
+            self.registry.translation('argparse', localedir=self.localedir, language='de')
+        shutil.copy(os.path.join(LOCALEDIR, 'de', 'LC_MESSAGES', 'argparse.mo'), self.lc_messages)
+        self.watcher.check()
+        self.registry.translation('argparse', localedir=self.localedir, language='de')
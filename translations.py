@@ -0,0 +1,827 @@
+# coding:utf-8
+"""
+Process-wide registry of gettext translation catalogs.
+
+gettext.translation() searches the locale tree, opens and parses the
+compiled translation file and builds a new catalog on each call.
+As the apps switch the language per run (resp. per request), this cost
+would be paid on every switch.
+
+The registry loads each catalog once and keeps it in a bounded LRU
+keyed on
+
+:domain: e.g. 'app' or 'argparse'
+:localedir: the locale directory as passed by the caller
+:language: the code of the language
+
+So, once a catalog is loaded, switching the language is a dictionary lookup.
+
+Languages without catalog (e.g. the default language 'en' or 'es') are
+remembered as well for NEGATIVE_TTL_DEFAULT seconds, so unsupported
+languages cost a dictionary lookup instead of probing the locale tree.
+After the TTL, the locale tree is checked for changes (i.e. new
+<language>/LC_MESSAGES directories or .mo files); only then the missing
+languages of this locale tree are probed again.
+
+If a bundle (see module bundle) is added for a locale directory,
+the catalogs are taken from the bundle instead of the .mo files.
+
+If an instrumentation (see module instrumentation) is enabled,
+the registry records loads and missing languages and returns
+catalogs counting their lookups.
+
+Usage:
+::
+
+    from translations import registry
+
+    lang = registry.translation('app', localedir='locale', language='de')
+    lang.install()
+
+Context-local translation
+-------------------------
+
+lang.install() binds _() in the builtin namespace, i.e. for the whole process.
+So, concurrent runs in different languages would step on each other.
+
+Instead, a catalog can be activated for the current context only
+(the current thread resp. the current asyncio task) and looked up by
+the module functions gettext()/ngettext():
+::
+
+    import translations
+
+    translations.activate(registry.translation('app', localedir='locale', language='de'))
+    print(translations.gettext('This is a test message...'))
+
+    with translations.using(registry.translation('app', localedir='locale', language='fr')):
+        print(translations.gettext('This is a test message...'))
+
+lang.install() remains available as legacy mode.
+
+asyncio
+-------
+
+registry.translation() reads the catalog file on first request, i.e. it
+would block the event loop. TranslationRegistry.get() loads the catalog in
+an executor instead, concurrent requests of one catalog share the load:
+::
+
+    lang = await registry.get('app', localedir='locale', language='de')
+    token = await translations.activate_language('app', 'locale', 'de')    # for the current task
+
+Once loaded, the catalogs are used synchronously as before.
+
+Several domains
+---------------
+
+A DomainSet holds the catalogs of several domains (e.g. 'app' and 'argparse')
+of one language. Activated for the current context, gettext()/ngettext()
+translate by its default domain and, after hook_argparse(), argparse translates
+its messages by its domain 'argparse' - without the global gettext domain and
+without environment variables (LC_MESSAGES):
+::
+
+    translations.hook_argparse()
+    translations.activate(registry.domain_set(('app', 'argparse'), 'locale', 'de'))
+
+hook_argparse() patches the module argparse process-wide until
+unhook_argparse(); argparse_hooked() limits it to a with-block:
+::
+
+    with translations.argparse_hooked():
+        parser.parse_args()
+
+Fallback chains
+---------------
+
+TranslationRegistry.chain() returns the catalog of a fallback chain
+(e.g. de_CH -> de), merged into one flat table (see module fallbacks):
+::
+
+    lang = registry.chain('app', 'locale', ['de_CH', 'de'])
+
+Batch translation
+-----------------
+
+gettext_many() translates a list of messages by one catalog resolution,
+TranslationRegistry.translate_languages() translates one message into
+several languages (e.g. Config.LANGUAGES) by one call.
+
+"""
+import argparse
+import asyncio
+import contextvars
+import errno
+import gettext as _gettext
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import msgformat                                    # imports this module: its attributes are used on call only
+from fallbacks import FlatTranslations
+from plurals import PluralTranslations
+from contextlib import contextmanager
+
+
+class TranslationRegistry:
+    """
+    Bounded LRU of loaded translation catalogs with hit/miss counters
+    """
+
+    MAXSIZE_DEFAULT = 128
+    NEGATIVE_TTL_DEFAULT = 30.0
+
+    def __init__(self, maxsize = MAXSIZE_DEFAULT, class_ = PluralTranslations,
+                 negative_ttl = NEGATIVE_TTL_DEFAULT):
+        self._maxsize = maxsize
+        self._class = class_
+        self._negative_ttl = negative_ttl
+        self._catalogs = OrderedDict()
+        self._missing = {}                          # key -> (expiry, signature of locale tree)
+        self._null = _gettext.NullTranslations()
+        self._bundles = {}
+        self._superseded = set()                    # keys whose bundle catalog is replaced by the .mo file
+        self._instrumentation = None
+        self._domain_sets = OrderedDict()           # LRU, at most maxsize
+        self._chains = {}
+        self._loading = {}                          # (event loop, key) -> future of the load in progress
+        self._listeners = []
+        self._lock = threading.RLock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._negative_hits = 0
+
+    def translation(self, domain, localedir = None, language = None, fallback = False):
+        """
+        return the catalog of domain/language, load it on first request
+
+        raises FileNotFoundError (like gettext.translation) if no catalog exists
+        resp. returns the catalog of the default language if fallback is set
+        """
+        if fallback:
+            try:
+                return self.translation(domain, localedir, language)
+            except FileNotFoundError:
+                return self._fallback(domain, language)
+
+        key = (domain, localedir, language)
+        with self._lock:
+            lang = self._catalogs.get(key)
+            if lang is not None:
+                self._catalogs.move_to_end(key)
+                self._hits += 1
+                return lang
+            missing = self._missing.get(key)
+            if missing is not None and self._is_missing(key, missing):
+                self._negative_hits += 1
+                if self._instrumentation is not None:
+                    self._instrumentation.record_missing(domain, language)
+                raise self._not_found(domain)
+            self._misses += 1
+
+        instrumentation = self._instrumentation
+        start = time.perf_counter()
+        try:
+            lang = self._load(domain, localedir, language)
+        except FileNotFoundError:
+            signature = self._signature(localedir)
+            with self._lock:
+                self._missing[key] = (time.monotonic() + self._negative_ttl, signature)
+            if instrumentation is not None:
+                instrumentation.record_missing(domain, language)
+            raise
+        if instrumentation is not None:
+            instrumentation.record_load(domain, language, time.perf_counter() - start)
+            lang = instrumentation.wrap(domain, language, lang)
+
+        with self._lock:
+            self._catalogs[key] = lang
+            self._catalogs.move_to_end(key)
+            while len(self._catalogs) > self._maxsize:
+                self._catalogs.popitem(last = False)
+                self._evictions += 1
+        return lang
+
+    async def get(self, domain, localedir = None, language = None, fallback = False, executor = None):
+        """
+        asyncio version of translation(): a catalog not yet loaded is loaded in executor
+        (default: the executor of the event loop), so the event loop is not blocked by file I/O
+
+        concurrent requests of the same catalog share one load,
+        a language known to be missing (within the TTL) is answered without executor
+        """
+        key = (domain, localedir, language)
+        with self._lock:
+            lang = self._catalogs.get(key)
+            if lang is not None:
+                self._catalogs.move_to_end(key)
+                self._hits += 1
+                return lang
+            missing = self._missing.get(key)
+            if missing is not None and time.monotonic() < missing[0]:
+                self._negative_hits += 1
+                if self._instrumentation is not None:
+                    self._instrumentation.record_missing(domain, language)
+                if fallback:
+                    return self._fallback(domain, language)
+                raise self._not_found(domain)
+
+        loop = asyncio.get_running_loop()
+        loading_key = (loop, key)
+        with self._lock:
+            future = self._loading.get(loading_key)
+            if future is None:
+                future = self._loading[loading_key] = loop.run_in_executor(
+                    executor, self.translation, domain, localedir, language)
+                future.add_done_callback(lambda future: self._loading.pop(loading_key, None))
+        try:
+            return await asyncio.shield(future)     # a cancelled request does not cancel the shared load
+        except FileNotFoundError:
+            if fallback:
+                return self._fallback(domain, language)
+            raise
+
+    async def get_chain(self, domain, localedir, languages, executor = None):
+        """
+        asyncio version of chain(): the catalogs are loaded by get(), then merged
+
+        if a catalog is neither loaded nor known to be missing (e.g. the TTL expired meanwhile),
+        chain() runs in executor, as it may access the locale tree
+        """
+        for language in languages:
+            try:
+                await self.get(domain, localedir, language, executor = executor)
+            except FileNotFoundError:
+                continue
+        if self._is_cached(domain, localedir, languages):
+            return self.chain(domain, localedir, languages)
+        return await asyncio.get_running_loop().run_in_executor(executor, self.chain, domain, localedir, languages)
+
+    def _is_cached(self, domain, localedir, languages):
+        """
+        check that the catalogs of languages are loaded resp. missing within the TTL (i.e. chain() needs no I/O)
+        """
+        now = time.monotonic()
+        with self._lock:
+            for language in languages:
+                key = (domain, localedir, language)
+                if key in self._catalogs:
+                    continue
+                missing = self._missing.get(key)
+                if missing is None or now >= missing[0]:
+                    return False
+        return True
+
+    def _load(self, domain, localedir, language):
+        """
+        find and parse the catalog file resp. take it from the bundle of localedir
+        """
+        bundle = self._bundles.get(localedir)
+        if (bundle is not None and language is not None and bundle.has_translation(domain, language)
+                and (domain, localedir, language) not in self._superseded):
+            return bundle.translation(domain, language)
+        languages = None if language is None else [language]
+        mofile = _gettext.find(domain, localedir, languages)
+        if mofile is None:
+            raise self._not_found(domain)
+        with open(mofile, 'rb') as fp:
+            return self._class(fp)                  # the default class shares the plural functions (see plurals)
+
+    @staticmethod
+    def _not_found(domain):
+        return FileNotFoundError(errno.ENOENT, 'No translation file found for domain', domain)
+
+    def _is_missing(self, key, missing):
+        """
+        check a negative entry, called with lock held
+
+        within the TTL the entry is valid as is,
+        after the TTL it is extended as long as the locale tree is unchanged
+        """
+        expiry, signature = missing
+        now = time.monotonic()
+        if now < expiry:
+            return True
+        if self._signature(key[1]) == signature:
+            self._missing[key] = (now + self._negative_ttl, signature)
+            return True
+        self.invalidate_missing(key[1])
+        return False
+
+    @staticmethod
+    def _signature(localedir):
+        """
+        modification times of the locale tree
+
+        a new language directory changes the mtime of localedir,
+        a new .mo file changes the mtime of its LC_MESSAGES directory
+        """
+        if localedir is None:
+            localedir = _gettext._default_localedir
+        signature = []
+        try:
+            signature.append(os.stat(localedir).st_mtime_ns)
+            with os.scandir(localedir) as entries:
+                for entry in entries:
+                    try:
+                        signature.append(os.stat(os.path.join(entry.path, 'LC_MESSAGES')).st_mtime_ns)
+                    except OSError:
+                        pass
+        except OSError:
+            pass
+        return tuple(signature)
+
+    def domain_set(self, domains, localedir, language):
+        """
+        return the DomainSet of domains (the first one is the default domain) of language
+
+        missing catalogs are replaced by the default language (no translation)
+        """
+        domains = tuple(domains)
+        catalogs = tuple(self.translation(domain, localedir, language, fallback = True) for domain in domains)
+        key = (domains, localedir, language)
+        with self._lock:
+            domain_set = self._domain_sets.get(key)
+            if domain_set is None or domain_set.get_catalogs() != catalogs:
+                domain_set = self._domain_sets[key] = DomainSet(dict(zip(domains, catalogs)), domains[0], language)
+            self._domain_sets.move_to_end(key)
+            while len(self._domain_sets) > self._maxsize:
+                self._domain_sets.popitem(last = False)
+        return domain_set
+
+    def chain(self, domain, localedir, languages):
+        """
+        return the catalog of the fallback chain languages (most specific first),
+        i.e. a message is translated by the first catalog containing it
+
+        the catalogs are merged into one flat table (see module fallbacks),
+        languages without catalog are skipped
+        raises FileNotFoundError if no catalog of languages exists
+        """
+        found = []
+        catalogs = []
+        for language in languages:
+            try:
+                catalogs.append(self.translation(domain, localedir, language))
+            except FileNotFoundError:
+                continue
+            found.append(language)
+        if not catalogs:
+            raise self._not_found(domain)
+        if len(catalogs) == 1:
+            return catalogs[0]
+        return self._flatten(domain, localedir, tuple(found), tuple(catalogs))
+
+    def _flatten(self, domain, localedir, languages, catalogs):
+        """
+        return the flat catalog of catalogs, built from the flat catalog of its tail
+        """
+        key = (domain, localedir, languages)
+        with self._lock:
+            lang = self._chains.get(key)
+        if lang is None or lang.get_catalogs() != catalogs:     # new resp. a catalog was reloaded
+            tail = None
+            if len(catalogs) > 2:
+                tail = self._flatten(domain, localedir, languages[1:], catalogs[1:])
+            lang = FlatTranslations(catalogs, tail)
+            instrumentation = self._instrumentation
+            if instrumentation is not None:         # lookups of the chain count for its first language
+                lang = instrumentation.wrap(domain, languages[0], lang)
+            with self._lock:
+                self._chains[key] = lang
+        return lang
+
+    def translate_many(self, domain, localedir, language, messages):
+        """
+        translate all messages (see gettext_many) by the catalog of domain/language
+        """
+        return gettext_many(messages, self.translation(domain, localedir, language, fallback = True))
+
+    def translate_languages(self, domain, localedir, languages, message):
+        """
+        translate message into each of languages
+
+        returns a dict language -> translation
+        """
+        return {
+            language: self.translation(domain, localedir, language, fallback = True).gettext(message)
+            for language in languages
+            }
+
+    def preload(self, domains, localedir, languages, workers = 0):
+        """
+        load the catalogs of all domains/languages ahead of the first request
+
+        workers > 0 loads them in a thread pool
+        maxsize is raised to the number of catalogs if smaller, so the preload does not evict itself
+        returns a report per catalog as list of dicts (domain, language, seconds, status),
+        status is 'ok', 'missing' or the error message
+        """
+        def load(domain, language):
+            start = time.perf_counter()
+            try:
+                self.translation(domain, localedir, language)
+                status = 'ok'
+            except FileNotFoundError:
+                status = 'missing'
+            except (OSError, UnicodeDecodeError, ValueError) as e:
+                status = str(e)
+            return {
+                'domain': domain,
+                'language': language,
+                'seconds': time.perf_counter() - start,
+                'status': status,
+                }
+
+        jobs = [(domain, language) for domain in domains for language in languages]
+        if len(jobs) > self._maxsize:
+            self.set_maxsize(len(jobs))
+        if workers > 0:
+            with ThreadPoolExecutor(max_workers = workers) as executor:
+                return list(executor.map(lambda job: load(*job), jobs))
+        return [load(*job) for job in jobs]
+
+    def enable_instrumentation(self, instrumentation):
+        """
+        record loads/lookups into instrumentation, drops the loaded catalogs
+        """
+        with self._lock:
+            self._instrumentation = instrumentation
+            self._catalogs.clear()
+            self._chains.clear()
+
+    def disable_instrumentation(self):
+        """
+        stop recording, drops the loaded (counting) catalogs
+        """
+        with self._lock:
+            self._instrumentation = None
+            self._catalogs.clear()
+            self._chains.clear()
+
+    def set_class(self, class_):
+        """
+        parse the catalog files by class_ (called with the open file) from now on,
+        the loaded catalogs are kept
+        """
+        with self._lock:
+            self._class = class_
+
+    def get_class(self):
+        return self._class
+
+    def get_instrumentation(self):
+        return self._instrumentation
+
+    def add_bundle(self, localedir, bundle):
+        """
+        take the catalogs of localedir from bundle (if contained)
+        """
+        with self._lock:
+            if self._bundles.get(localedir) is bundle:
+                return
+            self._bundles[localedir] = bundle
+            for key in [key for key in self._catalogs if key[1] == localedir]:
+                del self._catalogs[key]
+            self._superseded = {key for key in self._superseded if key[1] != localedir}
+        self.invalidate_missing(localedir)
+
+    def fallback(self):
+        """
+        return the shared catalog of the default language (no translation)
+        """
+        return self._null
+
+    def _fallback(self, domain, language):
+        """
+        return the catalog of the default language in place of the missing catalog of domain/language
+        (counting the lookups if instrumentation is enabled)
+        """
+        instrumentation = self._instrumentation
+        if instrumentation is None:
+            return self._null
+        return instrumentation.wrap(domain, language, self._null)
+
+    def invalidate_missing(self, localedir = None):
+        """
+        forget the missing languages of localedir resp. of all locale trees
+        """
+        with self._lock:
+            if localedir is None:
+                self._missing.clear()
+            else:
+                for key in [key for key in self._missing if key[1] == localedir]:
+                    del self._missing[key]
+        self._notify()
+
+    def reload(self, domain, localedir = None, language = None):
+        """
+        load a loaded catalog again and swap it in atomically
+
+        requests still holding the former catalog keep using it,
+        a catalog which no longer exists is dropped
+        the catalog is read from the .mo file from now on, even if the bundle of localedir contains it
+        returns False if the catalog was not loaded
+        """
+        key = (domain, localedir, language)
+        with self._lock:
+            if key not in self._catalogs:
+                return False
+            if localedir in self._bundles:
+                self._superseded.add(key)
+        instrumentation = self._instrumentation
+        start = time.perf_counter()
+        try:
+            lang = self._load(domain, localedir, language)
+        except FileNotFoundError:
+            with self._lock:
+                self._superseded.discard(key)       # taken from the bundle again, if contained
+            self.discard(domain, localedir, language)
+            return True
+        if instrumentation is not None:
+            instrumentation.record_load(domain, language, time.perf_counter() - start)
+            lang = instrumentation.wrap(domain, language, lang)
+        with self._lock:
+            if key in self._catalogs:
+                self._catalogs[key] = lang
+        self._notify()
+        return True
+
+    def get_keys(self):
+        """
+        return the (domain, localedir, language) of all loaded catalogs
+        """
+        with self._lock:
+            return list(self._catalogs)
+
+    def discard(self, domain, localedir = None, language = None):
+        """
+        drop a single catalog, it is reloaded on next request
+        """
+        with self._lock:
+            self._catalogs.pop((domain, localedir, language), None)
+            self._missing.pop((domain, localedir, language), None)
+        self._notify()
+
+    def clear(self):
+        """
+        drop all catalogs and reset the counters
+        """
+        with self._lock:
+            self._catalogs.clear()
+            self._missing.clear()
+            self._domain_sets.clear()
+            self._chains.clear()
+            self._hits = 0
+            self._misses = 0
+            self._evictions = 0
+            self._negative_hits = 0
+        self._notify()
+
+    def add_listener(self, listener):
+        """
+        call listener() after catalogs were reloaded, discarded or cleared,
+        e.g. to drop what was derived from the former catalogs
+        """
+        with self._lock:
+            self._listeners.append(listener)
+
+    def remove_listener(self, listener):
+        with self._lock:
+            if listener in self._listeners:
+                self._listeners.remove(listener)
+
+    def _notify(self):
+        with self._lock:
+            listeners = list(self._listeners)
+        for listener in listeners:
+            listener()
+
+    def set_maxsize(self, maxsize):
+        """
+        keep at most maxsize catalogs, evicts the least recently used ones beyond
+        """
+        with self._lock:
+            self._maxsize = maxsize
+            while len(self._catalogs) > self._maxsize:
+                self._catalogs.popitem(last = False)
+                self._evictions += 1
+
+    def get_maxsize(self):
+        return self._maxsize
+
+    def get_stats(self):
+        with self._lock:
+            return {
+                'hits': self._hits,
+                'misses': self._misses,
+                'evictions': self._evictions,
+                'negative_hits': self._negative_hits,
+                'size': len(self._catalogs),
+                'missing': len(self._missing),
+                'maxsize': self._maxsize,
+                }
+
+
+class DomainSet:
+    """
+    Catalogs of several domains of one language
+
+    gettext()/ngettext()/... translate by the default domain, dgettext()/dngettext() by the given domain
+    """
+
+    def __init__(self, catalogs, default_domain, language = None):
+        self._catalogs = dict(catalogs)
+        self._default = self._catalogs[default_domain]
+        self._language = language
+
+    def get_language(self):
+        return self._language
+
+    def get_catalogs(self):
+        return tuple(self._catalogs.values())
+
+    def get_translation(self, domain):
+        """
+        return the catalog of domain (no translation for unknown domains)
+        """
+        return self._catalogs.get(domain, _NULL)
+
+    def has_domain(self, domain):
+        return domain in self._catalogs
+
+    def gettext(self, message):
+        return self._default.gettext(message)
+
+    def ngettext(self, msgid1, msgid2, n):
+        return self._default.ngettext(msgid1, msgid2, n)
+
+    def pgettext(self, context, message):
+        return self._default.pgettext(context, message)
+
+    def npgettext(self, context, msgid1, msgid2, n):
+        return self._default.npgettext(context, msgid1, msgid2, n)
+
+    def dgettext(self, domain, message):
+        return self._catalogs.get(domain, _NULL).gettext(message)
+
+    def dngettext(self, domain, msgid1, msgid2, n):
+        return self._catalogs.get(domain, _NULL).ngettext(msgid1, msgid2, n)
+
+    def install(self, names = None):
+        """
+        legacy mode: install the default domain (see gettext.NullTranslations.install)
+        """
+        self._default.install(names)
+
+
+registry = TranslationRegistry()
+
+
+_NULL = _gettext.NullTranslations()
+_active = contextvars.ContextVar('translation', default = _NULL)
+
+
+def activate(lang):
+    """
+    make lang the catalog of the current context (thread resp. asyncio task)
+
+    returns a token for deactivate()
+    """
+    return _active.set(lang)
+
+
+def deactivate(token):
+    """
+    restore the catalog which was active before activate() returned token
+    """
+    _active.reset(token)
+
+
+@contextmanager
+def using(lang):
+    """
+    activate lang for the duration of the with-block
+    """
+    token = _active.set(lang)
+    try:
+        yield lang
+    finally:
+        _active.reset(token)
+
+
+async def activate_language(domain, localedir, language, fallback = True):
+    """
+    load the catalog of domain/language without blocking the event loop (see TranslationRegistry.get)
+    and activate it for the current asyncio task
+
+    returns a token for deactivate()
+    """
+    return activate(await registry.get(domain, localedir, language, fallback = fallback))
+
+
+def get_translation():
+    """
+    return the catalog of the current context (no translation if none is activated)
+    """
+    return _active.get()
+
+
+def gettext(message):
+    return _active.get().gettext(message)
+
+
+def ngettext(msgid1, msgid2, n):
+    return _active.get().ngettext(msgid1, msgid2, n)
+
+
+def gettext_many(messages, lang = None):
+    """
+    translate all messages by one catalog resolution
+
+    messages are msgids resp. (msgid, args) pairs where args is a tuple (positional)
+    or a dict (keyword) of format arguments
+    lang is the catalog, default the catalog of the current context
+    """
+    if lang is None:
+        lang = _active.get()
+    translate = lang.gettext
+    formatters = msgformat.formatters               # shared with format_message
+    result = []
+    for message in messages:
+        if isinstance(message, str):
+            result.append(translate(message))
+        else:
+            msgid, args = message
+            if isinstance(args, dict):
+                result.append(formatters.get(lang, msgid)(**args))
+            else:
+                result.append(formatters.get(lang, msgid)(*args))
+    return result
+
+
+DOMAIN_ARGPARSE = 'argparse'
+
+_argparse_lock = threading.Lock()
+_argparse_originals = None                          # (argparse._, argparse.ngettext) while hooked
+
+
+def hook_argparse():
+    """
+    let argparse translate by the domain 'argparse' of the DomainSet of the current context
+
+    if no DomainSet with domain 'argparse' is active, argparse translates as before
+    (by the global gettext domain and the environment); idempotent
+    returns True if argparse was hooked by this call
+    """
+    global _argparse_originals
+    with _argparse_lock:
+        if _argparse_originals is not None:
+            return False
+        argparse_gettext = argparse._
+        argparse_ngettext = argparse.ngettext
+
+        def _(message):
+            active = _active.get()
+            if isinstance(active, DomainSet) and active.has_domain(DOMAIN_ARGPARSE):
+                return active.dgettext(DOMAIN_ARGPARSE, message)
+            return argparse_gettext(message)
+
+        def ngettext(msgid1, msgid2, n):
+            active = _active.get()
+            if isinstance(active, DomainSet) and active.has_domain(DOMAIN_ARGPARSE):
+                return active.dngettext(DOMAIN_ARGPARSE, msgid1, msgid2, n)
+            return argparse_ngettext(msgid1, msgid2, n)
+
+        argparse._ = _
+        argparse.ngettext = ngettext
+        _argparse_originals = (argparse_gettext, argparse_ngettext)
+        return True
+
+
+def unhook_argparse():
+    """
+    restore the translation functions of argparse replaced by hook_argparse()
+    """
+    global _argparse_originals
+    with _argparse_lock:
+        if _argparse_originals is None:
+            return
+        argparse._, argparse.ngettext = _argparse_originals
+        _argparse_originals = None
+
+
+@contextmanager
+def argparse_hooked():
+    """
+    hook argparse for the duration of the with-block (it stays hooked if it was hooked before)
+    """
+    hooked = hook_argparse()
+    try:
+        yield
+    finally:
+        if hooked:
+            unhook_argparse()
@@ -0,0 +1,152 @@
+# coding:utf-8
+"""
+Hot reload of changed translation catalogs.
+
+CatalogWatcher polls the .mo files of a locale tree
+::
+
+    <localedir>/<language>/LC_MESSAGES/<domain>.mo
+
+by os.stat (modification time and size; the standard library offers no
+inotify binding). For each changed .mo file, the affected catalogs of the
+translation registry are loaded again on the watcher thread and swapped in
+atomically (see TranslationRegistry.reload), so running requests never see
+a half-loaded catalog. A new .mo file invalidates the cached missing
+languages of the locale tree.
+
+Replace .mo files atomically (write a temporary file and rename it), as
+memory-mapped catalogs (see module motranslations) read the file lazily.
+
+Usage:
+::
+
+    from watcher import watch
+    from translations import registry
+
+    watch(registry, localedir, interval = 2.0)
+
+"""
+import gettext
+import os
+import threading
+
+INTERVAL_DEFAULT = 2.0
+
+
+class CatalogWatcher:
+    """
+    Polls the .mo files of localedir and reloads the affected catalogs of registry
+    """
+
+    def __init__(self, registry, localedir, interval = INTERVAL_DEFAULT, log = None):
+        self._registry = registry
+        self._localedir = localedir
+        self._interval = interval
+        self._log = log
+        self._thread = None
+        self._stop = threading.Event()
+        self._files = self._scan()
+
+    def _scan(self):
+        """
+        return {path of .mo file: (mtime, size)}
+        """
+        files = {}
+        try:
+            languages = os.scandir(self._localedir)
+        except OSError:
+            return files
+        with languages:
+            for language in languages:
+                lc_messages = os.path.join(language.path, 'LC_MESSAGES')
+                try:
+                    entries = os.scandir(lc_messages)
+                except OSError:
+                    continue
+                with entries:
+                    for entry in entries:
+                        if entry.name.endswith('.mo'):
+                            try:
+                                stat = entry.stat()
+                            except OSError:
+                                continue
+                            files[entry.path] = (stat.st_mtime_ns, stat.st_size)
+        return files
+
+    def check(self):
+        """
+        poll once, reload the catalogs of changed files
+
+        returns the list of changed (new, modified, removed) files
+        """
+        files = self._scan()
+        changed = [path for path in files.keys() | self._files.keys() if files.get(path) != self._files.get(path)]
+        if not changed:
+            return changed
+        if any(path not in self._files for path in changed):
+            self._registry.invalidate_missing(self._localedir)
+        self._files = files
+
+        changed_set = {os.path.normcase(os.path.abspath(path)) for path in changed}
+        for domain, localedir, language in self._registry.get_keys():
+            if localedir != self._localedir:
+                continue
+            candidates = gettext.find(domain, localedir, None if language is None else [language], all = True)
+            candidates = {os.path.normcase(os.path.abspath(path)) for path in candidates}
+            # a removed file is no longer found, reload if it is the domain's file of the language
+            removed = {path for path in changed_set if os.path.basename(path) == domain + '.mo'
+                       and os.path.basename(os.path.dirname(os.path.dirname(path))) == language}
+            if candidates & changed_set or removed:
+                try:
+                    self._registry.reload(domain, localedir, language)
+                except OSError as e:
+                    if self._log is not None:
+                        self._log.error('reload of {}/{} failed: {}'.format(domain, language, e))
+                    continue
+                if self._log is not None:
+                    self._log.info('reloaded {}/{}'.format(domain, language))
+        return changed
+
+    def start(self):
+        """
+        poll every interval seconds on a background thread
+        """
+        if self._thread is not None:
+            return
+        self._stop.clear()
+
+        def run():
+            while not self._stop.wait(self._interval):
+                try:
+                    self.check()
+                except Exception as e:              # keep watching
+                    if self._log is not None:
+                        self._log.exception('catalog watcher: {}'.format(e))
+
+        self._thread = threading.Thread(target = run, name = 'catalog-watcher', daemon = True)
+        self._thread.start()
+
+    def stop(self):
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+
+    def get_localedir(self):
+        return self._localedir
+
+
+_watchers = {}
+_watchers_lock = threading.Lock()
+
+
+def watch(registry, localedir, interval = INTERVAL_DEFAULT, log = None):
+    """
+    return the (started) process-wide watcher of registry/localedir
+    """
+    with _watchers_lock:
+        watcher = _watchers.get((id(registry), localedir))
+        if watcher is None:
+            watcher = _watchers[(id(registry), localedir)] = CatalogWatcher(registry, localedir, interval, log)
+            watcher.start()
+    return watcher